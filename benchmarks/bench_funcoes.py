@@ -0,0 +1,72 @@
+# Microbenchmarks das funções de limpeza, filtragem e estatísticas usadas pela API e pelo aplicativo.
+# Uso: python -m benchmarks.bench_funcoes [--repeticoes 5] [--saida resultado.json]
+import argparse
+import statistics
+import sys
+import time
+import pandas as pd
+from benchmarks.fixtures import gerar_partida
+from benchmarks.relatorio import metadados, salvar
+from src.limpeza import registros_esparsos, registros_json, serializar_parquet, filtrar_categorias
+from src.consultas import filtrar_eventos, contar_por, paginar
+from src.estatisticas import tabela_jogadores
+from src.compactacao import compactar_eventos
+from src.planejador import agregados_partida, responder_rapido
+from src.normalizacao import normalizar_eventos
+from src.indices import IndiceEventos
+from src.analises import rede_de_passes, mapa_de_finalizacoes, mapas_de_calor
+
+
+def medir(funcao, repeticoes: int) -> dict:
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {'minimo_ms': round(min(tempos), 3), 'mediana_ms': round(statistics.median(tempos), 3),
+            'maximo_ms': round(max(tempos), 3)}
+
+
+def casos(bruta: pd.DataFrame, partida: pd.DataFrame) -> dict:
+    # As funções recebem a partida normalizada, como no repositório da API
+    agregados = agregados_partida(partida)
+    indice = IndiceEventos(partida)
+    principais = filtrar_eventos(partida, indice, tipos=['Shot', 'Pass', 'Foul Committed'])
+    return {
+        'normalizacao.normalizar_eventos': lambda: normalizar_eventos(bruta),
+        'limpeza.registros_esparsos': lambda: registros_esparsos(partida),
+        'limpeza.registros_json': lambda: registros_json(partida),
+        'limpeza.serializar_parquet': lambda: serializar_parquet(partida),
+        'indices.IndiceEventos': lambda: IndiceEventos(partida),
+        'consultas.filtrar_eventos': lambda: filtrar_eventos(partida, indice, tipos=['Pass'], jogador='Jogador05', minuto_inicio=10),
+        'consultas.contar_por': lambda: contar_por(principais, 'jogador', 10),
+        'consultas.paginar': lambda: paginar(principais, 3),
+        'estatisticas.tabela_jogadores': lambda: tabela_jogadores(partida),
+        'analises.rede_de_passes': lambda: rede_de_passes(partida),
+        'analises.mapa_de_finalizacoes': lambda: mapa_de_finalizacoes(partida),
+        'analises.mapas_de_calor': lambda: mapas_de_calor(partida),
+        'compactacao.compactar_eventos': lambda: compactar_eventos(partida),
+        'planejador.agregados_partida': lambda: agregados_partida(partida),
+        'planejador.responder_rapido': lambda: responder_rapido(agregados, 'Quantos passes o Time Casa Jogador05 fez?'),
+        'limpeza.filtrar_categorias': lambda: filtrar_categorias(partida, indice, ['Gols', 'Passes', 'Finalizações', 'Faltas']),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Microbenchmarks das funções de dados.')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--eventos', type=int, default=4000)
+    parser.add_argument('--saida', help='arquivo JSON com os resultados (padrão: saída padrão)')
+    argumentos = parser.parse_args()
+
+    bruta = gerar_partida(numero_eventos=argumentos.eventos)
+    partida, normalizacao = normalizar_eventos(bruta)
+    resultados = []
+    for nome, funcao in casos(bruta, partida).items():
+        resultado = {'funcao': nome, **medir(funcao, argumentos.repeticoes)}
+        resultados.append(resultado)
+        print(f'{nome}: {resultado["mediana_ms"]:.2f} ms', file=sys.stderr)
+
+    salvar({**metadados(vars(argumentos)), 'partida': list(bruta.shape), 'normalizacao': normalizacao,
+            'resultados': resultados}, argumentos.saida)
@@ -0,0 +1,103 @@
+# Tempo de subida: importação dos módulos (python -X importtime) e tempo até /pronto responder 200.
+# Uso: python -m benchmarks.bench_inicializacao [--repeticoes 5] [--modulos src.main src.app] [--saida inicializacao.json]
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.relatorio import metadados, salvar
+
+
+def importar(modulo: str) -> tuple[float, list[tuple[str, int, int]]]:
+    # Cada medida roda num processo novo, como na subida de um worker ou de uma réplica
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+                              capture_output=True, text=True, check=True)
+    duracao = time.perf_counter() - inicio
+    linhas = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, nome = linha.removeprefix('import time:').split('|')
+        linhas.append((nome.rstrip(), int(proprio), int(acumulado)))
+    return duracao, linhas
+
+
+def pacotes_mais_pesados(linhas: list[tuple[str, int, int]], quantidade: int) -> list[dict]:
+    # Soma o tempo próprio de cada pacote de primeiro nível (google, langchain, pandas...)
+    pacotes = {}
+    for nome, proprio, _ in linhas:
+        pacote = nome.strip().split('.')[0]
+        pacotes[pacote] = pacotes.get(pacote, 0) + proprio
+    maiores = sorted(pacotes.items(), key=lambda item: item[1], reverse=True)[:quantidade]
+    return [{'pacote': pacote, 'ms': round(microssegundos / 1000, 1)} for pacote, microssegundos in maiores]
+
+
+def medir_importacao(modulo: str, repeticoes: int, quantidade: int) -> dict:
+    tempos, totais, linhas = [], [], []
+    for _ in range(repeticoes):
+        duracao, linhas = importar(modulo)
+        tempos.append(duracao * 1000)
+        totais.append(sum(proprio for _, proprio, _ in linhas) / 1000)
+    return {'funcao': f'importacao {modulo}', 'mediana_ms': round(statistics.median(totais), 1),
+            'processo_ms': round(statistics.median(tempos), 1), 'modulos': len(linhas),
+            'pacotes': pacotes_mais_pesados(linhas, quantidade)}
+
+
+def porta_livre() -> int:
+    with socket.socket() as conexao:
+        conexao.bind(('127.0.0.1', 0))
+        return conexao.getsockname()[1]
+
+
+def medir_prontidao(repeticoes: int, limite: float = 60) -> dict:
+    # Do início do processo do uvicorn até a primeira resposta 200 de /pronto
+    tempos = []
+    for _ in range(repeticoes):
+        porta = porta_livre()
+        ambiente = {**os.environ, 'CACHE_DIR': tempfile.mkdtemp(prefix='bench_')}
+        inicio = time.perf_counter()
+        servidor = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'src.main:app', '--port', str(porta),
+                                     '--log-level', 'warning'], env=ambiente)
+        try:
+            while time.perf_counter() - inicio < limite:
+                try:
+                    if httpx.get(f'http://127.0.0.1:{porta}/pronto').status_code == 200:
+                        tempos.append((time.perf_counter() - inicio) * 1000)
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        finally:
+            servidor.terminate()
+            servidor.wait()
+    return {'funcao': 'prontidao src.main', 'mediana_ms': round(statistics.median(tempos), 1) if tempos else None,
+            'medidas': len(tempos)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tempo de importação e de subida da API.')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--modulos', nargs='+', default=['src.main'])
+    parser.add_argument('--pacotes', type=int, default=8, help='quantos pacotes mais pesados listar')
+    parser.add_argument('--sem-prontidao', action='store_true', help='mede só a importação')
+    parser.add_argument('--saida', help='arquivo JSON com os resultados (padrão: saída padrão)')
+    argumentos = parser.parse_args()
+
+    resultados = []
+    for modulo in argumentos.modulos:
+        resultado = medir_importacao(modulo, argumentos.repeticoes, argumentos.pacotes)
+        resultados.append(resultado)
+        pacotes = ', '.join(f'{pacote["pacote"]} {pacote["ms"]:.0f} ms' for pacote in resultado['pacotes'])
+        print(f'{modulo}: {resultado["mediana_ms"]:.0f} ms de importação, {resultado["processo_ms"]:.0f} ms de processo '
+              f'({pacotes})', file=sys.stderr)
+    if not argumentos.sem_prontidao:
+        resultado = medir_prontidao(argumentos.repeticoes)
+        resultados.append(resultado)
+        print(f'/pronto: {resultado["mediana_ms"]} ms', file=sys.stderr)
+
+    salvar({**metadados(vars(argumentos)), 'resultados': resultados}, argumentos.saida)
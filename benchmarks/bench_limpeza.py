@@ -0,0 +1,42 @@
+# Compara a limpeza antiga (laço por célula) com a vetorizada em src/limpeza.py.
+# Uso: python -m benchmarks.bench_limpeza
+import json
+import timeit
+import numpy as np
+from benchmarks.fixtures import gerar_partida
+from src.limpeza import registros_esparsos, registros_json
+
+
+def esparsos_antigo(eventos):
+    partida = []
+    for evento_bruto in eventos.to_dict(orient='records'):
+        evento = {}
+        for chave, valor in evento_bruto.items():
+            if valor is not np.nan:
+                evento[chave] = valor
+        partida.append(evento)
+    return partida
+
+
+def json_antigo(eventos):
+    partida = eventos.to_dict(orient='records')
+    for evento in partida:
+        for chave, valor in evento.items():
+            if valor is np.nan:
+                valor = None
+            evento[chave] = valor
+    return json.dumps(partida)
+
+
+def medir(funcao, eventos, repeticoes=5):
+    return min(timeit.repeat(lambda: funcao(eventos), number=1, repeat=repeticoes)) * 1000
+
+
+if __name__ == '__main__':
+    eventos = gerar_partida()
+    print(f'Partida sintética: {eventos.shape[0]} eventos x {eventos.shape[1]} colunas')
+    for nome, antigo, novo in [('registros esparsos', esparsos_antigo, registros_esparsos),
+                               ('json com null', json_antigo, registros_json)]:
+        tempo_antigo = medir(antigo, eventos)
+        tempo_novo = medir(novo, eventos)
+        print(f'{nome}: antes {tempo_antigo:.1f} ms, depois {tempo_novo:.1f} ms ({tempo_antigo / tempo_novo:.1f}x)')
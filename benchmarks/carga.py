@@ -0,0 +1,121 @@
+# Teste de carga das rotas da API com o StatsBomb e o Gemini simulados localmente.
+# Uso: python -m benchmarks.carga [--concorrencias 1 4 16] [--requisicoes 100] [--latencia-gemini 0.5] [--saida resultado.json]
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Os caches da API são criados em uma pasta temporária, para cada execução começar do zero
+os.environ.setdefault('CACHE_DIR', tempfile.mkdtemp(prefix='bench_'))
+
+import httpx
+import uvicorn
+from benchmarks.fixtures import EventosLocais, ModeloFalso, AgenteFalso
+from benchmarks.relatorio import metadados, percentis, rss_pico_mb, salvar
+from src.main import app
+from src.repositorio import repositorio
+from src.dependencias import obter_modelo, obter_agente
+
+
+SEM_CACHE = {'Cache-Control': 'no-cache'}
+
+# Nome, método, caminho, corpo e cabeçalhos; {id} é trocado pelo id da partida
+CENARIOS = {
+    'partidas_json': ('GET', '/partidas/{id}', None, {}),
+    'partidas_parquet': ('GET', '/partidas/{id}?formato=parquet', None, {}),
+    'jogadores': ('GET', '/partidas/{id}/jogadores', None, {}),
+    'player_profile': ('POST', '/player_profile', {'nome_jogador': 'Time Casa Jogador05'}, {}),
+    'match_summary': ('POST', '/match_summary', {}, SEM_CACHE),
+    'match_summary_cache': ('POST', '/match_summary', {}, {}),
+    'commentary': ('POST', '/commentary', {'tom_narracao': 'Formal'}, SEM_CACHE),
+    'commentary_stream': ('POST', '/commentary/stream', {'tom_narracao': 'Formal'}, SEM_CACHE),
+    'react_agent_rapido': ('POST', '/react_agent', {'pergunta': 'Quantos passes o Time Casa fez?'}, {}),
+    'react_agent': ('POST', '/react_agent', {'pergunta': 'Como foi a pressão do Time Fora no segundo tempo?'}, {}),
+}
+
+
+def porta_livre() -> int:
+    with socket.socket() as conexao:
+        conexao.bind(('127.0.0.1', 0))
+        return conexao.getsockname()[1]
+
+
+def iniciar_servidor(porta: int) -> uvicorn.Server:
+    servidor = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=porta, log_level='warning'))
+    threading.Thread(target=servidor.run, daemon=True).start()
+    while not servidor.started:
+        time.sleep(0.05)
+    return servidor
+
+
+async def requisitar(cliente: httpx.AsyncClient, cenario: tuple, id_partida: int) -> tuple[float, bool]:
+    metodo, caminho, corpo, cabecalhos = cenario
+    inicio = time.perf_counter()
+    try:
+        resposta = await cliente.request(metodo, caminho.format(id=id_partida), headers=cabecalhos,
+                                         json=None if corpo is None else {'id_partida': id_partida, **corpo})
+        sucesso = resposta.status_code < 400
+    except httpx.HTTPError:
+        sucesso = False
+    return (time.perf_counter() - inicio) * 1000, sucesso
+
+
+async def rodar_nivel(url: str, cenario: tuple, concorrencia: int, requisicoes: int, partidas: list[int]) -> dict:
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=120) as cliente:
+        # Aquecimento: cada partida é carregada uma vez antes da medição
+        for id_partida in partidas:
+            await requisitar(cliente, cenario, id_partida)
+
+        fila = iter(range(requisicoes))
+        latencias, falhas = [], 0
+
+        async def trabalhador():
+            nonlocal falhas
+            for numero in fila:
+                latencia, sucesso = await requisitar(cliente, cenario, partidas[numero % len(partidas)])
+                latencias.append(latencia)
+                falhas += not sucesso
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+        duracao = time.perf_counter() - inicio
+
+    return {'concorrencia': concorrencia, 'requisicoes': requisicoes, 'falhas': falhas, **percentis(latencias),
+            'media_ms': round(sum(latencias) / len(latencias), 2), 'vazao_rps': round(requisicoes / duracao, 2),
+            'rss_pico_mb': rss_pico_mb()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Teste de carga das rotas da API.')
+    parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument('--concorrencias', nargs='+', type=int, default=[1, 4, 16, 64])
+    parser.add_argument('--requisicoes', type=int, default=100, help='requisições por cenário e concorrência')
+    parser.add_argument('--partidas', type=int, default=4, help='partidas distintas usadas nas requisições')
+    parser.add_argument('--latencia-statsbomb', type=float, default=0.2)
+    parser.add_argument('--latencia-gemini', type=float, default=0.5)
+    parser.add_argument('--saida', help='arquivo JSON com os resultados (padrão: saída padrão)')
+    argumentos = parser.parse_args()
+
+    repositorio.carregador = EventosLocais(argumentos.latencia_statsbomb)
+    app.dependency_overrides[obter_modelo] = lambda: ModeloFalso(argumentos.latencia_gemini)
+    app.dependency_overrides[obter_agente] = lambda: AgenteFalso(argumentos.latencia_gemini)
+
+    porta = porta_livre()
+    servidor = iniciar_servidor(porta)
+    partidas = list(range(1, argumentos.partidas + 1))
+    resultados = []
+    for nome in argumentos.cenarios:
+        for concorrencia in argumentos.concorrencias:
+            resultado = {'cenario': nome, **asyncio.run(rodar_nivel(f'http://127.0.0.1:{porta}', CENARIOS[nome],
+                                                                     concorrencia, argumentos.requisicoes, partidas))}
+            resultados.append(resultado)
+            print(f'{nome} x{concorrencia}: p50 {resultado["p50_ms"]} ms, p99 {resultado["p99_ms"]} ms, '
+                  f'{resultado["vazao_rps"]} req/s, {resultado["falhas"]} falhas', file=sys.stderr)
+    servidor.should_exit = True
+
+    salvar({**metadados(vars(argumentos)), 'resultados': resultados}, argumentos.saida)
@@ -0,0 +1,29 @@
+# Compara dois resultados JSON dos benchmarks (por exemplo, de commits diferentes).
+# Uso: python -m benchmarks.comparar antes.json depois.json
+import json
+import sys
+
+
+def chave(resultado: dict) -> tuple:
+    return tuple(resultado[campo] for campo in ('funcao', 'cenario', 'concorrencia') if campo in resultado)
+
+
+def metrica(resultado: dict) -> str:
+    return 'mediana_ms' if 'mediana_ms' in resultado else 'p95_ms'
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], encoding='utf-8') as arquivo:
+        antes = json.load(arquivo)
+    with open(sys.argv[2], encoding='utf-8') as arquivo:
+        depois = json.load(arquivo)
+    print(f'{antes.get("commit")} -> {depois.get("commit")}')
+    anteriores = {chave(resultado): resultado for resultado in antes['resultados']}
+    for resultado in depois['resultados']:
+        anterior = anteriores.get(chave(resultado))
+        if anterior is None:
+            continue
+        nome = metrica(resultado)
+        valor_antes, valor_depois = anterior[nome], resultado[nome]
+        variacao = f'{(valor_depois / valor_antes - 1) * 100:+.1f}%' if valor_antes else '-'
+        print(f'{" x".join(str(parte) for parte in chave(resultado))}: {nome} {valor_antes} -> {valor_depois} ({variacao})')
@@ -0,0 +1,149 @@
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+TIPOS = ['Pass', 'Ball Receipt*', 'Carry', 'Pressure', 'Shot', 'Foul Committed', 'Dispossessed', 'Duel', 'Clearance']
+PESOS = np.array([30, 28, 25, 8, 1, 1, 1, 3, 3], dtype=float) / 100
+
+
+def gerar_partida(id_partida: int = 1, numero_eventos: int = 4000, colunas_extras: int = 60) -> pd.DataFrame:
+    # Partida sintética com o mesmo formato do sb.events: ~100 colunas, a maioria vazia em cada evento
+    rng = np.random.default_rng(id_partida)
+    times = ['Time Casa', 'Time Fora']
+    elencos = {time: [f'{time} Jogador{i:02d}' for i in range(16)] for time in times}
+    eventos = []
+
+    for time in times:
+        eventos.append({'type': 'Starting XI', 'team': time, 'minute': 0, 'second': 0, 'period': 1,
+                        'tactics': {'formation': 442,
+                                    'lineup': [{'player': {'id': i, 'name': nome}, 'position': {'id': 1, 'name': 'Center Back'},
+                                                'jersey_number': i} for i, nome in enumerate(elencos[time][:11])]}})
+
+    for k in range(numero_eventos):
+        minuto = k * 95 // numero_eventos
+        time = times[rng.integers(2)]
+        em_campo = elencos[time][:11] if minuto < 60 else elencos[time][:8] + elencos[time][11:14]
+        tipo = rng.choice(TIPOS, p=PESOS)
+        evento = {'type': tipo, 'team': time, 'possession_team': time, 'player': rng.choice(em_campo),
+                  'minute': minuto, 'second': int(rng.integers(60)), 'period': 1 if minuto < 45 else 2,
+                  'position': 'Center Back', 'play_pattern': rng.choice(['Regular Play', 'From Throw In', 'From Corner']),
+                  'location': [float(rng.uniform(0, 120)), float(rng.uniform(0, 80))],
+                  'duration': float(rng.random()), 'related_events': [str(uuid.UUID(int=int(rng.integers(2**62))))]}
+        if tipo == 'Pass':
+            evento['pass_end_location'] = [float(rng.uniform(0, 120)), float(rng.uniform(0, 80))]
+            evento['pass_recipient'] = rng.choice(elencos[time][:11])
+            evento['pass_length'] = float(rng.uniform(1, 50))
+            if rng.random() < 0.2:
+                evento['pass_outcome'] = 'Incomplete'
+        elif tipo == 'Shot':
+            evento['shot_outcome'] = rng.choice(['Goal', 'Saved', 'Off T', 'Blocked'], p=[0.2, 0.3, 0.3, 0.2])
+            evento['shot_statsbomb_xg'] = float(rng.random() * 0.5)
+            evento['shot_end_location'] = [120.0, 40.0, 1.0]
+        elif tipo == 'Foul Committed' and rng.random() < 0.3:
+            evento['foul_committed_card'] = 'Yellow Card'
+        eventos.append(evento)
+
+    for time in times:
+        for i in range(3):
+            eventos.append({'type': 'Substitution', 'team': time, 'player': elencos[time][8 + i], 'minute': 60,
+                            'second': 0, 'period': 2, 'substitution_replacement': elencos[time][11 + i],
+                            'substitution_outcome': 'Tactical'})
+
+    partida = pd.DataFrame(eventos)
+    for c in range(colunas_extras):
+        coluna = np.full(len(partida), np.nan, dtype=object)
+        coluna[rng.integers(0, len(partida), 40)] = 'valor'
+        partida[f'extra_{c:02d}'] = coluna
+    partida['id'] = [str(uuid.UUID(int=int(rng.integers(2**62)))) for _ in range(len(partida))]
+    partida['match_id'] = id_partida
+    partida['timestamp'] = '00:00:00.000'
+    return partida
+
+
+DIRETORIO_GRAVACOES = Path(__file__).parent / 'dados'
+
+
+class EventosLocais:
+    """
+    Substituto local do sb.events: devolve partidas gravadas em benchmarks/dados/{id}.pkl
+    (python -m benchmarks.fixtures <ids>) e, na falta delas, partidas sintéticas.
+    A latência simula o download do StatsBomb.
+    """
+
+    def __init__(self, latencia_segundos: float = 0.0, diretorio: Path = DIRETORIO_GRAVACOES):
+        self.latencia_segundos = latencia_segundos
+        self.diretorio = Path(diretorio)
+        self.chamadas = 0
+
+    def __call__(self, id_partida: int) -> pd.DataFrame:
+        self.chamadas += 1
+        time.sleep(self.latencia_segundos)
+        caminho = self.diretorio / f'{id_partida}.pkl'
+        if caminho.exists():
+            return pd.read_pickle(caminho)
+        return gerar_partida(id_partida)
+
+
+class _Uso:
+    def __init__(self, prompt: str, texto: str):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(texto) // 4
+
+
+class _Resposta:
+    def __init__(self, prompt: str, texto: str):
+        self.text = texto
+        self.usage_metadata = _Uso(prompt, texto)
+
+
+class _RespostaTransmitida:
+    def __init__(self, prompt: str, partes: list[str], latencia_segundos: float):
+        self.partes = partes
+        self.latencia_segundos = latencia_segundos
+        self.usage_metadata = _Uso(prompt, ''.join(partes))
+
+    async def __aiter__(self):
+        for parte in self.partes:
+            await asyncio.sleep(self.latencia_segundos / len(self.partes))
+            yield _Resposta('', parte)
+
+
+class ModeloFalso:
+    # Mesmo uso do genai.GenerativeModel nas rotas, com latência configurável e sem rede
+    def __init__(self, latencia_segundos: float = 0.5, tamanho_resposta: int = 800):
+        self.latencia_segundos = latencia_segundos
+        self.tamanho_resposta = tamanho_resposta
+
+    async def generate_content_async(self, instrucoes: str, stream: bool = False):
+        texto = 'Narração da partida. ' * (self.tamanho_resposta // 21)
+        if stream:
+            partes = [texto[inicio:inicio + 100] for inicio in range(0, len(texto), 100)]
+            return _RespostaTransmitida(instrucoes, partes, self.latencia_segundos)
+        await asyncio.sleep(self.latencia_segundos)
+        return _Resposta(instrucoes, texto)
+
+
+class AgenteFalso:
+    # Simula o AgentExecutor: algumas chamadas ao LLM intercaladas com as ferramentas
+    def __init__(self, latencia_segundos: float = 0.5, iteracoes: int = 3):
+        self.latencia_segundos = latencia_segundos
+        self.iteracoes = iteracoes
+
+    async def ainvoke(self, input: dict):
+        for _ in range(self.iteracoes):
+            await asyncio.sleep(self.latencia_segundos)
+        return {**input, 'output': 'Resposta do agente.'}
+
+
+if __name__ == '__main__':
+    # Grava partidas reais do StatsBomb para os benchmarks (precisa de acesso à internet)
+    from statsbombpy import sb
+    DIRETORIO_GRAVACOES.mkdir(exist_ok=True)
+    for id_partida in sys.argv[1:]:
+        sb.events(int(id_partida)).to_pickle(DIRETORIO_GRAVACOES / f'{id_partida}.pkl')
+        print(f'Partida {id_partida} gravada.')
@@ -0,0 +1,43 @@
+# Saída em JSON dos benchmarks, para comparar resultados entre commits
+import json
+import platform
+import resource
+import subprocess
+import sys
+from datetime import datetime, timezone
+import numpy as np
+
+
+def commit_atual() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadados(parametros: dict) -> dict:
+    return {'commit': commit_atual(), 'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'plataforma': platform.platform(), 'parametros': parametros}
+
+
+def rss_pico_mb() -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentis(latencias_ms: list[float]) -> dict:
+    if not latencias_ms:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    p50, p95, p99 = np.percentile(latencias_ms, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2), 'p99_ms': round(float(p99), 2)}
+
+
+def salvar(resultado: dict, caminho: str | None):
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if caminho:
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto + '\n')
+    else:
+        print(texto)
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from .repositorio import repositorio
+
+
+# Campo do StatsBomb: 120 x 80 jardas; a grade padrão dos mapas de calor tem zonas de 10 x 10 jardas
+COMPRIMENTO_CAMPO, LARGURA_CAMPO = 120, 80
+COLUNAS_GRADE, LINHAS_GRADE = 12, 8
+
+
+def _com_localizacao(partida: pd.DataFrame, colunas: list[str], tipo: str | None = None) -> pd.DataFrame:
+    # Só as colunas usadas, para não copiar a tabela inteira da partida ao filtrar
+    if 'location_x' not in partida.columns:
+        return pd.DataFrame(columns=colunas)
+    filtro = partida['location_x'].notna()
+    if tipo is not None:
+        filtro &= partida['type'] == tipo
+    return partida.loc[filtro, [coluna for coluna in colunas if coluna in partida.columns]]
+
+
+def rede_de_passes(partida: pd.DataFrame) -> dict:
+    """
+    Por time: matriz jogador -> jogador com os passes completos (contados com np.bincount sobre os
+    pares de índices) e a posição média de cada jogador nos passes que deu e recebeu.
+    """
+    redes = {}
+    if not {'pass_recipient', 'location_x', 'pass_end_location_x'}.issubset(partida.columns):
+        return redes
+    filtro = (partida['type'] == 'Pass') & partida['pass_recipient'].notna() & partida['location_x'].notna()
+    if 'pass_outcome' in partida.columns:
+        # Passes sem resultado (pass_outcome nulo) foram completados
+        filtro &= partida['pass_outcome'].isna()
+    passes = partida.loc[filtro, ['team', 'player', 'pass_recipient', 'location_x', 'location_y',
+                                  'pass_end_location_x', 'pass_end_location_y']]
+    for time, do_time in passes.groupby('team', observed=True, sort=True):
+        origem = do_time['player'].to_numpy(dtype=object)
+        destino = do_time['pass_recipient'].to_numpy(dtype=object)
+        codigos, jogadores = pd.factorize(np.concatenate([origem, destino]), sort=True)
+        quantidade, total = len(jogadores), len(do_time)
+        de, para = codigos[:total], codigos[total:]
+        matriz = np.bincount(de * quantidade + para, minlength=quantidade * quantidade).reshape(quantidade, quantidade)
+
+        # Posição média: onde o jogador deu os passes e onde recebeu os dos companheiros
+        x = np.concatenate([do_time['location_x'].to_numpy(dtype=np.float64), do_time['pass_end_location_x'].to_numpy(dtype=np.float64)])
+        y = np.concatenate([do_time['location_y'].to_numpy(dtype=np.float64), do_time['pass_end_location_y'].to_numpy(dtype=np.float64)])
+        validos = ~(np.isnan(x) | np.isnan(y))
+        envolvimentos = np.bincount(codigos[validos], minlength=quantidade)
+        divisor = np.maximum(envolvimentos, 1)
+        media_x = np.bincount(codigos[validos], weights=x[validos], minlength=quantidade) / divisor
+        media_y = np.bincount(codigos[validos], weights=y[validos], minlength=quantidade) / divisor
+
+        redes[time] = {
+            'jogadores': list(jogadores),
+            'passes': matriz.tolist(),
+            'posicoes': [[round(float(px), 1), round(float(py), 1)] for px, py in zip(media_x, media_y)],
+            'envolvimentos': envolvimentos.tolist(),
+            'total_passes': int(total),
+        }
+    return redes
+
+
+def principais_ligacoes(rede: dict, top_n: int = 10) -> list[dict]:
+    # Pares com mais passes, lidos da matriz da rede sem percorrer os eventos
+    matriz = np.asarray(rede['passes'])
+    if matriz.size == 0:
+        return []
+    ordem = np.argsort(matriz, axis=None, kind='stable')[::-1][:top_n]
+    de, para = np.unravel_index(ordem, matriz.shape)
+    return [{'de': rede['jogadores'][origem], 'para': rede['jogadores'][destino], 'passes': int(matriz[origem, destino])}
+            for origem, destino in zip(de, para) if matriz[origem, destino] > 0]
+
+
+def mapa_de_finalizacoes(partida: pd.DataFrame) -> dict:
+    """
+    Por time: as finalizações (posição, xG e resultado) em ordem de jogo e o xG acumulado ao longo
+    da partida (np.cumsum), além dos totais de xG e gols por jogador.
+    """
+    chutes = _com_localizacao(partida, ['team', 'player', 'period', 'minute', 'second', 'location_x', 'location_y',
+                                        'shot_statsbomb_xg', 'shot_outcome'], 'Shot')
+    mapas = {}
+    for time, do_time in chutes.groupby('team', observed=True, sort=True):
+        do_time = do_time.sort_values(['period', 'minute', 'second'], kind='stable')
+        xg = do_time['shot_statsbomb_xg'].fillna(0).to_numpy(dtype=np.float64) \
+            if 'shot_statsbomb_xg' in do_time.columns else np.zeros(len(do_time))
+        resultados = do_time['shot_outcome'].astype(object).where(do_time['shot_outcome'].notna(), None).tolist() \
+            if 'shot_outcome' in do_time.columns else [None] * len(do_time)
+        gols = (do_time['shot_outcome'] == 'Goal').to_numpy(dtype=bool, na_value=False) \
+            if 'shot_outcome' in do_time.columns else np.zeros(len(do_time), dtype=bool)
+        minutos = do_time['minute'].to_numpy(dtype=np.float64) + do_time['second'].to_numpy(dtype=np.float64) / 60
+        jogadores = do_time['player'].to_numpy(dtype=object)
+
+        codigos, nomes = pd.factorize(jogadores, sort=True)
+        xg_por_jogador = np.bincount(codigos, weights=xg, minlength=len(nomes))
+        gols_por_jogador = np.bincount(codigos, weights=gols, minlength=len(nomes))
+        chutes_por_jogador = np.bincount(codigos, minlength=len(nomes))
+
+        mapas[time] = {
+            'finalizacoes': [{'minuto': round(float(minuto), 2), 'jogador': jogador, 'x': round(float(x), 1),
+                              'y': round(float(y), 1), 'xg': round(float(valor), 3), 'resultado': resultado}
+                             for minuto, jogador, x, y, valor, resultado
+                             in zip(minutos, jogadores, do_time['location_x'], do_time['location_y'], xg, resultados)],
+            'xg_acumulado': [[round(float(minuto), 2), round(float(total), 3)] for minuto, total in zip(minutos, np.cumsum(xg))],
+            'xg_total': round(float(xg.sum()), 3),
+            'gols': int(gols.sum()),
+            'jogadores': sorted(({'jogador': nome, 'finalizacoes': int(quantidade), 'gols': int(gols_jogador),
+                                  'xg': round(float(xg_jogador), 3)}
+                                 for nome, quantidade, gols_jogador, xg_jogador
+                                 in zip(nomes, chutes_por_jogador, gols_por_jogador, xg_por_jogador)),
+                                key=lambda jogador: jogador['xg'], reverse=True),
+        }
+    return mapas
+
+
+def _zonas(x: np.ndarray, y: np.ndarray, colunas: int, linhas: int) -> np.ndarray:
+    coluna = np.clip((x * colunas / COMPRIMENTO_CAMPO).astype(np.int64), 0, colunas - 1)
+    linha = np.clip((y * linhas / LARGURA_CAMPO).astype(np.int64), 0, linhas - 1)
+    return linha * colunas + coluna
+
+
+def mapas_de_calor(partida: pd.DataFrame, colunas: int = COLUNAS_GRADE, linhas: int = LINHAS_GRADE) -> dict:
+    """
+    Contagem de ações com localização por zona do campo (linhas x colunas), para cada time e cada jogador.
+    Um único np.bincount sobre (grupo, zona) monta todos os mapas de uma vez.
+    """
+    eventos = _com_localizacao(partida, ['team', 'player', 'location_x', 'location_y'])
+    zonas = _zonas(eventos['location_x'].to_numpy(dtype=np.float64), eventos['location_y'].to_numpy(dtype=np.float64),
+                   colunas, linhas)
+    tamanho = colunas * linhas
+    mapas = {'colunas': colunas, 'linhas': linhas}
+    for campo, coluna in (('times', 'team'), ('jogadores', 'player')):
+        grupos = eventos[coluna].to_numpy(dtype=object)
+        presentes = pd.notna(grupos)
+        codigos, nomes = pd.factorize(grupos[presentes], sort=True)
+        contagem = np.bincount(codigos * tamanho + zonas[presentes], minlength=len(nomes) * tamanho)
+        matrizes = contagem.reshape(len(nomes), linhas, colunas)
+        mapas[campo] = {nome: matriz.tolist() for nome, matriz in zip(nomes, matrizes)}
+    return mapas
+
+
+def obter_rede_de_passes(id_partida: int) -> dict:
+    return repositorio.derivado(id_partida, 'rede_de_passes', rede_de_passes)
+
+
+def obter_mapa_de_finalizacoes(id_partida: int) -> dict:
+    return repositorio.derivado(id_partida, 'mapa_de_finalizacoes', mapa_de_finalizacoes)
+
+
+def obter_mapas_de_calor(id_partida: int) -> dict:
+    return repositorio.derivado(id_partida, 'mapas_de_calor', mapas_de_calor)
+
+
+def filtrar_por_nome(valores: dict, trecho: str | None) -> dict:
+    # Times ou jogadores cujo nome contém o trecho (sem diferenciar maiúsculas)
+    if not trecho:
+        return valores
+    trecho = trecho.lower()
+    return {nome: valor for nome, valor in valores.items() if trecho in nome.lower()}
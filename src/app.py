@@ -1,13 +1,12 @@
 
 # Importações
 import streamlit as st
-import requests
-import google.generativeai as genai
-import os
-from statsbombpy import sb
-import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import requests
+from limpeza import filtrar_categorias
+from indices import IndiceEventos
+from catalogo import Catalogo, DIRETORIO_CATALOGO, INTERVALO_ATUALIZACAO
+from cliente import ClienteAPI
 
 
 
@@ -23,19 +22,79 @@ pag_1_title = 'Selecionar a Partida'
 pag_2_title = 'Eventos da Partida'
 pag_3_title = 'Estatísticas dos Jogadores'
 pag_4_title = 'Assistentes Virtuais'
+pag_5_title = 'Análises da Partida'
 
-api_key = os.getenv('GEMINI_KEY')
-genai.configure(api_key=api_key)
-modelo = genai.GenerativeModel('gemini-1.5-flash')
+GRAFICOS = {'estatisticas': 'Estatísticas', 'passes': 'Mapa de passes', 'finalizacoes': 'Mapa de finalizações'}
 
 if all(key not in st.session_state for key in ['camp_selecionado', 'temp_selecionada', 'partida_selecionada',
-    'id_partida', 'partidas', 'eventos', 'pos_campo', 'taticas']):
+    'id_partida', 'partidas', 'pos_campo', 'taticas']):
         st.session_state['camp_selecionado'] = 0
         st.session_state['temp_selecionada'] = 0
         st.session_state['partida_selecionada'] = 0
         st.session_state['id_partida'] = None
         st.session_state['partidas'] = None
-        st.session_state['eventos'] = None
+
+
+
+# Catálogo de competições e partidas, compartilhado entre as sessões
+@st.cache_resource
+def obter_catalogo():
+    catalogo = Catalogo(DIRETORIO_CATALOGO, INTERVALO_ATUALIZACAO)
+    catalogo.iniciar_atualizacao()
+    return catalogo
+
+
+@st.cache_data(ttl=INTERVALO_ATUALIZACAO)
+def carregar_competicoes():
+    return obter_catalogo().competicoes()
+
+
+@st.cache_data(ttl=INTERVALO_ATUALIZACAO)
+def carregar_partidas(id_campeonato, id_temporada):
+    return obter_catalogo().partidas(id_campeonato, id_temporada)
+
+
+# Eventos e jogadores vêm da API; uma cópia de cada partida é compartilhada por todas as sessões
+@st.cache_resource
+def obter_cliente():
+    return ClienteAPI()
+
+
+@st.cache_resource(max_entries=16)
+def carregar_eventos(id_partida):
+    return obter_cliente().eventos(id_partida)
+
+
+# Índice por tipo de evento, montado uma vez por partida e usado nos filtros da página de eventos
+@st.cache_resource(max_entries=16)
+def carregar_indice(id_partida):
+    return IndiceEventos(carregar_eventos(id_partida))
+
+
+@st.cache_data(max_entries=64)
+def carregar_jogadores(id_partida):
+    return {jogador['jogador']: jogador['time'] for jogador in obter_cliente().jogadores(id_partida)}
+
+
+@st.cache_data(max_entries=256)
+def carregar_estatisticas(id_partida, nome_jogador):
+    return obter_cliente().estatisticas_jogador(id_partida, nome_jogador)
+
+
+# Redes de passes, finalizações e mapas de calor, calculados pela API uma vez por partida
+@st.cache_data(max_entries=64)
+def carregar_analise(id_partida, analise):
+    return obter_cliente().analise(id_partida, analise)
+
+
+def sem_falha(carregar, *args):
+    # Falhas passageiras da API saem das funções com cache como exceção (e não ficam guardadas);
+    # aqui viram um aviso, e a próxima interação tenta de novo
+    try:
+        return carregar(*args)
+    except requests.RequestException:
+        st.error('Erro! Não foi possível acessar a API. Tente novamente.')
+        return None
 
 
 
@@ -46,9 +105,8 @@ def formatar_partida(partidas, id_partida):
     return nome_partida
 
 
-def formatar_jogador(eventos, nome_jogador):
-    linha_jogador = eventos[eventos['player'] == nome_jogador].iloc[0]
-    nome_jogador = f'{linha_jogador['team']} — {linha_jogador['player']}'
+def formatar_jogador(jogadores, nome_jogador):
+    nome_jogador = f'{jogadores[nome_jogador]} — {nome_jogador}'
     return nome_jogador
 
 
@@ -71,40 +129,13 @@ def exibir_partida(partidas, sel_partida):
     st.markdown(f':green[(ID da partida = {sel_partida})]')
 
 
-def filtrar_eventos(eventos, filtros):
-    df_original = eventos.copy()
-    df_filtrado = pd.DataFrame([])
-    if 'Gols' in filtros:
-        df_filtrado = pd.concat([df_filtrado, df_original[df_original['shot_outcome'] == 'Goal']])
-    if 'Passes' in filtros:
-        df_filtrado = pd.concat([df_filtrado, df_original[df_original['type'] == 'Pass']])
-    if 'Finalizações' in filtros:
-        df_filtrado = pd.concat([df_filtrado, df_original[df_original['type'] == 'Shot']])
-    if 'Faltas' in filtros:
-        df_filtrado = pd.concat([df_filtrado, df_original[df_original['type'] == 'Foul Committed']])
-
-    df_filtrado.sort_index(inplace=True)
-    df_filtrado = df_filtrado.sort_values(by='minute').to_dict(orient='records')
-    partida = []
-
-    for evento_bruto in df_filtrado:
-        evento = {}
-        for chave, valor in evento_bruto.items():
-                if valor is not np.nan:
-                    evento[chave] = valor
-        partida.append(evento)
-
-    df_final = pd.DataFrame(partida)
-    return df_final
-
-
 # Páginas
 def pagina_um():
     # ESCOLHENDO E EXIBINDO UMA PARTIDA
     st.header('• Selecionar a Partida')
 
     # Competição
-    competicoes = sb.competitions()
+    competicoes = carregar_competicoes()
     nomes_competicoes = list(competicoes['competition_name'].unique())
     try:
         filtro_campeonato = st.selectbox(label='Selecione o campeonato:', options=nomes_competicoes, index=st.session_state['camp_selecionado'])
@@ -122,7 +153,7 @@ def pagina_um():
     st.session_state['temp_selecionada'] = temporadas.index(filtro_temporada)
     id_temporada = competicoes[competicoes['season_name'] == filtro_temporada]['season_id'].values[0]
 
-    st.session_state['partidas'] = sb.matches(competition_id=id_campeonato, season_id=id_temporada)
+    st.session_state['partidas'] = carregar_partidas(int(id_campeonato), int(id_temporada))
 
     # Partida
     try:
@@ -138,22 +169,24 @@ def pagina_um():
                                             )
 
     st.session_state['partida_selecionada'] = int(st.session_state['partidas'][st.session_state['partidas']['match_id'] == st.session_state['id_partida']].index[0])
-    st.session_state['eventos'] = sb.events(st.session_state['id_partida'])
 
     exibir_partida(st.session_state['partidas'], st.session_state['id_partida'])
 
 
 def pagina_dois():
     st.header('• Eventos da Partida')
-    if st.session_state['eventos'] is not None:
+    if st.session_state['id_partida'] is not None:
+        eventos = sem_falha(carregar_eventos, st.session_state['id_partida'])
+        if eventos is None:
+            return
         filtrar_radio = st.radio(label='', options=['Todos', 'Filtrar eventos'])
         if filtrar_radio == 'Filtrar eventos':
             opcoes_eventos = ['Gols', 'Passes', 'Finalizações', 'Faltas']
             filtro_eventos = st.multiselect(label='Selecione um tipo de evento:', options=opcoes_eventos, default=opcoes_eventos)
-            eventos_filtrados = filtrar_eventos(st.session_state['eventos'], filtro_eventos)
+            eventos_filtrados = filtrar_categorias(eventos, carregar_indice(st.session_state['id_partida']), filtro_eventos)
             st.write(eventos_filtrados)
         else:
-            st.write(st.session_state['eventos'])
+            st.write(eventos)
     else:
         st.error('Selecione uma partida na página inicial.')
 
@@ -161,63 +194,54 @@ def pagina_dois():
 
 def pagina_tres():
     st.header('• Estatísticas dos Jogadores')
-    if st.session_state['eventos'] is not None:
-        opcoes_jogadores = st.session_state['eventos'].sort_values(by='team')['player'].dropna().unique()
+    if st.session_state['id_partida'] is not None:
+        jogadores = sem_falha(carregar_jogadores, st.session_state['id_partida'])
+        if jogadores is None:
+            return
+        opcoes_jogadores = list(jogadores)
         sel_jogador = st.selectbox('Selecione um jogador:',
                                     options=opcoes_jogadores,
-                                    format_func=lambda nome_jogador: formatar_jogador(st.session_state['eventos'], nome_jogador))
-        resp_estatisticas = requests.post('http://127.0.0.1:8000/player_profile', json={'id_partida':st.session_state['id_partida'],
-                                                                                        'nome_jogador': sel_jogador}
-                                                                                        )
-        if resp_estatisticas:
-            df_estatisticas = pd.DataFrame(resp_estatisticas.json()['estatisticas'], index=[0])
+                                    format_func=lambda nome_jogador: formatar_jogador(jogadores, nome_jogador))
+        estatisticas = sem_falha(carregar_estatisticas, st.session_state['id_partida'], sel_jogador)
+        if estatisticas:
+            df_estatisticas = pd.DataFrame(estatisticas, index=[0])
             st.dataframe(df_estatisticas)
-            # Visualização
-            fig_1, ax_1 = plt.subplots()
-            
-            ax_1.bar(df_estatisticas.drop('jogador', axis=1).columns.tolist(),
-                            df_estatisticas.drop('jogador', axis=1).values.tolist()[0],
-                            color=['blue', 'green', 'red', 'purple'])
-
-            plt.title(f'Estatísticas de {df_estatisticas["jogador"][0]}')
-            plt.ylabel('Quantidade')
-            st.pyplot(fig_1)
+            sel_grafico = st.selectbox('Gráfico:', options=list(GRAFICOS), format_func=lambda tipo: GRAFICOS[tipo])
+            selecionados = [sel_jogador]
+            estatisticas_2 = None
             if st.checkbox('Comparar com outro jogador:'):
                 opcoes_jogador_2 = list(opcoes_jogadores).copy()
                 opcoes_jogador_2.remove(sel_jogador)
                 sel_jogador_2 = st.selectbox('Selecione outro jogador:',
                                             options=opcoes_jogador_2,
-                                            format_func=lambda nome_jogador: formatar_jogador(st.session_state['eventos'], nome_jogador))
-                resp_estatisticas_2 = requests.post('http://127.0.0.1:8000/player_profile', json={'id_partida':st.session_state['id_partida'],
-                                                                                'nome_jogador': sel_jogador_2})
-                if resp_estatisticas_2:
-                    df_estatisticas_2 = pd.DataFrame(resp_estatisticas_2.json()['estatisticas'], index=[0])
-                    st.dataframe(df_estatisticas_2)
-                    # Visualização
-                    fig_2, ax_2= plt.subplots()
-                    
-                    ax_2.bar(df_estatisticas_2.drop('jogador', axis=1).columns.tolist(),
-                                    df_estatisticas_2.drop('jogador', axis=1).values.tolist()[0],
-                                    color=['blue', 'green', 'red', 'purple'])
-
-                    plt.title(f'Estatísticas de {df_estatisticas_2["jogador"][0]}')
-                    plt.ylabel('Quantidade')
-                    st.pyplot(fig_2)
-                    # Métricas Comparativas
-                    st.subheader('Métricas')
-                    col_1, col_2 = st.columns(2)
-                    # Jogador 1
-                    col_1.metric('Jogador', df_estatisticas['jogador'][0])
-                    col_1.metric('Passes', df_estatisticas['passes'][0])
-                    col_1.metric('Finalizações', df_estatisticas['finalizacoes'][0])
-                    col_1.metric('Desarmes', df_estatisticas['desarmes'][0])
-                    col_1.metric('Minutos Jogados', df_estatisticas['minutos_jogados'][0])
-                    # Jogador 2
-                    col_2.metric('Jogador', df_estatisticas_2['jogador'][0])
-                    col_2.metric('Passes', df_estatisticas_2['passes'][0])
-                    col_2.metric('Finalizações', df_estatisticas_2['finalizacoes'][0])
-                    col_2.metric('Desarmes', df_estatisticas_2['desarmes'][0])
-                    col_2.metric('Minutos Jogados', df_estatisticas_2['minutos_jogados'][0])
+                                            format_func=lambda nome_jogador: formatar_jogador(jogadores, nome_jogador))
+                estatisticas_2 = sem_falha(carregar_estatisticas, st.session_state['id_partida'], sel_jogador_2)
+                if estatisticas_2:
+                    st.dataframe(pd.DataFrame(estatisticas_2, index=[0]))
+                    selecionados.append(sel_jogador_2)
+            # Visualização: imagem renderizada e guardada pela API (um gráfico para todos os jogadores selecionados)
+            imagem = obter_cliente().grafico(st.session_state['id_partida'], sel_grafico, selecionados)
+            if imagem:
+                st.image(imagem)
+            else:
+                st.error('Não foi possível carregar o gráfico.')
+            if estatisticas_2:
+                df_estatisticas_2 = pd.DataFrame(estatisticas_2, index=[0])
+                # Métricas Comparativas
+                st.subheader('Métricas')
+                col_1, col_2 = st.columns(2)
+                # Jogador 1
+                col_1.metric('Jogador', df_estatisticas['jogador'][0])
+                col_1.metric('Passes', df_estatisticas['passes'][0])
+                col_1.metric('Finalizações', df_estatisticas['finalizacoes'][0])
+                col_1.metric('Desarmes', df_estatisticas['desarmes'][0])
+                col_1.metric('Minutos Jogados', df_estatisticas['minutos_jogados'][0])
+                # Jogador 2
+                col_2.metric('Jogador', df_estatisticas_2['jogador'][0])
+                col_2.metric('Passes', df_estatisticas_2['passes'][0])
+                col_2.metric('Finalizações', df_estatisticas_2['finalizacoes'][0])
+                col_2.metric('Desarmes', df_estatisticas_2['desarmes'][0])
+                col_2.metric('Minutos Jogados', df_estatisticas_2['minutos_jogados'][0])
     else:
         st.error('Selecione uma partida na página inicial.')
 
@@ -229,40 +253,84 @@ def pagina_quatro():
         # Resumo
         st.subheader('Resumo')
         if st.button('Gerar resumo da partida por IA'):
-            with st.spinner('Carregando...'):
-                resp_resumo = requests.post('http://127.0.0.1:8000/match_summary', json={'id_partida':st.session_state['id_partida']})
-                st.write(resp_resumo.json()['resumo'])
+            # Erros da API aparecem ao percorrer o stream, dentro do st.write_stream
+            sem_falha(st.write_stream, obter_cliente().transmitir('/match_summary/stream', {'id_partida':st.session_state['id_partida']}))
         
         # Narração
         st.subheader('Narração')
         tom_narracao = st.radio(label='', options=['Formal', 'Humorístico', 'Técnico'])
         if st.button('Gerar narração da partida por IA'):
-            with st.spinner('Carregando...'):
-                resp_narracao = requests.post('http://127.0.0.1:8000/commentary', json={'id_partida':st.session_state['id_partida'],
-                                                                                        'tom_narracao': tom_narracao})
-                st.write(resp_narracao.json()['resumo'])
+            sem_falha(st.write_stream, obter_cliente().transmitir('/commentary/stream', {'id_partida':st.session_state['id_partida'],
+                                                                                        'tom_narracao': tom_narracao}))
 
         # Agente ReAct
         st.subheader('Pergunte algo ao assistente')
         if prompt := st.chat_input('Digite sua pergunta:'):
             with st.spinner('Carregando...'):
-                resp_pergunta = requests.post('http://127.0.0.1:8000/react_agent', json={'id_partida':st.session_state['id_partida'],
-                                                                                        'pergunta':prompt})
-                st.write(resp_pergunta.json())
+                resp_pergunta = sem_falha(obter_cliente().perguntar, st.session_state['id_partida'], prompt)
+                if resp_pergunta is not None:
+                    st.write(resp_pergunta)
         
     else:
         st.error('Selecione uma partida na página inicial.')
 
 
 
+def pagina_cinco():
+    st.header('• Análises da Partida')
+    if st.session_state['id_partida'] is not None:
+        id_partida = st.session_state['id_partida']
+
+        # Finalizações e xG acumulado
+        st.subheader('Finalizações e xG')
+        finalizacoes = sem_falha(carregar_analise, id_partida, 'finalizacoes')
+        if finalizacoes:
+            colunas = st.columns(len(finalizacoes))
+            for coluna, (time, mapa) in zip(colunas, finalizacoes.items()):
+                coluna.metric(time, f'{mapa["xg_total"]:.2f} xG', f'{mapa["gols"]} gols, {len(mapa["finalizacoes"])} finalizações',
+                              delta_color='off')
+            linhas_xg = pd.concat([pd.DataFrame(mapa['xg_acumulado'], columns=['minuto', 'xG']).assign(time=time)
+                                   for time, mapa in finalizacoes.items() if mapa['xg_acumulado']])
+            st.line_chart(linhas_xg, x='minuto', y='xG', color='time')
+            st.dataframe(pd.DataFrame([{**finalizacao, 'time': time} for time, mapa in finalizacoes.items()
+                                       for finalizacao in mapa['finalizacoes']]))
+
+        # Rede de passes
+        st.subheader('Rede de Passes')
+        redes = sem_falha(carregar_analise, id_partida, 'rede_de_passes')
+        if redes:
+            sel_time = st.selectbox('Selecione um time:', options=list(redes))
+            rede = redes[sel_time]
+            posicoes = pd.DataFrame(rede['posicoes'], columns=['x', 'y'], index=rede['jogadores'])
+            posicoes['passes'] = rede['envolvimentos']
+            st.scatter_chart(posicoes, x='x', y='y', size='passes')
+            st.dataframe(pd.DataFrame(rede['passes'], index=rede['jogadores'], columns=rede['jogadores']))
+
+        # Mapa de calor
+        st.subheader('Mapa de Calor')
+        calor = sem_falha(carregar_analise, id_partida, 'mapa_de_calor')
+        if calor:
+            opcoes = list(calor['times']) + list(calor['jogadores'])
+            sel_calor = st.selectbox('Time ou jogador:', options=opcoes)
+            matriz = calor['times'].get(sel_calor) or calor['jogadores'][sel_calor]
+            # Linhas e colunas são zonas do campo (120 x 80 jardas), da esquerda para a direita e de cima para baixo
+            largura = 120 // calor['colunas']
+            st.dataframe(pd.DataFrame(matriz, columns=[f'{coluna * largura}-{(coluna + 1) * largura}' for coluna in range(calor['colunas'])]))
+    else:
+        st.error('Selecione uma partida na página inicial.')
+
+
+
 # Navegação
 st.sidebar.title('Navegação')
-pagina = st.sidebar.radio(label='Escolha uma página:', options=(pag_1_title, pag_2_title, pag_3_title, pag_4_title))
+pagina = st.sidebar.radio(label='Escolha uma página:', options=(pag_1_title, pag_2_title, pag_3_title, pag_4_title, pag_5_title))
 if pagina == pag_1_title:
     pagina_um()
 elif pagina == pag_2_title:
     pagina_dois()
 elif pagina == pag_3_title:
     pagina_tres()
-else:
+elif pagina == pag_4_title:
     pagina_quatro()
+else:
+    pagina_cinco()
@@ -0,0 +1,104 @@
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .repositorio import repositorio
+from .catalogo import catalogo
+
+
+TENTATIVAS = 3
+ESPERA_SEGUNDOS = 1.0
+
+logger = logging.getLogger(__name__)
+
+# Progresso dos aquecimentos, por (competição, temporada), consultado pelo endpoint de administração
+progresso_aquecimentos = {}
+_trava = threading.Lock()
+
+
+def baixar_partida(id_partida: int, tentativas: int = TENTATIVAS) -> bool:
+    # Repete a falha com espera exponencial; a última exceção é repassada
+    for tentativa in range(tentativas):
+        try:
+            return repositorio.aquecer(id_partida)
+        except Exception:
+            if tentativa == tentativas - 1:
+                raise
+            logger.warning('Falha ao baixar a partida %s (tentativa %s de %s).', id_partida, tentativa + 1, tentativas)
+            time.sleep(ESPERA_SEGUNDOS * 2 ** tentativa)
+
+
+def _novo_estado() -> dict:
+    return {'situacao': 'em_andamento', 'partidas': None, 'ja_em_cache': None, 'baixadas': 0, 'falhas': [],
+            'erro': None, 'inicio': time.time(), 'duracao_segundos': None}
+
+
+def reservar_aquecimento(id_competicao: int, id_temporada: int) -> bool:
+    # Marca a temporada como em andamento antes de agendar o aquecimento, para que dois pedidos
+    # seguidos não iniciem dois; retorna False se já havia um em andamento
+    with _trava:
+        estado = progresso_aquecimentos.get((id_competicao, id_temporada))
+        if estado is not None and estado['situacao'] == 'em_andamento':
+            return False
+        progresso_aquecimentos[(id_competicao, id_temporada)] = _novo_estado()
+    return True
+
+
+def aquecer_temporada(id_competicao: int, id_temporada: int, trabalhadores: int = 4,
+                      tentativas: int = TENTATIVAS) -> dict:
+    """
+    Baixa para o cache em disco os eventos de todas as partidas de uma competição/temporada.
+    Partidas já guardadas são puladas, então uma execução interrompida continua de onde parou.
+    """
+    chave = (id_competicao, id_temporada)
+    with _trava:
+        estado = progresso_aquecimentos.get(chave)
+        if estado is None or estado['situacao'] != 'em_andamento':
+            # Chamada direta (linha de comando), sem reserva pelo endpoint
+            estado = progresso_aquecimentos[chave] = _novo_estado()
+
+    try:
+        ids_partidas = catalogo.partidas(id_competicao, id_temporada)['match_id'].astype(int).tolist()
+    except Exception:
+        logger.exception('Não foi possível obter as partidas da temporada %s/%s.', id_competicao, id_temporada)
+        estado.update(situacao='falhou', erro='Erro! Não foi possível obter as partidas da temporada.',
+                      duracao_segundos=round(time.time() - estado['inicio'], 2))
+        return estado
+    pendentes = [id_partida for id_partida in ids_partidas if not repositorio.em_cache(id_partida)]
+    estado.update(partidas=len(ids_partidas), ja_em_cache=len(ids_partidas) - len(pendentes))
+
+    with ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='aquecimento') as executor:
+        tarefas = {executor.submit(baixar_partida, id_partida, tentativas): id_partida for id_partida in pendentes}
+        for concluidas, tarefa in enumerate(as_completed(tarefas), start=1):
+            id_partida = tarefas[tarefa]
+            try:
+                tarefa.result()
+                estado['baixadas'] += 1
+            except Exception:
+                logger.exception('Não foi possível baixar a partida %s.', id_partida)
+                estado['falhas'].append(id_partida)
+            logger.info('Aquecimento %s/%s: %s de %s partidas pendentes.', id_competicao, id_temporada,
+                        concluidas, len(pendentes))
+
+    estado['situacao'] = 'concluido' if not estado['falhas'] else 'concluido_com_falhas'
+    estado['duracao_segundos'] = round(time.time() - estado['inicio'], 2)
+    return estado
+
+
+def estado_aquecimento(id_competicao: int, id_temporada: int) -> dict | None:
+    with _trava:
+        estado = progresso_aquecimentos.get((id_competicao, id_temporada))
+    return None if estado is None else {**estado, 'falhas': list(estado['falhas'])}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Baixa para o cache os eventos de todas as partidas de uma competição/temporada.')
+    parser.add_argument('id_competicao', type=int)
+    parser.add_argument('id_temporada', type=int)
+    parser.add_argument('--trabalhadores', type=int, default=4)
+    parser.add_argument('--tentativas', type=int, default=TENTATIVAS)
+    argumentos = parser.parse_args()
+    print(aquecer_temporada(argumentos.id_competicao, argumentos.id_temporada,
+                            argumentos.trabalhadores, argumentos.tentativas))
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from .repositorio import DIRETORIO_CACHE
+
+
+VALIDADE_HORAS = float(os.getenv('CACHE_RESPOSTAS_HORAS', '720'))
+LIMITE_ENTRADAS = int(os.getenv('CACHE_RESPOSTAS_MAX', '5000'))
+
+
+class CacheRespostas:
+    """
+    Guarda as respostas geradas pelo LLM em um banco SQLite, com validade e limite de entradas.
+    A chave inclui o template do prompt e o modelo, então mudanças em qualquer um invalidam o cache.
+    """
+
+    def __init__(self, caminho: Path, validade_segundos: float, limite_entradas: int):
+        self.caminho = Path(caminho)
+        self.validade_segundos = validade_segundos
+        self.limite_entradas = limite_entradas
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.ignorados = 0
+        self._aberto = False
+
+    def abrir(self):
+        # Cria o banco na subida da API (ou no primeiro uso), e não na importação do módulo
+        if self._aberto:
+            return
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._conexao() as conexao:
+            # WAL: leituras de vários workers não esperam as gravações
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute("""
+                CREATE TABLE IF NOT EXISTS respostas (
+                    chave TEXT PRIMARY KEY,
+                    id_partida INTEGER,
+                    endpoint TEXT,
+                    estilo TEXT,
+                    resposta TEXT,
+                    criado_em REAL,
+                    acessado_em REAL
+                )
+            """)
+        self._aberto = True
+
+    @contextmanager
+    def _conexao(self):
+        conexao = sqlite3.connect(self.caminho, timeout=10)
+        try:
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    @contextmanager
+    def _conectar(self):
+        self.abrir()
+        with self._conexao() as conexao:
+            yield conexao
+
+    @staticmethod
+    def chave(id_partida: int, endpoint: str, estilo: str, template: str, modelo: str) -> str:
+        versao_prompt = hashlib.sha256(f'{modelo}\n{template}'.encode()).hexdigest()
+        return f'{endpoint}:{id_partida}:{estilo}:{versao_prompt}'
+
+    def obter(self, chave: str, contabilizar: bool = True) -> str | None:
+        agora = time.time()
+        with self._conectar() as conexao:
+            linha = conexao.execute('SELECT resposta, criado_em FROM respostas WHERE chave = ?', (chave,)).fetchone()
+            if linha is not None and agora - linha[1] <= self.validade_segundos:
+                conexao.execute('UPDATE respostas SET acessado_em = ? WHERE chave = ?', (agora, chave))
+                if contabilizar:
+                    with self._trava:
+                        self.acertos += 1
+                return linha[0]
+        if contabilizar:
+            with self._trava:
+                self.faltas += 1
+        return None
+
+    def ignorar(self):
+        # Requisições com "Cache-Control: no-cache" geram uma resposta nova, que substitui a guardada
+        with self._trava:
+            self.ignorados += 1
+
+    def guardar(self, chave: str, id_partida: int, endpoint: str, estilo: str, resposta: str):
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute('INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            (chave, id_partida, endpoint, estilo, resposta, agora, agora))
+            conexao.execute('DELETE FROM respostas WHERE criado_em < ?', (agora - self.validade_segundos,))
+            conexao.execute("""
+                DELETE FROM respostas WHERE chave IN (
+                    SELECT chave FROM respostas ORDER BY acessado_em DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.limite_entradas,))
+
+    def estatisticas(self) -> dict:
+        with self._conectar() as conexao:
+            entradas = conexao.execute('SELECT COUNT(*) FROM respostas').fetchone()[0]
+        with self._trava:
+            consultas = self.acertos + self.faltas
+            return {
+                'entradas': entradas,
+                'acertos': self.acertos,
+                'faltas': self.faltas,
+                'ignorados': self.ignorados,
+                'taxa_acertos': self.acertos / consultas if consultas else 0.0,
+            }
+
+
+cache_respostas = CacheRespostas(caminho=DIRETORIO_CACHE / 'respostas.sqlite3',
+                                 validade_segundos=VALIDADE_HORAS * 3600,
+                                 limite_entradas=LIMITE_ENTRADAS)
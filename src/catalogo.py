@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+
+
+DIRETORIO_CATALOGO = Path(os.getenv('CACHE_DIR', '.cache')) / 'catalogo'
+INTERVALO_ATUALIZACAO = int(os.getenv('CATALOGO_INTERVALO', '3600'))
+# A thread de atualização renova os dados a partir desta fração do intervalo, antes de eles vencerem
+ANTECEDENCIA_ATUALIZACAO = 0.75
+
+logger = logging.getLogger(__name__)
+
+
+def _competicoes_statsbomb() -> pd.DataFrame:
+    from statsbombpy import sb
+    return sb.competitions()
+
+
+def _partidas_statsbomb(id_competicao: int, id_temporada: int) -> pd.DataFrame:
+    from statsbombpy import sb
+    return sb.matches(competition_id=id_competicao, season_id=id_temporada)
+
+
+class Catalogo:
+    """
+    Competições e partidas do StatsBomb guardadas em disco, indexadas por competição e temporada.
+    Consultas são respondidas pelo que estiver guardado enquanto for mais novo que o intervalo; depois disso,
+    a própria consulta busca de novo. Uma thread opcional em segundo plano (iniciar_atualizacao) atualiza os
+    dados a partir de 3/4 do intervalo, antes que vençam, então quem consulta não espera pela fonte externa.
+    """
+
+    def __init__(self, diretorio: Path, intervalo_segundos: int,
+                 carregar_competicoes=_competicoes_statsbomb, carregar_partidas=_partidas_statsbomb):
+        self.diretorio = Path(diretorio)
+        self.intervalo_segundos = intervalo_segundos
+        self.carregar_competicoes = carregar_competicoes
+        self.carregar_partidas = carregar_partidas
+        self._memoria = {}
+        self._trava = threading.Lock()
+        self._thread = None
+
+    def _caminho(self, chave: tuple) -> Path:
+        return self.diretorio / ('_'.join(str(parte) for parte in chave) + '.pkl')
+
+    def _vencido(self, instante: float) -> bool:
+        return time.time() - instante >= self.intervalo_segundos
+
+    def _obter(self, chave: tuple, carregar) -> pd.DataFrame:
+        # Processos sem a thread de atualização (API, linha de comando) também respeitam o intervalo:
+        # dados guardados há mais tempo que ele são buscados de novo na consulta
+        with self._trava:
+            guardado = self._memoria.get(chave)
+        if guardado is not None and not self._vencido(guardado[0]):
+            return guardado[1]
+        caminho = self._caminho(chave)
+        if caminho.exists():
+            modificado = caminho.stat().st_mtime
+            if not self._vencido(modificado):
+                dados = pd.read_pickle(caminho)
+                with self._trava:
+                    self._memoria[chave] = (modificado, dados)
+                return dados
+        try:
+            return self._atualizar(chave, carregar)
+        except Exception:
+            # Sem acesso à fonte, a cópia vencida continua servindo até a próxima janela
+            dados = guardado[1] if guardado is not None else pd.read_pickle(caminho) if caminho.exists() else None
+            if dados is None:
+                raise
+            logger.exception('Não foi possível atualizar o catálogo %s; usando a cópia guardada.', chave)
+            with self._trava:
+                self._memoria[chave] = (time.time(), dados)
+            return dados
+
+    def _atualizar(self, chave: tuple, carregar) -> pd.DataFrame:
+        dados = carregar(*chave[1:])
+        caminho = self._caminho(chave)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+        dados.to_pickle(temporario)
+        os.replace(temporario, caminho)
+        with self._trava:
+            self._memoria[chave] = (time.time(), dados)
+        return dados
+
+    def competicoes(self) -> pd.DataFrame:
+        return self._obter(('competicoes',), self.carregar_competicoes)
+
+    def partidas(self, id_competicao: int, id_temporada: int) -> pd.DataFrame:
+        return self._obter(('partidas', int(id_competicao), int(id_temporada)), self.carregar_partidas)
+
+    def desatualizados(self) -> list[tuple]:
+        # Chaves guardadas em disco há mais tempo que a antecedência: a thread de atualização, que roda
+        # a cada 1/4 do intervalo, as renova antes que a consulta as encontre vencidas
+        limite = time.time() - self.intervalo_segundos * ANTECEDENCIA_ATUALIZACAO
+        chaves = []
+        for caminho in self.diretorio.glob('*.pkl'):
+            if caminho.stat().st_mtime < limite:
+                nome, *ids = caminho.stem.split('_')
+                chaves.append((nome, *(int(id_) for id_ in ids)))
+        return chaves
+
+    def atualizar_desatualizados(self):
+        for chave in self.desatualizados():
+            carregar = self.carregar_competicoes if chave[0] == 'competicoes' else self.carregar_partidas
+            try:
+                self._atualizar(chave, carregar)
+            except Exception:
+                logger.exception('Não foi possível atualizar o catálogo %s.', chave)
+
+    def iniciar_atualizacao(self):
+        if self._thread is not None:
+            return
+
+        def atualizar_periodicamente():
+            while True:
+                self.atualizar_desatualizados()
+                time.sleep(max(self.intervalo_segundos / 4, 1))
+
+        self._thread = threading.Thread(target=atualizar_periodicamente, name='catalogo', daemon=True)
+        self._thread.start()
+
+
+catalogo = Catalogo(DIRETORIO_CATALOGO, INTERVALO_ATUALIZACAO)
@@ -0,0 +1,119 @@
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+URL_API = os.getenv('API_URL', 'http://127.0.0.1:8000')
+TEMPO_CONEXAO = 3.05
+TEMPO_LEITURA = float(os.getenv('API_TEMPO_LIMITE', '120'))
+INTERVALO_TAREFAS = 1.0
+LIMITE_GRAFICOS = 64
+
+
+class ClienteAPI:
+    """
+    Acesso do aplicativo à API, com uma sessão HTTP reaproveitada (keep-alive e pool de conexões).
+    """
+
+    def __init__(self, url: str = URL_API):
+        self.url = url.rstrip('/')
+        self.sessao = requests.Session()
+        # Só requisições GET são repetidas automaticamente; POSTs podem disparar gerações no LLM
+        tentativas = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=['GET'])
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=tentativas)
+        self.sessao.mount('http://', adaptador)
+        self.sessao.mount('https://', adaptador)
+        # Últimas imagens de gráficos recebidas, com as ETags, para revalidar sem baixar de novo
+        self._graficos = OrderedDict()
+        self._trava = threading.Lock()
+
+    def _get(self, caminho: str, **kwargs) -> requests.Response:
+        return self.sessao.get(f'{self.url}{caminho}', timeout=(TEMPO_CONEXAO, TEMPO_LEITURA), **kwargs)
+
+    def _post(self, caminho: str, corpo: dict, **kwargs) -> requests.Response:
+        return self.sessao.post(f'{self.url}{caminho}', json=corpo, timeout=(TEMPO_CONEXAO, TEMPO_LEITURA), **kwargs)
+
+    def eventos(self, id_partida: int) -> pd.DataFrame:
+        # Localizações em colunas float (location_x, location_y), como a API guarda
+        resposta = self._get(f'/partidas/{id_partida}', params={'formato': 'parquet', 'localizacao': 'colunas'})
+        resposta.raise_for_status()
+        return pd.read_parquet(io.BytesIO(resposta.content))
+
+    def jogadores(self, id_partida: int) -> list[dict]:
+        resposta = self._get(f'/partidas/{id_partida}/jogadores')
+        resposta.raise_for_status()
+        return resposta.json()
+
+    def estatisticas_jogador(self, id_partida: int, nome_jogador: str) -> dict | None:
+        resposta = self._post('/player_profile', {'id_partida': id_partida, 'nome_jogador': nome_jogador})
+        # Falhas da API (5xx) viram exceção; só respostas definitivas (jogador não encontrado) viram None
+        if resposta.status_code >= 500:
+            resposta.raise_for_status()
+        return resposta.json()['estatisticas'] if resposta.ok else None
+
+    def analise(self, id_partida: int, analise: str, **filtros) -> dict | None:
+        # rede_de_passes, finalizacoes ou mapa_de_calor, com filtros opcionais de time e jogador
+        resposta = self._get(f'/partidas/{id_partida}/analises/{analise}', params=filtros)
+        if resposta.status_code >= 500:
+            resposta.raise_for_status()
+        return resposta.json() if resposta.ok else None
+
+    def grafico(self, id_partida: int, tipo: str, jogadores: list[str], formato: str = 'png') -> bytes | None:
+        chave = (id_partida, tipo, tuple(jogadores), formato)
+        with self._trava:
+            guardado = self._graficos.get(chave)
+        # Com a ETag da imagem guardada, a API responde 304 (sem corpo) se ela continua valendo
+        cabecalhos = {'If-None-Match': guardado[0]} if guardado else {}
+        resposta = self._get(f'/partidas/{id_partida}/graficos/{tipo}', params={'jogadores': list(jogadores), 'formato': formato},
+                             headers=cabecalhos)
+        if resposta.status_code == 304 and guardado:
+            return guardado[1]
+        if not resposta.ok:
+            return None
+        with self._trava:
+            self._graficos[chave] = (resposta.headers.get('ETag'), resposta.content)
+            self._graficos.move_to_end(chave)
+            while len(self._graficos) > LIMITE_GRAFICOS:
+                self._graficos.popitem(last=False)
+        return resposta.content
+
+    def perguntar(self, id_partida: int, pergunta: str) -> dict:
+        # O agente roda como tarefa em segundo plano; a conexão não fica presa durante as iterações
+        resposta = self._post('/tarefas/react_agent', {'id_partida': id_partida, 'pergunta': pergunta})
+        if not resposta.ok:
+            return resposta.json()
+        tarefa = self.aguardar_tarefa(resposta.json()['id_tarefa'])
+        return tarefa['resultado'] if tarefa['situacao'] == 'concluida' else {'detail': tarefa['erro']}
+
+    def aguardar_tarefa(self, id_tarefa: str) -> dict:
+        limite = time.monotonic() + TEMPO_LEITURA
+        while True:
+            # O statsbombpy instala um cache global para o requests; a situação da tarefa precisa vir sempre da API
+            resposta = self._get(f'/tarefas/{id_tarefa}', headers={'Cache-Control': 'no-cache'})
+            resposta.raise_for_status()
+            tarefa = resposta.json()
+            if tarefa['situacao'] in ('concluida', 'falhou'):
+                return tarefa
+            if time.monotonic() > limite:
+                return {**tarefa, 'situacao': 'falhou', 'erro': 'Erro! A tarefa demorou mais que o esperado.'}
+            time.sleep(INTERVALO_TAREFAS)
+
+    def transmitir(self, caminho: str, corpo: dict):
+        # Lê os server-sent events da API e devolve o texto aos poucos para o st.write_stream
+        with self._post(caminho, corpo, stream=True) as resposta:
+            # Erros da API (4xx/5xx) vêm em JSON, sem linhas "data:"; sem a verificação, o texto sairia vazio
+            resposta.raise_for_status()
+            for linha in resposta.iter_lines(decode_unicode=True):
+                if linha and linha.startswith('data: '):
+                    dados = json.loads(linha.removeprefix('data: '))
+                    if 'texto' in dados:
+                        yield dados['texto']
+                    elif 'erro' in dados:
+                        yield dados['erro']
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import threading
+from .metricas import medir
+
+
+MODELO_GEMINI = 'gemini-1.5-flash'
+
+logger = logging.getLogger(__name__)
+
+
+class ClienteIndisponivel(Exception):
+    pass
+
+
+class ClientePreguicoso:
+    """
+    Cliente criado só no primeiro uso: importar google.generativeai e o LangChain leva alguns segundos,
+    então o processo sobe sem eles e rotas que não usam o LLM (ou respostas do cache) nunca os carregam.
+    A criação roda numa thread, uma única vez; se falhar, é tentada de novo no próximo uso.
+    """
+
+    def __init__(self, nome: str, fabrica):
+        self.nome = nome
+        self._fabrica = fabrica
+        self._cliente = None
+        self._trava = threading.Lock()
+
+    @property
+    def carregado(self) -> bool:
+        return self._cliente is not None
+
+    def obter(self):
+        with self._trava:
+            if self._cliente is None:
+                try:
+                    with medir('inicializacao', self.nome):
+                        self._cliente = self._fabrica()
+                except Exception as erro:
+                    logger.exception('Não foi possível criar o cliente %s.', self.nome)
+                    raise ClienteIndisponivel(self.nome) from erro
+            return self._cliente
+
+    async def aobter(self):
+        if self._cliente is not None:
+            return self._cliente
+        return await asyncio.to_thread(self.obter)
+
+
+class ModeloPreguicoso(ClientePreguicoso):
+    async def generate_content_async(self, *args, **kwargs):
+        modelo = await self.aobter()
+        return await modelo.generate_content_async(*args, **kwargs)
+
+
+class AgentePreguicoso(ClientePreguicoso):
+    async def ainvoke(self, *args, **kwargs):
+        agente = await self.aobter()
+        return await agente.ainvoke(*args, **kwargs)
+
+
+def criar_modelo(api_key: str | None):
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(MODELO_GEMINI)
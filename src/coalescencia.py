@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+# Coalescências criadas, por nome, para as estatísticas
+coalescencias = {}
+
+
+class Coalescencia:
+    """
+    Requisições simultâneas com a mesma chave compartilham uma única execução (single-flight):
+    a primeira executa e as demais aguardam o mesmo resultado, ou a mesma exceção.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._em_andamento = {}
+        self.executadas = 0
+        self.coalescidas = 0
+        coalescencias[nome] = self
+
+    async def executar(self, chave, fabrica) -> tuple:
+        # Retorna o resultado e se ele veio de uma execução já em andamento
+        tarefa, compartilhada = self.iniciar(chave, fabrica)
+        # shield: se quem aguarda for cancelado (cliente desconectou), a execução continua para os demais
+        return await asyncio.shield(tarefa), compartilhada
+
+    def iniciar(self, chave, fabrica) -> tuple:
+        # Como executar, mas sem aguardar: devolve a execução (nova ou já em andamento) e se ela era compartilhada
+        tarefa = self._em_andamento.get(chave)
+        compartilhada = tarefa is not None
+        if compartilhada:
+            self.coalescidas += 1
+        else:
+            tarefa = asyncio.ensure_future(fabrica())
+            self._em_andamento[chave] = tarefa
+            self.executadas += 1
+            tarefa.add_done_callback(lambda concluida: self._concluir(chave, concluida))
+        return tarefa, compartilhada
+
+    def em_andamento(self, chave) -> bool:
+        return chave in self._em_andamento
+
+    def _concluir(self, chave, tarefa: asyncio.Task):
+        if self._em_andamento.get(chave) is tarefa:
+            del self._em_andamento[chave]
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+    def estatisticas(self) -> dict:
+        return {'executadas': self.executadas, 'coalescidas': self.coalescidas, 'em_andamento': len(self._em_andamento)}
+
+
+class CoalescenciaThreads(Coalescencia):
+    """
+    Mesma ideia para funções bloqueantes chamadas de várias threads (pool de execução, ferramentas do agente).
+    """
+
+    def __init__(self, nome: str):
+        super().__init__(nome)
+        self._trava = threading.Lock()
+
+    def executar(self, chave, funcao):
+        with self._trava:
+            futuro = self._em_andamento.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_andamento[chave] = Future()
+                self.executadas += 1
+            else:
+                self.coalescidas += 1
+        if not lider:
+            return futuro.result()
+        try:
+            resultado = funcao()
+        except BaseException as erro:
+            futuro.set_exception(erro)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            with self._trava:
+                del self._em_andamento[chave]
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            return super().estatisticas()
+
+
+def estatisticas_coalescencia() -> dict:
+    return {nome: coalescencia.estatisticas() for nome, coalescencia in coalescencias.items()}
@@ -0,0 +1,105 @@
+import logging
+import os
+import numpy as np
+import pandas as pd
+from .repositorio import repositorio, assinatura
+from .limpeza import registros_json, juntar_localizacoes
+
+
+ORCAMENTO_TOKENS = int(os.getenv('ORCAMENTO_TOKENS', '6000'))
+CARACTERES_POR_TOKEN = 4
+
+COLUNAS_CHUTES = ['period', 'minute', 'second', 'team', 'player', 'type', 'shot_outcome', 'shot_statsbomb_xg']
+COLUNAS_CARTOES = ['period', 'minute', 'second', 'team', 'player', 'type', 'foul_committed_card', 'bad_behaviour_card']
+COLUNAS_EVENTO = ['period', 'minute', 'second', 'team', 'player', 'type', 'pass_recipient', 'pass_outcome',
+                  'shot_outcome', 'shot_statsbomb_xg', 'foul_committed_card', 'bad_behaviour_card',
+                  'substitution_replacement']
+
+logger = logging.getLogger(__name__)
+
+
+def estimar_tokens(texto: str) -> int:
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+def projetar(eventos: pd.DataFrame, colunas: list[str]) -> pd.DataFrame:
+    # Mantém apenas as colunas pedidas que existem na partida, na ordem do jogo
+    colunas = [coluna for coluna in colunas if coluna in eventos.columns]
+    return eventos.sort_values(by=['period', 'minute', 'second'])[colunas]
+
+
+def _secao(titulo: str, tabela: pd.DataFrame, limite_caracteres: int | None = None) -> tuple[str, int]:
+    if tabela.empty:
+        return f'{titulo}: nenhum\n', 0
+    cabecalho, *linhas = tabela.to_csv(index=False, float_format='%.2f').splitlines()
+    omitidas = 0
+    if limite_caracteres is not None:
+        acumulado = np.cumsum([len(linha) + 1 for linha in linhas]) + len(titulo) + len(cabecalho) + 40
+        mantidas = int(np.searchsorted(acumulado, limite_caracteres, side='right'))
+        omitidas = len(linhas) - mantidas
+        linhas = linhas[:mantidas]
+    texto = '\n'.join([f'{titulo}:', cabecalho, *linhas])
+    if omitidas:
+        texto += f'\n(+{omitidas} linhas omitidas)'
+    return texto + '\n', omitidas
+
+
+def compactar_eventos(partida: pd.DataFrame, orcamento_tokens: int = ORCAMENTO_TOKENS) -> tuple[str, dict]:
+    """
+    Resume os eventos relevantes para o prompt: chutes, gols e cartões completos,
+    passes e faltas agregados por período, time e jogador, dentro do orçamento de tokens.
+    """
+    tipos = partida['type']
+    chutes = projetar(partida[tipos.isin(['Shot', 'Own Goal For'])], COLUNAS_CHUTES)
+
+    tem_cartao = pd.Series(False, index=partida.index)
+    for coluna in ['foul_committed_card', 'bad_behaviour_card']:
+        if coluna in partida.columns:
+            tem_cartao |= partida[coluna].notna()
+    cartoes = projetar(partida[tem_cartao], COLUNAS_CARTOES)
+
+    passes = partida[tipos == 'Pass']
+    completos = passes['pass_outcome'].isna() if 'pass_outcome' in passes.columns else pd.Series(True, index=passes.index)
+    passes = passes.assign(completo=completos) \
+                   .groupby(['period', 'team', 'player'], observed=True) \
+                   .agg(passes=('completo', 'size'), completos=('completo', 'sum')) \
+                   .reset_index() \
+                   .sort_values(by=['period', 'passes'], ascending=[True, False])
+
+    faltas = partida[tipos == 'Foul Committed'] \
+                 .groupby(['period', 'team', 'player'], observed=True) \
+                 .size() \
+                 .rename('faltas') \
+                 .reset_index() \
+                 .sort_values(by=['period', 'faltas'], ascending=[True, False])
+
+    # Chutes, gols e cartões entram sempre; faltas e passes dividem o que sobrar do orçamento
+    texto_chutes, _ = _secao('Chutes e gols', chutes)
+    texto_cartoes, _ = _secao('Cartões', cartoes)
+    restante = orcamento_tokens * CARACTERES_POR_TOKEN - len(texto_chutes) - len(texto_cartoes)
+    texto_faltas, omitidas_faltas = _secao('Faltas por jogador', faltas, max(restante // 3, 0))
+    restante -= len(texto_faltas)
+    texto_passes, omitidas_passes = _secao('Passes por jogador', passes, max(restante, 0))
+
+    texto = '\n'.join([texto_chutes, texto_cartoes, texto_faltas, texto_passes])
+
+    # Referência: o prompt anterior, com o JSON de todos os chutes, passes e faltas no formato original do StatsBomb
+    # (localizações em listas e células vazias como null)
+    relevantes = partida[tipos.isin(['Shot', 'Pass', 'Foul Committed'])]
+    relatorio = {
+        'tokens_antes': estimar_tokens(registros_json(juntar_localizacoes(relevantes))),
+        'tokens_depois': estimar_tokens(texto),
+        'orcamento_tokens': orcamento_tokens,
+        'linhas_omitidas': omitidas_faltas + omitidas_passes,
+    }
+    logger.info('Eventos compactados para o prompt: %s', relatorio)
+    return texto, relatorio
+
+
+def obter_eventos_compactados(id_partida: int) -> tuple[str, dict]:
+    return repositorio.derivado(id_partida, 'eventos_compactados', compactar_eventos)
+
+
+# Entra na chave do cache de respostas: muda com o código da compactação e com o orçamento de tokens,
+# então respostas geradas a partir de outra compactação não são reaproveitadas
+ASSINATURA_COMPACTACAO = f'compactacao:{assinatura(compactar_eventos)}'
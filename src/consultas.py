@@ -0,0 +1,63 @@
+import json
+import pandas as pd
+from .compactacao import COLUNAS_EVENTO, projetar
+from .limpeza import registros_esparsos
+from .indices import IndiceEventos
+from .repositorio import repositorio
+
+
+TAMANHO_PAGINA = 20
+LIMITE_CARACTERES = 3000
+TIPOS_PRINCIPAIS = ['Shot', 'Pass', 'Foul Committed']
+AGRUPAMENTOS = {'jogador': 'player', 'time': 'team', 'tipo': 'type', 'minuto': 'faixa_minutos'}
+FAIXA_MINUTOS = 15
+
+
+def obter_indice(id_partida: int) -> IndiceEventos:
+    # Rápido de montar a partir da partida em memória; não vale gravar em disco
+    return repositorio.derivado(id_partida, 'indice', IndiceEventos, 'indexacao', compartilhar=False)
+
+
+def filtrar_eventos(partida: pd.DataFrame,
+                    indice: IndiceEventos,
+                    tipos: list[str] | None = None,
+                    jogador: str | None = None,
+                    time: str | None = None,
+                    minuto_inicio: int | None = None,
+                    minuto_fim: int | None = None,
+                    apenas_gols: bool = False) -> pd.DataFrame:
+    posicoes = indice.posicoes(tipos=tipos, jogador=jogador, time=time, minuto_inicio=minuto_inicio,
+                               minuto_fim=minuto_fim, apenas_gols=apenas_gols)
+    return partida.iloc[posicoes]
+
+
+def contar_por(eventos: pd.DataFrame, agrupar_por: str, top_n: int) -> list[dict]:
+    if agrupar_por == 'minuto':
+        inicio = eventos['minute'] // FAIXA_MINUTOS * FAIXA_MINUTOS
+        eventos = eventos.assign(faixa_minutos=inicio.astype(str) + '-' + (inicio + FAIXA_MINUTOS - 1).astype(str))
+    contagem = eventos.groupby(AGRUPAMENTOS[agrupar_por], observed=True).size()
+    if agrupar_por == 'minuto':
+        contagem = contagem.sort_index(key=lambda faixas: faixas.str.split('-').str[0].astype(int))
+    else:
+        contagem = contagem.sort_values(ascending=False).head(top_n)
+    return [{agrupar_por: str(chave), 'quantidade': int(quantidade)} for chave, quantidade in contagem.items()]
+
+
+def paginar(eventos: pd.DataFrame, pagina: int, tamanho_pagina: int = TAMANHO_PAGINA) -> dict:
+    paginas = max(-(-len(eventos) // tamanho_pagina), 1)
+    inicio = (pagina - 1) * tamanho_pagina
+    trecho = projetar(eventos, COLUNAS_EVENTO).iloc[inicio:inicio + tamanho_pagina]
+    return {'total': len(eventos), 'pagina': pagina, 'paginas': paginas, 'eventos': registros_esparsos(trecho)}
+
+
+def limitar(resultado: dict, chave_lista: str, limite_caracteres: int = LIMITE_CARACTERES) -> str:
+    # Remove itens do fim da lista até o JSON caber no limite, indicando quantos ficaram de fora
+    texto = json.dumps(resultado, ensure_ascii=False)
+    itens = resultado[chave_lista]
+    omitidos = 0
+    while len(texto) > limite_caracteres and itens:
+        corte = max(len(itens) // 4, 1)
+        itens = itens[:-corte]
+        omitidos += corte
+        texto = json.dumps({**resultado, chave_lista: itens, 'omitidos': omitidos}, ensure_ascii=False)
+    return texto
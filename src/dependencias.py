@@ -0,0 +1,11 @@
+from fastapi import Request
+
+
+# Clientes registrados no lifespan da aplicação (src/main.py), criados no primeiro uso e compartilhados entre as requisições
+def obter_modelo(request: Request):
+    return request.app.state.modelo
+
+
+def obter_agente(request: Request):
+    # None se nenhum agente foi registrado; a rota só falha se realmente precisar dele
+    return getattr(request.app.state, 'agente', None)
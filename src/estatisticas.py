@@ -0,0 +1,56 @@
+import pandas as pd
+from .repositorio import repositorio
+
+
+TIPOS_CONTADOS = {'Pass': 'passes', 'Shot': 'finalizacoes', 'Dispossessed': 'desarmes'}
+
+
+def tabela_jogadores(partida: pd.DataFrame) -> pd.DataFrame:
+    # Uma linha por jogador com as contagens por tipo e os minutos jogados, calculada uma vez por partida
+    eventos = partida[partida['player'].notna()]
+    por_jogador = eventos.groupby('player', observed=True)
+
+    tabela = eventos.groupby(['player', 'type'], observed=True).size().unstack(fill_value=0)
+    tabela = tabela.reindex(columns=list(TIPOS_CONTADOS), fill_value=0).rename(columns=TIPOS_CONTADOS)
+    tabela.columns.name = None
+    tabela.insert(0, 'time', por_jogador['team'].first())
+
+    titulares = set()
+    for taticas in partida.loc[partida['type'] == 'Starting XI', 'tactics']:
+        titulares.update(jogador['player']['name'] for jogador in taticas['lineup'])
+
+    # Titulares jogam até sair (ou até o último evento); reservas, do minuto em que entram até o último evento
+    ultimo_minuto = por_jogador['minute'].max().reindex(tabela.index)
+    substituicoes = partida[partida['type'] == 'Substitution']
+    saida = substituicoes.groupby('player', observed=True)['minute'].first().reindex(tabela.index)
+    if 'substitution_replacement' in substituicoes.columns:
+        entrada = substituicoes.groupby('substitution_replacement', observed=True)['minute'].first()
+    else:
+        entrada = pd.Series(dtype='int64')
+    entrada = entrada.reindex(tabela.index).fillna(0)
+
+    titular = tabela.index.isin(list(titulares))
+    tabela['minutos_jogados'] = ultimo_minuto.where(~titular, saida.fillna(ultimo_minuto)) \
+                                - entrada.where(~titular, 0)
+    tabela[['passes', 'finalizacoes', 'desarmes', 'minutos_jogados']] = \
+        tabela[['passes', 'finalizacoes', 'desarmes', 'minutos_jogados']].astype(int)
+    return tabela
+
+
+def obter_tabela_jogadores(id_partida: int) -> pd.DataFrame:
+    return repositorio.derivado(id_partida, 'tabela_jogadores', tabela_jogadores)
+
+
+def buscar_jogadores(tabela: pd.DataFrame, nome_jogador: str) -> list[str]:
+    return [jogador for jogador in tabela.index if nome_jogador in jogador]
+
+
+def estatisticas_do_jogador(tabela: pd.DataFrame, jogador: str) -> dict:
+    linha = tabela.loc[jogador]
+    return {
+        'jogador': jogador,
+        'passes': int(linha['passes']),
+        'finalizacoes': int(linha['finalizacoes']),
+        'desarmes': int(linha['desarmes']),
+        'minutos_jogados': int(linha['minutos_jogados']),
+    }
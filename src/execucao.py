@@ -0,0 +1,83 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+
+NUMERO_THREADS = int(os.getenv('EXECUCAO_THREADS', '16'))
+
+_executor = ThreadPoolExecutor(max_workers=NUMERO_THREADS, thread_name_prefix='execucao')
+
+
+class Dependencia:
+    """
+    Limita quantas chamadas simultâneas um serviço externo recebe e contabiliza a fila de espera.
+    """
+
+    def __init__(self, nome: str, limite: int):
+        self.nome = nome
+        self.limite = limite
+        self._semaforo = None
+        self.aguardando = 0
+        self.em_execucao = 0
+        self.concluidas = 0
+        self.erros = 0
+
+    @property
+    def semaforo(self) -> asyncio.Semaphore:
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.limite)
+        return self._semaforo
+
+    @asynccontextmanager
+    async def vaga(self):
+        self.aguardando += 1
+        try:
+            await self.semaforo.acquire()
+        finally:
+            self.aguardando -= 1
+        self.em_execucao += 1
+        try:
+            yield
+        except Exception:
+            self.erros += 1
+            raise
+        else:
+            self.concluidas += 1
+        finally:
+            self.em_execucao -= 1
+            self.semaforo.release()
+
+    async def executar(self, funcao, *args, **kwargs):
+        # Funções bloqueantes rodam no pool de threads, sem travar o loop de eventos
+        async with self.vaga():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor, partial(funcao, *args, **kwargs))
+
+    async def aguardar(self, corrotina):
+        # Clientes assíncronos nativos respeitam o mesmo limite
+        async with self.vaga():
+            return await corrotina
+
+    def estatisticas(self) -> dict:
+        return {
+            'limite': self.limite,
+            'aguardando': self.aguardando,
+            'em_execucao': self.em_execucao,
+            'concluidas': self.concluidas,
+            'erros': self.erros,
+        }
+
+
+dependencias = {
+    'statsbomb': Dependencia('statsbomb', int(os.getenv('LIMITE_STATSBOMB', '8'))),
+    'gemini': Dependencia('gemini', int(os.getenv('LIMITE_GEMINI', '4'))),
+    'agente': Dependencia('agente', int(os.getenv('LIMITE_AGENTE', '2'))),
+    # Renderização dos gráficos: não é um serviço externo, mas ocupa CPU e não deve tomar as vagas do StatsBomb
+    'graficos': Dependencia('graficos', int(os.getenv('LIMITE_GRAFICOS', '4'))),
+}
+
+
+def estatisticas_execucao() -> dict:
+    return {nome: dependencia.estatisticas() for nome, dependencia in dependencias.items()}
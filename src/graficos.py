@@ -0,0 +1,218 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .repositorio import repositorio, DIRETORIO_CACHE, assinatura
+from .estatisticas import obter_tabela_jogadores, estatisticas_do_jogador
+from .metricas import medir
+from .travas import TravasPorChave
+
+
+LIMITE_MEMORIA_MB = int(os.getenv('CACHE_GRAFICOS_MB', '32'))
+LIMITE_JOGADORES = 10
+
+TIPOS_GRAFICO = ('estatisticas', 'passes', 'finalizacoes')
+FORMATOS_GRAFICO = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Campo do StatsBomb: 120 x 80 jardas, com o y crescendo para baixo
+COMPRIMENTO_CAMPO, LARGURA_CAMPO = 120, 80
+CORES = ('tab:blue', 'tab:red', 'tab:green', 'tab:purple', 'tab:orange',
+         'tab:brown', 'tab:pink', 'tab:gray', 'tab:olive', 'tab:cyan')
+ROTULOS_ESTATISTICAS = {'passes': 'Passes', 'finalizacoes': 'Finalizações', 'desarmes': 'Desarmes',
+                        'minutos_jogados': 'Minutos Jogados'}
+
+
+class CacheGraficos:
+    """
+    Imagens já renderizadas, pela chave do gráfico (partida, jogadores, tipo e formato): em memória,
+    numa LRU limitada em bytes, e em disco, compartilhadas entre os processos.
+    """
+
+    def __init__(self, diretorio: Path, limite_bytes: int):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+        self._memoria = OrderedDict()
+        self._trava = threading.Lock()
+        self.bytes_memoria = 0
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.faltas = 0
+
+    def _caminho(self, chave: str, formato: str) -> Path:
+        return self.diretorio / f'{chave}.{formato}'
+
+    def obter(self, chave: str, formato: str, contabilizar: bool = True) -> bytes | None:
+        with self._trava:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self.acertos_memoria += contabilizar
+                return self._memoria[chave]
+        caminho = self._caminho(chave, formato)
+        if not caminho.exists():
+            with self._trava:
+                self.faltas += contabilizar
+            return None
+        conteudo = caminho.read_bytes()
+        self._guardar_memoria(chave, conteudo)
+        with self._trava:
+            self.acertos_disco += contabilizar
+        return conteudo
+
+    def guardar(self, chave: str, formato: str, conteudo: bytes):
+        caminho = self._caminho(chave, formato)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        temporario.write_bytes(conteudo)
+        os.replace(temporario, caminho)
+        self._guardar_memoria(chave, conteudo)
+
+    def _guardar_memoria(self, chave: str, conteudo: bytes):
+        with self._trava:
+            if chave in self._memoria:
+                return
+            self._memoria[chave] = conteudo
+            self.bytes_memoria += len(conteudo)
+            while self.bytes_memoria > self.limite_bytes and len(self._memoria) > 1:
+                _, removido = self._memoria.popitem(last=False)
+                self.bytes_memoria -= len(removido)
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            return {
+                'imagens_em_memoria': len(self._memoria),
+                'bytes_memoria': self.bytes_memoria,
+                'limite_bytes': self.limite_bytes,
+                'acertos_memoria': self.acertos_memoria,
+                'acertos_disco': self.acertos_disco,
+                'faltas': self.faltas,
+            }
+
+
+def chave_grafico(id_partida: int, tipo: str, jogadores: tuple[str, ...], formato: str) -> str:
+    # Também é a ETag: muda com o código que desenha os gráficos, não com o momento da renderização.
+    # Recebe os nomes já resolvidos; os eventos de uma partida não mudam, então a imagem pode ser validada sem carregar a partida
+    conteudo = json.dumps([id_partida, tipo, list(jogadores), formato, assinatura(desenhar_grafico)], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode()).hexdigest()[:32]
+
+
+def _campo(ax):
+    from matplotlib.patches import Circle, Rectangle
+    linhas = {'fill': False, 'edgecolor': 'gray', 'linewidth': 1}
+    ax.add_patch(Rectangle((0, 0), COMPRIMENTO_CAMPO, LARGURA_CAMPO, **linhas))
+    ax.plot([COMPRIMENTO_CAMPO / 2] * 2, [0, LARGURA_CAMPO], color='gray', linewidth=1)
+    ax.add_patch(Circle((COMPRIMENTO_CAMPO / 2, LARGURA_CAMPO / 2), 10, **linhas))
+    for x, sentido in ((0, 1), (COMPRIMENTO_CAMPO, -1)):
+        ax.add_patch(Rectangle((x, 18), 18 * sentido, 44, **linhas))
+        ax.add_patch(Rectangle((x, 30), 6 * sentido, 20, **linhas))
+    ax.set_xlim(-2, COMPRIMENTO_CAMPO + 2)
+    ax.set_ylim(LARGURA_CAMPO + 2, -2)
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+
+def _eventos_dos_jogadores(partida: pd.DataFrame, tipo_evento: str, jogadores: list[str]) -> pd.DataFrame:
+    colunas = {'location_x', 'location_y'}
+    if partida.empty or not colunas.issubset(partida.columns):
+        return partida.iloc[0:0]
+    return partida[(partida['type'] == tipo_evento) & partida['player'].isin(jogadores)]
+
+
+def _barras(ax, estatisticas: list[dict]):
+    medidas = list(ROTULOS_ESTATISTICAS)
+    posicoes = np.arange(len(medidas))
+    largura = 0.8 / len(estatisticas)
+    for numero, estatistica in enumerate(estatisticas):
+        ax.bar(posicoes + numero * largura - 0.4 + largura / 2, [estatistica[medida] for medida in medidas],
+               largura, label=estatistica['jogador'], color=CORES[numero])
+    ax.set_xticks(posicoes, [ROTULOS_ESTATISTICAS[medida] for medida in medidas])
+    ax.set_ylabel('Quantidade')
+    ax.set_title('Estatísticas de ' + ' x '.join(estatistica['jogador'] for estatistica in estatisticas))
+    ax.legend()
+
+
+def _passes(ax, partida: pd.DataFrame, jogadores: list[str]):
+    _campo(ax)
+    passes = _eventos_dos_jogadores(partida, 'Pass', jogadores)
+    for numero, jogador in enumerate(jogadores):
+        do_jogador = passes[passes['player'] == jogador]
+        if 'pass_end_location_x' not in do_jogador.columns:
+            continue
+        # Passes sem resultado (pass_outcome nulo) foram completados; os demais ficam apagados
+        completos = do_jogador['pass_outcome'].isna().to_numpy() if 'pass_outcome' in do_jogador.columns \
+            else np.ones(len(do_jogador), dtype=bool)
+        x, y = do_jogador['location_x'].to_numpy(), do_jogador['location_y'].to_numpy()
+        dx = do_jogador['pass_end_location_x'].to_numpy() - x
+        dy = do_jogador['pass_end_location_y'].to_numpy() - y
+        for selecao, opacidade in ((completos, 0.9), (~completos, 0.3)):
+            if selecao.any():
+                ax.quiver(x[selecao], y[selecao], dx[selecao], dy[selecao], angles='xy', scale_units='xy', scale=1,
+                          width=0.003, color=CORES[numero], alpha=opacidade)
+        ax.plot([], [], color=CORES[numero], label=f'{jogador} ({int(completos.sum())}/{len(do_jogador)} certos)')
+    ax.set_title('Mapa de passes')
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, 0), fontsize='small')
+
+
+def _finalizacoes(ax, partida: pd.DataFrame, jogadores: list[str]):
+    _campo(ax)
+    chutes = _eventos_dos_jogadores(partida, 'Shot', jogadores)
+    for numero, jogador in enumerate(jogadores):
+        do_jogador = chutes[chutes['player'] == jogador]
+        xg = do_jogador['shot_statsbomb_xg'].fillna(0).to_numpy(dtype=float) \
+            if 'shot_statsbomb_xg' in do_jogador.columns else np.zeros(len(do_jogador))
+        gols = (do_jogador['shot_outcome'] == 'Goal').to_numpy(dtype=bool, na_value=False) \
+            if 'shot_outcome' in do_jogador.columns else np.zeros(len(do_jogador), dtype=bool)
+        # O tamanho do ponto acompanha o xG; gols ficam preenchidos
+        tamanhos = 40 + 600 * xg
+        x, y = do_jogador['location_x'].to_numpy(), do_jogador['location_y'].to_numpy()
+        ax.scatter(x[gols], y[gols], s=tamanhos[gols], color=CORES[numero], edgecolors='black', zorder=3)
+        ax.scatter(x[~gols], y[~gols], s=tamanhos[~gols], facecolors='none', edgecolors=CORES[numero], zorder=3)
+        ax.plot([], [], 'o', color=CORES[numero],
+                label=f'{jogador}: {len(do_jogador)} finalizações, {int(gols.sum())} gols, xG {xg.sum():.2f}')
+    ax.set_title('Mapa de finalizações')
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, 0), fontsize='small')
+
+
+def desenhar_grafico(partida: pd.DataFrame, tabela: pd.DataFrame, tipo: str, jogadores: list[str]):
+    # API orientada a objetos do matplotlib (sem o estado global do pyplot), segura entre threads
+    from matplotlib.figure import Figure
+    figura = Figure(figsize=(8, 5) if tipo == 'estatisticas' else (9, 7), layout='constrained')
+    ax = figura.add_subplot()
+    if tipo == 'estatisticas':
+        _barras(ax, [estatisticas_do_jogador(tabela, jogador) for jogador in jogadores])
+    elif tipo == 'passes':
+        _passes(ax, partida, jogadores)
+    else:
+        _finalizacoes(ax, partida, jogadores)
+    return figura
+
+
+def renderizar(figura, formato: str) -> bytes:
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    FigureCanvasAgg(figura)
+    buffer = io.BytesIO()
+    # Sem data nos metadados, a mesma figura gera sempre os mesmos bytes
+    figura.savefig(buffer, format=formato, dpi=100, metadata={'Date': None} if formato == 'svg' else None)
+    return buffer.getvalue()
+
+
+def gerar_grafico(id_partida: int, tipo: str, jogadores: tuple[str, ...], formato: str, chave: str) -> bytes:
+    # Chamada depois de uma falta no cache. Com vários workers, só um processo renderiza cada gráfico;
+    # os que esperaram a trava leem a imagem gravada
+    with travas_graficos.trava(chave):
+        conteudo = cache_graficos.obter(chave, formato, contabilizar=False)
+        if conteudo is None:
+            partida = repositorio.obter(id_partida)
+            tabela = obter_tabela_jogadores(id_partida)
+            with medir('grafico', tipo):
+                conteudo = renderizar(desenhar_grafico(partida, tabela, tipo, list(jogadores)), formato)
+            cache_graficos.guardar(chave, formato, conteudo)
+    return conteudo
+
+
+travas_graficos = TravasPorChave(DIRETORIO_CACHE / 'travas', 'graficos')
+cache_graficos = CacheGraficos(diretorio=DIRETORIO_CACHE / 'graficos', limite_bytes=LIMITE_MEMORIA_MB * 1024 * 1024)
@@ -0,0 +1,101 @@
+from functools import reduce
+import numpy as np
+import pandas as pd
+
+
+FAIXA_MINUTOS = 15
+VAZIO = np.array([], dtype=np.int32)
+
+
+def _posicoes_por_valor(serie: pd.Series | None) -> dict:
+    # Valor -> posições (em ordem crescente) das linhas que têm esse valor; nulos ficam de fora
+    if serie is None:
+        return {}
+    grupos = serie.reset_index(drop=True).groupby(serie.to_numpy(), observed=True, sort=False)
+    return {valor: posicoes.astype(np.int32) for valor, posicoes in grupos.indices.items()}
+
+
+def _uniao(conjuntos: list[np.ndarray]) -> np.ndarray:
+    if not conjuntos:
+        return VAZIO
+    if len(conjuntos) == 1:
+        return conjuntos[0]
+    return np.unique(np.concatenate(conjuntos))
+
+
+class IndiceEventos:
+    """
+    Posições das linhas de uma partida por tipo de evento, jogador, time e faixa de minutos,
+    montadas uma vez por partida. Os filtros viram uniões e interseções dessas posições,
+    sem percorrer a tabela inteira a cada consulta.
+
+    As posições se referem à ordem das linhas (iloc) da partida usada para montar o índice.
+    """
+
+    def __init__(self, partida: pd.DataFrame):
+        self.total = len(partida)
+        self.tipos = _posicoes_por_valor(partida.get('type'))
+        self.jogadores = _posicoes_por_valor(partida.get('player'))
+        self.times = _posicoes_por_valor(partida.get('team'))
+        self.minutos = partida['minute'].to_numpy()
+        self.faixas = _posicoes_por_valor(pd.Series(self.minutos // FAIXA_MINUTOS))
+        if 'shot_outcome' in partida.columns:
+            self.gols = np.flatnonzero((partida['shot_outcome'] == 'Goal').to_numpy(dtype=bool, na_value=False)).astype(np.int32)
+        else:
+            self.gols = VAZIO
+        # Nomes em minúsculas para a busca por parte do nome, feita sobre os nomes e não sobre as linhas
+        self._jogadores_minusculos = {nome: nome.lower() for nome in self.jogadores}
+        self._times_minusculos = {nome: nome.lower() for nome in self.times}
+
+    def tipo(self, *tipos: str) -> np.ndarray:
+        return _uniao([self.tipos[tipo] for tipo in tipos if tipo in self.tipos])
+
+    def jogador(self, trecho: str) -> np.ndarray:
+        trecho = trecho.lower()
+        return _uniao([self.jogadores[nome] for nome, minusculo in self._jogadores_minusculos.items() if trecho in minusculo])
+
+    def time(self, trecho: str) -> np.ndarray:
+        trecho = trecho.lower()
+        return _uniao([self.times[nome] for nome, minusculo in self._times_minusculos.items() if trecho in minusculo])
+
+    def minutos_entre(self, inicio: int | None = None, fim: int | None = None) -> np.ndarray:
+        inicio = 0 if inicio is None else inicio
+        fim = self.minutos.max(initial=0) if fim is None else fim
+        conjuntos = []
+        for faixa, posicoes in self.faixas.items():
+            primeiro, ultimo = faixa * FAIXA_MINUTOS, faixa * FAIXA_MINUTOS + FAIXA_MINUTOS - 1
+            if ultimo < inicio or primeiro > fim:
+                continue
+            if primeiro < inicio or ultimo > fim:
+                # Faixa parcialmente dentro do intervalo: só ela é conferida minuto a minuto
+                minutos = self.minutos[posicoes]
+                posicoes = posicoes[(minutos >= inicio) & (minutos <= fim)]
+            conjuntos.append(posicoes)
+        return _uniao(conjuntos)
+
+    def posicoes(self,
+                 tipos: list[str] | None = None,
+                 jogador: str | None = None,
+                 time: str | None = None,
+                 minuto_inicio: int | None = None,
+                 minuto_fim: int | None = None,
+                 apenas_gols: bool = False) -> np.ndarray:
+        conjuntos = []
+        if tipos:
+            conjuntos.append(self.tipo(*tipos))
+        if jogador:
+            conjuntos.append(self.jogador(jogador))
+        if time:
+            conjuntos.append(self.time(time))
+        if minuto_inicio is not None or minuto_fim is not None:
+            conjuntos.append(self.minutos_entre(minuto_inicio, minuto_fim))
+        if apenas_gols:
+            conjuntos.append(self.gols)
+        if not conjuntos:
+            return np.arange(self.total, dtype=np.int32)
+        conjuntos.sort(key=len)
+        return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), conjuntos)
+
+    def contagem_tipos(self) -> dict:
+        contagem = {tipo: len(posicoes) for tipo, posicoes in self.tipos.items()}
+        return dict(sorted(contagem.items(), key=lambda item: item[1], reverse=True))
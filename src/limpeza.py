@@ -0,0 +1,143 @@
+import io
+import json
+import numpy as np
+import pandas as pd
+
+
+TAMANHO_BLOCO = 500
+
+
+def decimais_curtos(valores: np.ndarray) -> np.ndarray:
+    # float32 vira float64 pela representação decimal mais curta (61.2, e não 61.20000076293945)
+    return valores.astype(str).astype(np.float64) if valores.dtype == np.float32 else valores
+
+
+def _para_json(eventos: pd.DataFrame) -> pd.DataFrame:
+    colunas = eventos.columns[eventos.dtypes == np.float32]
+    if len(colunas) == 0:
+        return eventos
+    return eventos.assign(**{coluna: decimais_curtos(eventos[coluna].to_numpy()) for coluna in colunas})
+
+
+def registros_esparsos(eventos: pd.DataFrame) -> list[dict]:
+    # Converte os eventos em dicionários contendo apenas as células preenchidas.
+    # A máscara de nulos é calculada uma vez para a tabela inteira e cada coluna
+    # só visita as linhas em que possui valor.
+    registros = [{} for _ in range(len(eventos))]
+    presentes = eventos.notna().to_numpy()
+    for j, coluna in enumerate(eventos.columns):
+        linhas = np.flatnonzero(presentes[:, j])
+        if len(linhas) == 0:
+            continue
+        valores = decimais_curtos(eventos.iloc[:, j].to_numpy()[linhas]).tolist()
+        for i, valor in zip(linhas.tolist(), valores):
+            registros[i][coluna] = valor
+    return registros
+
+
+def registros_json(eventos: pd.DataFrame) -> str:
+    # Serializa todos os eventos em JSON, com NaN convertido em null
+    return _para_json(eventos).to_json(orient='records', force_ascii=False)
+
+
+def remover_colunas_vazias(eventos: pd.DataFrame) -> pd.DataFrame:
+    return eventos.dropna(axis=1, how='all')
+
+
+def filtrar_categorias(eventos: pd.DataFrame, indice, filtros: list[str]) -> pd.DataFrame:
+    # Filtro da página de eventos do aplicativo. Cada filtro é um conjunto de posições do índice (IndiceEventos);
+    # a união já vem na ordem original, sem repetições
+    conjuntos = []
+    if 'Gols' in filtros:
+        conjuntos.append(indice.gols)
+    if 'Passes' in filtros:
+        conjuntos.append(indice.tipo('Pass'))
+    if 'Finalizações' in filtros:
+        conjuntos.append(indice.tipo('Shot'))
+    if 'Faltas' in filtros:
+        conjuntos.append(indice.tipo('Foul Committed'))
+
+    posicoes = np.unique(np.concatenate(conjuntos)) if conjuntos else []
+    df_filtrado = eventos.iloc[posicoes].sort_values(by='minute', kind='stable')
+    return remover_colunas_vazias(df_filtrado).reset_index(drop=True)
+
+
+def coordenadas(localizacoes: pd.Series, dimensoes: int = 2) -> np.ndarray:
+    # Converte uma coluna de listas [x, y(, z)] em uma matriz float32, com NaN onde não há localização
+    resultado = np.full((len(localizacoes), dimensoes), np.nan, dtype=np.float32)
+    presentes = localizacoes.notna().to_numpy()
+    if presentes.any():
+        valores = pd.DataFrame(localizacoes[presentes].map(list).tolist()).to_numpy(dtype=np.float32)
+        largura = min(dimensoes, valores.shape[1])
+        resultado[presentes, :largura] = valores[:, :largura]
+    return resultado
+
+
+def grupos_localizacao(colunas) -> dict[str, list[str]]:
+    # Colunas separadas pela normalização (location_x, location_y, ...), agrupadas pela coluna original
+    grupos = {}
+    for coluna in colunas:
+        base, _, eixo = coluna.rpartition('_')
+        if base.endswith('location') and eixo in ('x', 'y', 'z'):
+            grupos.setdefault(base, []).append(coluna)
+    return grupos
+
+
+def juntar_localizacoes(eventos: pd.DataFrame, bases=None) -> pd.DataFrame:
+    # Inverso da separação feita na normalização: volta a ter uma coluna de listas [x, y(, z)] por localização
+    # (todas, ou só as de bases), na posição da primeira coordenada, com nulo onde não há localização
+    grupos = {base: colunas for base, colunas in grupos_localizacao(eventos.columns).items()
+              if bases is None or base in bases}
+    if not grupos:
+        return eventos
+    colunas = {}
+    for coluna in eventos.columns:
+        base = coluna.rpartition('_')[0]
+        if base not in grupos:
+            colunas[coluna] = eventos[coluna]
+        elif base not in colunas:
+            matriz = eventos[grupos[base]].to_numpy()
+            valores = decimais_curtos(matriz).tolist()
+            presentes = ~np.isnan(matriz)
+            colunas[base] = pd.Series([[valor for valor, presente in zip(linha, mascara) if presente] or None
+                                       for linha, mascara in zip(valores, presentes)], index=eventos.index, dtype=object)
+    return pd.DataFrame(colunas, index=eventos.index)
+
+
+def _sem_alteracao(eventos: pd.DataFrame) -> pd.DataFrame:
+    return eventos
+
+
+def blocos_ndjson(eventos: pd.DataFrame, tamanho_bloco: int = TAMANHO_BLOCO, preparar=_sem_alteracao):
+    # Um evento por linha, serializado aos poucos para o cliente receber os primeiros blocos logo.
+    # preparar é aplicado a cada bloco (ex.: juntar_localizacoes), durante a transmissão
+    for inicio in range(0, len(eventos), tamanho_bloco):
+        bloco = preparar(eventos.iloc[inicio:inicio + tamanho_bloco])
+        yield _para_json(bloco).to_json(orient='records', lines=True, force_ascii=False)
+
+
+def blocos_json(eventos: pd.DataFrame, tamanho_bloco: int = TAMANHO_BLOCO, preparar=_sem_alteracao):
+    # Mesmo conteúdo de registros_json, enviado como um array JSON em blocos
+    yield '['
+    for inicio in range(0, len(eventos), tamanho_bloco):
+        if inicio:
+            yield ','
+        bloco = preparar(eventos.iloc[inicio:inicio + tamanho_bloco])
+        yield _para_json(bloco).to_json(orient='records', force_ascii=False)[1:-1]
+    yield ']'
+
+
+def serializar_parquet(eventos: pd.DataFrame) -> bytes:
+    # Formato binário e colunar para transferir a tabela de eventos inteira
+    buffer = io.BytesIO()
+    try:
+        eventos.to_parquet(buffer, index=False)
+    except (TypeError, ValueError, NotImplementedError):
+        # Colunas aninhadas com estruturas diferentes entre eventos vão como texto JSON
+        eventos = eventos.copy()
+        for coluna in eventos.columns[eventos.dtypes == object]:
+            if eventos[coluna].map(lambda valor: isinstance(valor, (list, dict))).any():
+                eventos[coluna] = eventos[coluna].map(lambda valor: json.dumps(valor) if isinstance(valor, (list, dict)) else valor)
+        buffer = io.BytesIO()
+        eventos.to_parquet(buffer, index=False)
+    return buffer.getvalue()
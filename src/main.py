@@ -1,12 +1,117 @@
 
-from fastapi import FastAPI
-from .routers import router
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
+from .routers import router, carregar_agente
+from .clientes import ModeloPreguicoso, AgentePreguicoso, ClienteIndisponivel, criar_modelo
+from .metricas import duracao_requisicoes, erros, medidor, exportar
+from .repositorio import repositorio, DIRETORIO_CACHE
+from .cache_llm import cache_respostas
+from .execucao import estatisticas_execucao
+from .coalescencia import estatisticas_coalescencia
+from .tarefas import fila_tarefas
+from .graficos import cache_graficos
+from .travas import remover_travas_abandonadas
 
-app = FastAPI()
+
+# Com PRE_CARREGAR_CLIENTES=1, o Gemini e o agente são criados logo após a subida, em segundo plano,
+# e /pronto só responde 200 depois disso; sem ela, são criados na primeira requisição que os usa
+PRE_CARREGAR_CLIENTES = os.getenv('PRE_CARREGAR_CLIENTES', '0') == '1'
+
+
+def pre_carregar(clientes: list, concluido: threading.Event):
+    for cliente in clientes:
+        try:
+            cliente.obter()
+        except ClienteIndisponivel:
+            pass
+    concluido.set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clientes do Gemini e o agente ReAct são criados uma vez, no primeiro uso, e reaproveitam suas conexões
+    api_key = os.getenv('GEMINI_KEY')
+    app.state.modelo = ModeloPreguicoso('gemini', partial(criar_modelo, api_key))
+    app.state.agente = AgentePreguicoso('agente', partial(carregar_agente, api_key))
+    app.state.clientes_prontos = threading.Event()
+    if PRE_CARREGAR_CLIENTES:
+        threading.Thread(target=pre_carregar, args=([app.state.modelo, app.state.agente], app.state.clientes_prontos),
+                         daemon=True).start()
+    else:
+        app.state.clientes_prontos.set()
+    # Bancos SQLite e travas são criados aqui, não na importação; travas deixadas por versões
+    # anteriores (uma por chave) ou por processos encerrados são apagadas
+    cache_respostas.abrir()
+    fila_tarefas.abrir()
+    remover_travas_abandonadas(DIRETORIO_CACHE / 'travas')
+    # Trabalhadores das tarefas em segundo plano (/tarefas)
+    fila_tarefas.iniciar()
+    yield
+    await fila_tarefas.parar()
+    fila_tarefas.fechar()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router)
 
 
+@app.middleware('http')
+async def medir_requisicoes(request: Request, call_next):
+    # Em respostas transmitidas, mede até o envio dos cabeçalhos; o corpo é medido nas etapas
+    inicio = time.perf_counter()
+    status = 500
+    try:
+        resposta = await call_next(request)
+        status = resposta.status_code
+        return resposta
+    except Exception as erro:
+        erros.incrementar('requisicao', type(erro).__name__)
+        raise
+    finally:
+        rota = request.scope.get('route')
+        duracao_requisicoes.observar(time.perf_counter() - inicio, request.method,
+                                     rota.path if rota is not None else 'desconhecida', status)
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def metricas():
+    filas = {(servico, medida): valor for servico, estatisticas in estatisticas_execucao().items()
+             for medida, valor in estatisticas.items()}
+    coalescencia = {(nome, medida): valor for nome, estatisticas in estatisticas_coalescencia().items()
+                    for medida, valor in estatisticas.items()}
+    texto = exportar([
+        medidor('api_cache_eventos', 'Estado do cache de eventos das partidas.', repositorio.estatisticas()),
+        medidor('api_cache_respostas', 'Estado do cache de respostas do LLM.', cache_respostas.estatisticas()),
+        medidor('api_cache_graficos', 'Estado do cache de imagens dos gráficos.', cache_graficos.estatisticas()),
+        medidor('api_filas', 'Chamadas aguardando e em execução por serviço externo.', filas, ('servico', 'medida')),
+        medidor('api_coalescencia', 'Execuções e requisições que aproveitaram uma execução em andamento.',
+                coalescencia, ('nome', 'medida')),
+        medidor('api_tarefas', 'Tarefas em segundo plano na fila, em execução e concluídas.', fila_tarefas.estatisticas()),
+    ])
+    return PlainTextResponse(texto, media_type='text/plain; version=0.0.4')
+
+
+@app.get('/pronto')
+async def pronto(response: Response):
+    # Prontidão do processo (para o balanceador ou o orquestrador): 503 até a subida terminar
+    clientes_prontos = getattr(app.state, 'clientes_prontos', None)
+    estado = {
+        'tarefas': fila_tarefas.ativa(),
+        'clientes_prontos': clientes_prontos is not None and clientes_prontos.is_set(),
+        'clientes': {nome: getattr(getattr(app.state, nome, None), 'carregado', False) for nome in ('modelo', 'agente')},
+    }
+    estado['pronto'] = estado['tarefas'] and estado['clientes_prontos']
+    response.status_code = 200 if estado['pronto'] else 503
+    response.headers['Cache-Control'] = 'no-store'
+    return estado
+
+
 @app.get('/')
 async def raiz():
     return {'mensagem': 'Página raiz'}
@@ -0,0 +1,127 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Limites superiores (em segundos) dos baldes dos histogramas
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(nomes: tuple, valores: tuple) -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+class Contador:
+    def __init__(self, nome: str, descricao: str, rotulos: tuple = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self._valores = {}
+        self._trava = threading.Lock()
+
+    def incrementar(self, *valores, quantidade: float = 1):
+        with self._trava:
+            self._valores[valores] = self._valores.get(valores, 0) + quantidade
+
+    def exportar(self) -> list[str]:
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} counter']
+        with self._trava:
+            for valores, total in sorted(self._valores.items()):
+                linhas.append(f'{self.nome}{_rotulos(self.rotulos, valores)} {total}')
+        return linhas
+
+
+class Histograma:
+    def __init__(self, nome: str, descricao: str, rotulos: tuple = (), baldes: tuple = BALDES_SEGUNDOS):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self.baldes = baldes
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def observar(self, valor: float, *valores):
+        with self._trava:
+            contagens, soma, total = self._series.get(valores, ([0] * len(self.baldes), 0.0, 0))
+            for posicao, limite in enumerate(self.baldes):
+                if valor <= limite:
+                    contagens[posicao] += 1
+            self._series[valores] = (contagens, soma + valor, total + 1)
+
+    def exportar(self) -> list[str]:
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        with self._trava:
+            for valores, (contagens, soma, total) in sorted(self._series.items()):
+                for limite, contagem in zip((*self.baldes, '+Inf'), (*contagens, total)):
+                    linhas.append(f'{self.nome}_bucket{_rotulos((*self.rotulos, "le"), (*valores, limite))} {contagem}')
+                linhas.append(f'{self.nome}_sum{_rotulos(self.rotulos, valores)} {soma}')
+                linhas.append(f'{self.nome}_count{_rotulos(self.rotulos, valores)} {total}')
+        return linhas
+
+
+def medidor(nome: str, descricao: str, valores: dict, rotulos: tuple = ('medida',)) -> list[str]:
+    # Valores instantâneos (gauges), lidos no momento da exportação; as chaves viram os rótulos
+    linhas = [f'# HELP {nome} {descricao}', f'# TYPE {nome} gauge']
+    for chave, valor in valores.items():
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            continue
+        chave = chave if isinstance(chave, tuple) else (chave,)
+        linhas.append(f'{nome}{_rotulos(rotulos, chave)} {valor}')
+    return linhas
+
+
+duracao_requisicoes = Histograma('api_requisicao_segundos', 'Duração das requisições por rota.', ('metodo', 'rota', 'status'))
+duracao_etapas = Histograma('api_etapa_segundos', 'Duração de cada etapa das requisições.', ('etapa', 'operacao'))
+tokens_llm = Contador('api_tokens_llm_total', 'Tokens enviados ao LLM e recebidos dele.', ('endpoint', 'tipo'))
+tokens_compactacao = Contador('api_compactacao_tokens_total',
+                              'Tokens estimados dos eventos no prompt, no formato anterior e compactados.', ('endpoint', 'medida'))
+cache_llm = Contador('api_cache_respostas_total', 'Consultas ao cache de respostas do LLM.', ('endpoint', 'resultado'))
+pedidos_graficos = Contador('api_cache_graficos_total', 'Pedidos de gráficos por resultado no cache.', ('tipo', 'resultado'))
+erros = Contador('api_erros_total', 'Erros por etapa e causa.', ('etapa', 'causa'))
+bytes_normalizacao = Contador('api_normalizacao_bytes_total', 'Bytes das partidas antes e depois da normalização.', ('medida',))
+espera_tarefas = Histograma('api_tarefa_espera_segundos', 'Tempo das tarefas em segundo plano na fila até começarem.', ('tipo',))
+
+
+@contextmanager
+def medir(etapa: str, operacao: str = ''):
+    """
+    Registra a duração do bloco no histograma de etapas e, se ele falhar, a causa do erro.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception as erro:
+        erros.incrementar(etapa, type(erro).__name__)
+        raise
+    finally:
+        duracao_etapas.observar(time.perf_counter() - inicio, etapa, operacao)
+
+
+def registrar_tokens(endpoint: str, resposta):
+    # usage_metadata vem nas respostas do Gemini; no streaming, é preenchido ao final da geração
+    uso = getattr(resposta, 'usage_metadata', None)
+    if uso is None:
+        return
+    tokens_llm.incrementar(endpoint, 'prompt', quantidade=getattr(uso, 'prompt_token_count', 0) or 0)
+    tokens_llm.incrementar(endpoint, 'resposta', quantidade=getattr(uso, 'candidates_token_count', 0) or 0)
+
+
+def registrar_compactacao(endpoint: str, relatorio: dict):
+    # Economia da compactação em cada prompt realmente enviado ao LLM (respostas do cache não contam)
+    tokens_compactacao.incrementar(endpoint, 'antes', quantidade=relatorio['tokens_antes'])
+    tokens_compactacao.incrementar(endpoint, 'depois', quantidade=relatorio['tokens_depois'])
+
+
+def exportar(medidores: list[list[str]] = ()) -> str:
+    linhas = []
+    for metrica in (duracao_requisicoes, duracao_etapas, tokens_llm, tokens_compactacao, cache_llm, pedidos_graficos, erros,
+                    bytes_normalizacao, espera_tarefas):
+        linhas += metrica.exportar()
+    for linhas_medidor in medidores:
+        linhas += linhas_medidor
+    return '\n'.join(linhas) + '\n'
@@ -1,5 +1,6 @@
 
-from pydantic import BaseModel
+from typing import Literal
+from pydantic import BaseModel, Field
 
 
 class ModeloPartida(BaseModel):
@@ -11,6 +12,11 @@ class ModeloJogador(BaseModel):
     nome_jogador: str
 
 
+class ModeloJogadores(BaseModel):
+    id_partida: int
+    nomes_jogadores: list[str]
+
+
 class ModeloResumo(BaseModel):
     id_partida: int
     resumo: str
@@ -21,6 +27,11 @@ class ModeloEstatistica(BaseModel):
     estatisticas: dict
 
 
+class ModeloEstatisticas(BaseModel):
+    id_partida: int
+    estatisticas: list[dict]
+
+
 class ModeloNarracao(BaseModel):
     id_partida: int
     tom_narracao: str
@@ -35,3 +46,55 @@ class ModeloAgenteResposta(BaseModel):
     id_partida: int
     pergunta: str
     resposta: str
+    caminho: Literal['rapido', 'agente'] = 'agente'
+
+
+class ModeloEntradaTipos(BaseModel):
+    id_partida: int
+
+
+class ModeloEntradaEventos(BaseModel):
+    id_partida: int
+    tipo: str | None = None
+    jogador: str | None = None
+    time: str | None = None
+    minuto_inicio: int | None = None
+    minuto_fim: int | None = None
+    apenas_gols: bool = False
+    agrupar_por: Literal['jogador', 'time', 'tipo', 'minuto'] | None = None
+    top_n: int = Field(10, ge=1, le=50)
+    pagina: int = Field(1, ge=1, le=500)
+
+
+class ModeloEntradaJogador(BaseModel):
+    id_partida: int
+    nome_jogador: str
+
+
+class ModeloEntradaAnalises(BaseModel):
+    id_partida: int
+    analise: Literal['rede_de_passes', 'finalizacoes']
+    time: str | None = None
+    jogador: str | None = None
+    top_n: int = Field(10, ge=1, le=50)
+
+
+class ModeloAquecimento(BaseModel):
+    id_competicao: int
+    id_temporada: int
+    trabalhadores: int = Field(4, ge=1, le=32)
+
+
+class ModeloTarefa(BaseModel):
+    id_tarefa: str
+    tipo: str
+    situacao: Literal['em_fila', 'em_andamento', 'concluida', 'falhou']
+    prioridade: int
+    etapa: str | None = None
+    posicao_fila: int | None = None
+    criada_em: float
+    iniciada_em: float | None = None
+    concluida_em: float | None = None
+    resultado: dict | None = None
+    erro: str | None = None
+    deduplicada: bool = False
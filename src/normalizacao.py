@@ -0,0 +1,89 @@
+import logging
+import numpy as np
+import pandas as pd
+from .limpeza import coordenadas, remover_colunas_vazias
+
+
+# Colunas de texto com menos valores distintos que esta fração das linhas viram categóricas
+LIMITE_CATEGORIAS = 0.5
+EIXOS = ['x', 'y', 'z']
+
+logger = logging.getLogger(__name__)
+
+
+def _tamanho(eventos: pd.DataFrame) -> int:
+    return int(eventos.memory_usage(deep=True).sum())
+
+
+def _tipo_inteiro(serie: pd.Series):
+    # int16 como menor tipo, para contas como minuto + 15 não estourarem
+    minimo, maximo = serie.min(), serie.max()
+    for tipo in (np.int16, np.int32):
+        if np.iinfo(tipo).min <= minimo and maximo <= np.iinfo(tipo).max:
+            return tipo
+    return np.int64
+
+
+def _classificar(serie: pd.Series) -> str | None:
+    # Tipo de conteúdo de uma coluna object: 'localizacao', 'booleana', 'texto' ou None (aninhada/mista)
+    valores = serie.dropna()
+    if valores.empty:
+        return None
+    tipos = set(valores.map(type))
+    if tipos == {list} and serie.name.endswith('location'):
+        return 'localizacao'
+    if tipos == {bool}:
+        return 'booleana'
+    if tipos == {str}:
+        return 'texto'
+    return None
+
+
+def normalizar_eventos(partida: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """
+    Deixa a tabela de eventos compacta em memória: remove colunas vazias, separa as localizações
+    em colunas float32 (location_x, location_y, ...), converte textos repetidos em categóricas,
+    marcadores True/NaN em booleanas e reduz os tipos numéricos. Aplicar de novo não muda nada.
+    """
+    bytes_antes = _tamanho(partida)
+    eventos = remover_colunas_vazias(partida)
+    colunas = {}
+    categoricas = localizacoes = 0
+
+    for coluna in eventos.columns:
+        serie = eventos[coluna]
+        if pd.api.types.is_integer_dtype(serie.dtype) and not isinstance(serie.dtype, pd.CategoricalDtype):
+            colunas[coluna] = serie.astype(_tipo_inteiro(serie))
+        elif serie.dtype == np.float64:
+            colunas[coluna] = serie.astype(np.float32)
+        elif serie.dtype == object or isinstance(serie.dtype, pd.StringDtype):
+            classificacao = 'texto' if isinstance(serie.dtype, pd.StringDtype) else _classificar(serie)
+            if classificacao == 'localizacao':
+                dimensoes = int(serie.dropna().map(len).max())
+                matriz = coordenadas(serie, dimensoes)
+                for eixo in range(dimensoes):
+                    colunas[f'{coluna}_{EIXOS[eixo]}'] = matriz[:, eixo]
+                localizacoes += 1
+            elif classificacao == 'booleana':
+                colunas[coluna] = serie.astype('boolean')
+            elif classificacao == 'texto' and serie.nunique() <= LIMITE_CATEGORIAS * serie.count():
+                colunas[coluna] = serie.astype('category')
+                categoricas += 1
+            else:
+                colunas[coluna] = serie
+        else:
+            colunas[coluna] = serie
+
+    eventos = pd.DataFrame(colunas, index=eventos.index)
+    relatorio = {
+        'bytes_antes': bytes_antes,
+        'bytes_depois': _tamanho(eventos),
+        'colunas_antes': partida.shape[1],
+        'colunas_depois': eventos.shape[1],
+        'colunas_categoricas': categoricas,
+        'localizacoes_separadas': localizacoes,
+    }
+    relatorio['reducao'] = round(relatorio['bytes_antes'] / max(relatorio['bytes_depois'], 1), 1)
+    if relatorio['bytes_antes'] != relatorio['bytes_depois']:
+        logger.info('Eventos normalizados: %s', relatorio)
+    return eventos, relatorio
@@ -0,0 +1,186 @@
+import re
+import unicodedata
+import pandas as pd
+from .repositorio import repositorio
+
+
+# Padrão da pergunta (já normalizada), tipo do evento e nome usado na resposta
+TIPOS_PERGUNTA = [
+    (r'\bgols?\b', 'Goal', 'gols'),
+    (r'\bpasse', 'Pass', 'passes'),
+    (r'\b(chut|finaliza)', 'Shot', 'finalizações'),
+    (r'\bfalta', 'Foul Committed', 'faltas'),
+    (r'\bdesarm', 'Dispossessed', 'desarmes'),
+    (r'\bdribl', 'Dribble', 'dribles'),
+    (r'\bintercept', 'Interception', 'interceptações'),
+    (r'\bconduc', 'Carry', 'conduções'),
+    (r'\bpress(ao|oes|ionou)', 'Pressure', 'pressões'),
+]
+
+# Recortes que as respostas rápidas não sabem aplicar: com eles a pergunta vai para o agente.
+# Período, resultado da ação, quem sofreu/recebeu, origem da jogada, posição em campo
+# e tipos de evento fora de TIPOS_PERGUNTA
+QUALIFICADORES = [
+    r'\b(tempo|periodo|prorrogacao|intervalo|acrescimos?|minutos?)\b',
+    r'\b(errad|cert|complet|incomplet|precis|sucesso|bem sucedid|mal sucedid|perdid|no alvo|fora do alvo|'
+    r'na trave|bloquead|defendid)',
+    r'\b(sofr|receb)',
+    r'\b(escanteio|de falta|bola parada|cobranca|tiro livre|de cabeca|contra-?ataque|tiro de meta)',
+    r'\b(goleir|zagueir|lateral|volante|meia|meio-campo|atacante|centroavante|ponta|artilheir|capitao|titular|reserva)',
+    r'\b(duel|disput|cruzament|defesas?\b|bloquei|impediment|lancament|assistenc|cabece|recupera|perdas?\b|toques?\b|'
+    r'afastament|cortes?\b|posse|xg)',
+]
+
+
+def normalizar(texto: str) -> str:
+    sem_acentos = unicodedata.normalize('NFD', texto.lower())
+    return ''.join(caractere for caractere in sem_acentos if unicodedata.category(caractere) != 'Mn')
+
+
+def agregados_partida(partida: pd.DataFrame) -> dict:
+    # Contagens e listas usadas pelas respostas rápidas, calculadas uma vez por partida
+    colunas = partida.columns
+    chutes = partida[partida['type'] == 'Shot']
+    gols = chutes[chutes['shot_outcome'] == 'Goal'] if 'shot_outcome' in colunas else chutes.iloc[0:0]
+    gols_contra = partida[partida['type'] == 'Own Goal For']
+
+    cartoes = []
+    for coluna in ['foul_committed_card', 'bad_behaviour_card']:
+        if coluna in colunas:
+            for _, evento in partida[partida[coluna].notna()].iterrows():
+                cartoes.append((evento['minute'], evento['player'], evento['team'], evento[coluna]))
+
+    substituicoes = partida[partida['type'] == 'Substitution']
+    if 'substitution_replacement' not in colunas:
+        substituicoes = substituicoes.iloc[0:0]
+
+    return {
+        'times': [str(time) for time in partida['team'].dropna().unique()],
+        'jogadores': [str(jogador) for jogador in partida['player'].dropna().unique()],
+        'time_jogador': {str(jogador): str(time) for jogador, time
+                         in partida.groupby('player', observed=True)['team'].first().items()},
+        'por_jogador': partida.groupby(['player', 'type'], observed=True).size(),
+        'por_time': partida.groupby(['team', 'type'], observed=True).size(),
+        'por_tipo': partida['type'].value_counts(),
+        'gols_jogador': gols[gols['period'] < 5].groupby('player', observed=True).size(),
+        'gols': [(evento['minute'], evento['player'], evento['team'], evento['period'])
+                 for _, evento in gols.sort_values(by=['period', 'minute', 'second']).iterrows()],
+        'gols_contra': [(evento['minute'], evento['team'], evento['period'])
+                        for _, evento in gols_contra.sort_values(by=['period', 'minute', 'second']).iterrows()],
+        'cartoes': sorted(cartoes, key=lambda cartao: cartao[0]),
+        'substituicoes': [(evento['minute'], evento['player'], evento['substitution_replacement'], evento['team'])
+                          for _, evento in substituicoes.sort_values(by=['period', 'minute', 'second']).iterrows()],
+    }
+
+
+def obter_agregados(id_partida: int) -> dict:
+    return repositorio.derivado(id_partida, 'agregados_partida', agregados_partida)
+
+
+def encontrar_nome(pergunta: str, nomes: list[str]) -> tuple[str | None, bool]:
+    # Procura o nome completo; se não houver, aceita um sobrenome/nome único (4+ letras) citado na pergunta.
+    # Retorna o nome encontrado e se houve ambiguidade.
+    completos = [nome for nome in nomes if normalizar(nome) in pergunta]
+    if completos:
+        return max(completos, key=len), False
+    palavras = set(re.findall(r'\w+', pergunta))
+    parciais = [nome for nome in nomes
+                if any(len(parte) >= 4 and parte in palavras for parte in re.findall(r'\w+', normalizar(nome)))]
+    if len(parciais) == 1:
+        return parciais[0], False
+    return None, len(parciais) > 1
+
+
+def contar(agregados: dict, tipo: str, jogador: str | None = None, time: str | None = None) -> int:
+    if tipo == 'Goal':
+        if jogador:
+            return int(agregados['gols_jogador'].get(jogador, 0))
+        gols = [gol for gol in agregados['gols'] if gol[3] < 5 and (time is None or gol[2] == time)]
+        return len(gols) + sum(1 for gol in agregados['gols_contra'] if gol[2] < 5 and (time is None or gol[1] == time))
+    if jogador:
+        return int(agregados['por_jogador'].get((jogador, tipo), 0))
+    if time:
+        return int(agregados['por_time'].get((time, tipo), 0))
+    return int(agregados['por_tipo'].get(tipo, 0))
+
+
+def placar(agregados: dict) -> str | None:
+    times = agregados['times']
+    if len(times) != 2:
+        return None
+    casa, fora = times
+    texto = f'{casa} {contar(agregados, "Goal", time=casa)} x {contar(agregados, "Goal", time=fora)} {fora}.'
+    penaltis = [gol for gol in agregados['gols'] if gol[3] == 5]
+    if penaltis:
+        penaltis_casa = sum(1 for gol in penaltis if gol[2] == casa)
+        texto += f' Nos pênaltis: {penaltis_casa} x {len(penaltis) - penaltis_casa}.'
+    return texto
+
+
+def responder_rapido(agregados: dict, pergunta: str) -> str | None:
+    """
+    Responde perguntas comuns (contagens, quem fez mais, placar, gols, cartões e substituições)
+    direto dos agregados da partida. Retorna None quando a pergunta precisa do agente.
+    """
+    pergunta = normalizar(pergunta)
+    # Nome completo de jogador tem prioridade; senão, o nome do time é retirado antes de procurar nomes parciais
+    completos = [nome for nome in agregados['jogadores'] if normalizar(nome) in pergunta]
+    jogador, time = (max(completos, key=len), None) if completos else (None, None)
+    if jogador is None:
+        time = next((nome for nome in agregados['times'] if normalizar(nome) in pergunta), None)
+        sem_time = pergunta.replace(normalizar(time), ' ') if time else pergunta
+        jogador, ambiguo = encontrar_nome(sem_time, agregados['jogadores'])
+        if ambiguo:
+            return None
+        if jogador:
+            time = None
+        elif time is None:
+            time, _ = encontrar_nome(pergunta, agregados['times'])
+    if any(re.search(padrao, pergunta) for padrao in QUALIFICADORES):
+        return None
+    # O tipo de evento é o citado primeiro na pergunta, não o primeiro da lista
+    citados = [(ocorrencia.start(), tipo, nome) for padrao, tipo, nome in TIPOS_PERGUNTA
+               if (ocorrencia := re.search(padrao, pergunta))]
+    _, tipo, nome_tipo = min(citados, default=(None, None, None))
+    if tipo == 'Goal' and re.search(r'\bpenalti', pergunta):
+        # Gols de pênalti no tempo de jogo não são separados nos agregados
+        return None
+
+    if tipo and re.search(r'\b(quantos|quantas|numero de)\b', pergunta):
+        quantidade = contar(agregados, tipo, jogador=jogador, time=time)
+        alvo = jogador or time or 'A partida'
+        return f'{alvo} teve {quantidade} {nome_tipo}.'
+
+    if tipo and jogador is None and re.search(r'\bquem\b.*\bmais\b', pergunta):
+        candidatos = [nome for nome in agregados['jogadores'] if time is None or agregados['time_jogador'][nome] == time]
+        contagens = {nome: contar(agregados, tipo, jogador=nome) for nome in candidatos}
+        if not contagens or max(contagens.values()) == 0:
+            return f'Nenhum jogador teve {nome_tipo} na partida.'
+        maximo = max(contagens.values())
+        lideres = [nome for nome, quantidade in contagens.items() if quantidade == maximo]
+        return f'{" e ".join(lideres)}: {maximo} {nome_tipo}.'
+
+    if tipo is None and not re.search(r'\bmais\b', pergunta) and \
+            re.search(r'\b(placar|resultado|venceu|ganhou|terminou|vencedor)\b', pergunta):
+        return placar(agregados)
+
+    if tipo == 'Goal' or re.search(r'\bquem marcou\b', pergunta):
+        if not agregados['gols'] and not agregados['gols_contra']:
+            return 'A partida não teve gols.'
+        gols = [f"{minuto}' {nome} ({equipe})" for minuto, nome, equipe, periodo in agregados['gols'] if periodo < 5]
+        gols += [f"{minuto}' gol contra a favor de {equipe}" for minuto, equipe, periodo in agregados['gols_contra'] if periodo < 5]
+        return f'{placar(agregados) or ""} Gols: {", ".join(gols) if gols else "nenhum no tempo de jogo"}.'.strip()
+
+    if re.search(r'\b(cartao|cartoes|amarelo|amarelos|vermelho|vermelhos)\b', pergunta):
+        if not agregados['cartoes']:
+            return 'A partida não teve cartões.'
+        return 'Cartões: ' + ', '.join(f"{minuto}' {nome} ({equipe}) - {cartao}"
+                                       for minuto, nome, equipe, cartao in agregados['cartoes']) + '.'
+
+    if re.search(r'\b(substituicao|substituicoes|substituido|substituidos|quem entrou|quem saiu)\b', pergunta):
+        if not agregados['substituicoes']:
+            return 'A partida não teve substituições.'
+        return 'Substituições: ' + ', '.join(f"{minuto}' sai {saiu}, entra {entrou} ({equipe})"
+                                             for minuto, saiu, entrou, equipe in agregados['substituicoes']) + '.'
+
+    return None
@@ -0,0 +1,245 @@
+import hashlib
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import pandas as pd
+from .metricas import medir, bytes_normalizacao
+from .coalescencia import CoalescenciaThreads
+from .normalizacao import normalizar_eventos
+from .travas import TravaArquivo, TravasPorChave
+
+
+DIRETORIO_CACHE = Path(os.getenv('CACHE_DIR', '.cache'))
+LIMITE_MEMORIA_MB = int(os.getenv('CACHE_EVENTOS_MB', '512'))
+
+
+def _eventos_statsbomb(id_partida: int) -> pd.DataFrame:
+    # O statsbombpy só é importado no primeiro download
+    from statsbombpy import sb
+    return sb.events(id_partida)
+
+
+class RepositorioEventos:
+    """
+    Armazena os eventos das partidas em dois níveis:
+    - Memória: LRU limitado pelo tamanho em bytes dos DataFrames.
+    - Disco: um arquivo por partida, mantido entre reinicializações e compartilhado pelos workers da API.
+
+    As partidas são guardadas já normalizadas (categóricas, tipos numéricos menores e localizações em x/y).
+    Downloads e cálculos de derivados usam travas de arquivo, para que só um processo faça cada um;
+    os derivados compartilhados também vão para o disco, e os outros processos leem sem carregar a partida.
+
+    Os DataFrames retornados são compartilhados entre requisições e não devem ser modificados.
+    """
+
+    def __init__(self, diretorio: Path, limite_bytes: int, carregador=None):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+        self.carregador = carregador or _eventos_statsbomb
+        self._memoria = OrderedDict()
+        self._tamanhos = {}
+        self._derivados = {}
+        self._trava = threading.RLock()
+        self.bytes_memoria = 0
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.acertos_derivados_disco = 0
+        self.faltas = 0
+        self.remocoes = 0
+        # Threads que pedem a mesma partida (ou o mesmo derivado) ao mesmo tempo esperam um único carregamento
+        self._carregamentos = CoalescenciaThreads('eventos')
+        self._calculos = CoalescenciaThreads('derivados')
+        self._travas_eventos = TravasPorChave(self.diretorio.parent / 'travas', 'eventos')
+        self._travas_derivados = TravasPorChave(self.diretorio.parent / 'travas', 'derivados')
+
+    def _caminho(self, id_partida: int) -> Path:
+        return self.diretorio / f'{id_partida}.pkl'
+
+    def _trava_arquivo(self, id_partida: int, nome: str | None = None) -> TravaArquivo:
+        if nome is None:
+            return self._travas_eventos.trava(id_partida)
+        return self._travas_derivados.trava((id_partida, nome))
+
+    def obter(self, id_partida: int) -> pd.DataFrame:
+        with self._trava:
+            if id_partida in self._memoria:
+                self._memoria.move_to_end(id_partida)
+                self.acertos_memoria += 1
+                return self._memoria[id_partida]
+        return self._carregamentos.executar(id_partida, lambda: self._carregar(id_partida))
+
+    def _carregar(self, id_partida: int) -> pd.DataFrame:
+        caminho = self._caminho(id_partida)
+        if not caminho.exists():
+            # Outro processo pode estar baixando a mesma partida; quem chega depois lê o arquivo gravado
+            with self._trava_arquivo(id_partida):
+                if not caminho.exists():
+                    partida = self._baixar(id_partida, caminho)
+                    self._guardar_memoria(id_partida, partida)
+                    return partida
+
+        with medir('busca', 'disco'):
+            partida = pd.read_pickle(caminho)
+        with self._trava:
+            self.acertos_disco += 1
+        # Arquivos gravados antes da normalização são convertidos na leitura; nos demais, nada muda
+        partida = self._normalizar(partida)
+        self._guardar_memoria(id_partida, partida)
+        return partida
+
+    def _baixar(self, id_partida: int, caminho: Path) -> pd.DataFrame:
+        with medir('busca', 'statsbomb'):
+            partida = self.carregador(id_partida)
+        partida = self._normalizar(partida)
+        self._gravar_disco(caminho, partida)
+        with self._trava:
+            self.faltas += 1
+        return partida
+
+    @staticmethod
+    def _normalizar(partida: pd.DataFrame) -> pd.DataFrame:
+        with medir('normalizacao'):
+            partida, relatorio = normalizar_eventos(partida)
+        if relatorio['bytes_antes'] != relatorio['bytes_depois']:
+            bytes_normalizacao.incrementar('antes', quantidade=relatorio['bytes_antes'])
+            bytes_normalizacao.incrementar('depois', quantidade=relatorio['bytes_depois'])
+        return partida
+
+    def derivado(self, id_partida: int, nome: str, funcao, etapa: str = 'agregacao', compartilhar: bool = True):
+        # Resultados calculados a partir da partida (tabelas, índices, agregações), descartados da memória junto com ela.
+        # Os compartilhados também são gravados em disco, para os outros processos e reinicializações
+        with self._trava:
+            derivados = self._derivados.get(id_partida)
+            if derivados is not None and nome in derivados:
+                return derivados[nome]
+        return self._calculos.executar((id_partida, nome),
+                                       lambda: self._calcular(id_partida, nome, funcao, etapa, compartilhar))
+
+    def _calcular(self, id_partida: int, nome: str, funcao, etapa: str, compartilhar: bool):
+        if not compartilhar:
+            resultado = self._executar_calculo(id_partida, nome, funcao, etapa)
+        else:
+            caminho = self.diretorio.parent / 'derivados' / str(id_partida) / f'{nome}.{assinatura(funcao)}.pkl'
+            resultado = self._ler_derivado(caminho)
+            if resultado is None:
+                with self._trava_arquivo(id_partida, nome):
+                    resultado = self._ler_derivado(caminho)
+                    if resultado is None:
+                        resultado = self._executar_calculo(id_partida, nome, funcao, etapa)
+                        self._gravar_derivado(caminho, resultado)
+
+        with self._trava:
+            if id_partida in self._memoria:
+                self._derivados.setdefault(id_partida, {})[nome] = resultado
+        return resultado
+
+    def _executar_calculo(self, id_partida: int, nome: str, funcao, etapa: str):
+        partida = self.obter(id_partida)
+        with medir(etapa, nome):
+            return funcao(partida)
+
+    def _ler_derivado(self, caminho: Path):
+        if not caminho.exists():
+            return None
+        with medir('busca', 'derivado_disco'):
+            resultado = pd.read_pickle(caminho)
+        with self._trava:
+            self.acertos_derivados_disco += 1
+        return resultado
+
+    def _gravar_derivado(self, caminho: Path, resultado):
+        # Versões calculadas por código anterior (outra assinatura) são apagadas
+        for antigo in caminho.parent.glob(f'{caminho.name.split(".")[0]}.*.pkl'):
+            antigo.unlink(missing_ok=True)
+        self._gravar_disco(caminho, resultado)
+
+    def aquecer(self, id_partida: int) -> bool:
+        # Baixa a partida só para o disco, sem ocupar a memória; retorna False se ela já estava guardada
+        caminho = self._caminho(id_partida)
+        if caminho.exists():
+            return False
+        with self._trava_arquivo(id_partida):
+            if caminho.exists():
+                return False
+            self._baixar(id_partida, caminho)
+        return True
+
+    def obter_sem_memoria(self, id_partida: int) -> pd.DataFrame:
+        # Para leituras em lote (ingestão de temporadas): lê do disco, baixando se preciso, sem ocupar
+        # nem reordenar a LRU, para não tirar da memória as partidas mais consultadas pela API
+        with self._trava:
+            if id_partida in self._memoria:
+                return self._memoria[id_partida]
+        caminho = self._caminho(id_partida)
+        if not caminho.exists():
+            with self._trava_arquivo(id_partida):
+                if not caminho.exists():
+                    return self._baixar(id_partida, caminho)
+        with medir('busca', 'disco'):
+            partida = pd.read_pickle(caminho)
+        return self._normalizar(partida)
+
+    def em_cache(self, id_partida: int) -> bool:
+        with self._trava:
+            if id_partida in self._memoria:
+                return True
+        return self._caminho(id_partida).exists()
+
+    def _gravar_disco(self, caminho: Path, conteudo):
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        pd.to_pickle(conteudo, temporario)
+        os.replace(temporario, caminho)
+
+    def _guardar_memoria(self, id_partida: int, partida: pd.DataFrame):
+        tamanho = int(partida.memory_usage(deep=True).sum())
+        with self._trava:
+            if id_partida in self._memoria:
+                self.bytes_memoria -= self._tamanhos[id_partida]
+            self._memoria[id_partida] = partida
+            self._memoria.move_to_end(id_partida)
+            self._tamanhos[id_partida] = tamanho
+            self.bytes_memoria += tamanho
+            # Mantém ao menos a partida recém-carregada, mesmo que sozinha passe do limite
+            while self.bytes_memoria > self.limite_bytes and len(self._memoria) > 1:
+                id_removido, _ = self._memoria.popitem(last=False)
+                self.bytes_memoria -= self._tamanhos.pop(id_removido)
+                self._derivados.pop(id_removido, None)
+                self.remocoes += 1
+
+    def estatisticas(self) -> dict:
+        with self._trava:
+            return {
+                'partidas_em_memoria': len(self._memoria),
+                'bytes_memoria': self.bytes_memoria,
+                'limite_bytes': self.limite_bytes,
+                'acertos_memoria': self.acertos_memoria,
+                'acertos_disco': self.acertos_disco,
+                'acertos_derivados_disco': self.acertos_derivados_disco,
+                'faltas': self.faltas,
+                'remocoes': self.remocoes,
+            }
+
+
+_assinaturas = {}
+
+
+def assinatura(funcao) -> str:
+    # Derivados gravados em disco valem só para o código e a configuração que os calcularam: a assinatura
+    # muda com o módulo da função, com os valores padrão dos parâmetros (ex.: ORCAMENTO_TOKENS) ou com a normalização
+    if funcao not in _assinaturas:
+        conteudo = Path(inspect.getsourcefile(funcao)).read_bytes() \
+                   + Path(inspect.getsourcefile(normalizar_eventos)).read_bytes() \
+                   + repr(getattr(funcao, '__defaults__', None)).encode()
+        _assinaturas[funcao] = hashlib.sha256(conteudo).hexdigest()[:12]
+    return _assinaturas[funcao]
+
+
+repositorio = RepositorioEventos(diretorio=DIRETORIO_CACHE / 'eventos',
+                                 limite_bytes=LIMITE_MEMORIA_MB * 1024 * 1024)
+
+
+def obter_eventos(id_partida: int) -> pd.DataFrame:
+    return repositorio.obter(id_partida)
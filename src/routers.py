@@ -1,66 +1,36 @@
 
-from fastapi import APIRouter, HTTPException
-from .models import ModeloPartida, ModeloJogador, ModeloResumo, ModeloEstatistica, ModeloNarracao, ModeloAgentePergunta, ModeloAgenteResposta
+from fastapi import APIRouter, HTTPException, Query, Header, Response, Depends, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from .models import ModeloPartida, ModeloJogador, ModeloJogadores, ModeloResumo, ModeloEstatistica, ModeloEstatisticas, ModeloNarracao, ModeloAgentePergunta, ModeloAgenteResposta, \
+                    ModeloEntradaTipos, ModeloEntradaEventos, ModeloEntradaJogador, ModeloEntradaAnalises, ModeloAquecimento, ModeloTarefa
+import asyncio
 import pandas as pd
-from statsbombpy import sb
-import numpy as np
-import google.generativeai as genai
-import os
 import json
-from langchain.prompts import PromptTemplate
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import Tool
+from functools import partial
+import requests
+from pydantic import ValidationError
+from .repositorio import repositorio, obter_eventos, DIRETORIO_CACHE
+from .execucao import dependencias, estatisticas_execucao
+from .limpeza import blocos_json, blocos_ndjson, serializar_parquet, grupos_localizacao, juntar_localizacoes
+from .cache_llm import cache_respostas
+from .dependencias import obter_modelo, obter_agente
+from .clientes import MODELO_GEMINI, ClienteIndisponivel
+from .compactacao import ASSINATURA_COMPACTACAO, obter_eventos_compactados
+from .planejador import obter_agregados, responder_rapido, normalizar
+from .consultas import TIPOS_PRINCIPAIS, obter_indice, filtrar_eventos, contar_por, paginar, limitar
+from .estatisticas import obter_tabela_jogadores, buscar_jogadores, estatisticas_do_jogador
+from .aquecimento import aquecer_temporada, estado_aquecimento, reservar_aquecimento
+from .temporada import carregar_temporada, totais_jogadores, comparar_times, rankings_partidas
+from .metricas import medir, registrar_tokens, registrar_compactacao, cache_llm, erros, pedidos_graficos
+from .coalescencia import Coalescencia, estatisticas_coalescencia
+from .tarefas import fila_tarefas, FilaCheia, PRIORIDADE_PADRAO
+from .travas import TravasPorChave
+from .analises import obter_rede_de_passes, obter_mapa_de_finalizacoes, obter_mapas_de_calor, principais_ligacoes, filtrar_por_nome
+from .graficos import TIPOS_GRAFICO, FORMATOS_GRAFICO, LIMITE_JOGADORES, cache_graficos, chave_grafico, gerar_grafico
 
 router = APIRouter()    
 
-
-@router.get('/partidas/{id_partida}')
-async def get_partida(id_partida: int):
-    try:
-        partida = sb.events(id_partida)
-    except:
-        raise HTTPException(status_code=404, detail='Erro! Partida não encontrada.')
-    try:
-        partida = partida.to_dict(orient='records')
-        for evento in partida:
-            for chave, valor in evento.items():
-                if valor is np.nan:
-                    valor = None
-                evento[chave] = valor
-        partida = json.dumps(partida)
-        return partida
-    except:
-        raise HTTPException(status_code=500, detail='Erro! Não foi possível exibir a partida.')
-
-
-@router.post('/match_summary', response_model=ModeloResumo)
-async def resumir_partida(body: ModeloPartida):
-    try:
-        partida_bruto = sb.events(body.id_partida)
-    except:
-        raise HTTPException(status_code=404, detail='Erro! Partida não encontrada.')
-
-    partida_bruto = partida_bruto.sort_values(by='minute').to_dict(orient='records')
-    partida = []
-    
-    for evento_bruto in partida_bruto:
-        evento = {}
-        for chave, valor in evento_bruto.items():
-                if valor is not np.nan:
-                    evento[chave] = valor
-        partida.append(evento)
-
-    eventos = []
-    for evento in partida:
-        if evento['type'] == 'Shot' or evento['type'] == 'Pass' or evento['type'] == 'Foul Committed':
-            eventos.append(evento)
-    
-    api_key = os.getenv('GEMINI_KEY')
-    genai.configure(api_key=api_key)
-    modelo = genai.GenerativeModel('gemini-1.5-flash')
-    
-    instrucoes = f"""
+INSTRUCOES_RESUMO = """
     Você é um especialista em futebol.
 
     Baseado nos principais eventos da partida abaixo, resuma o jogo de maneira curta e clara.
@@ -76,180 +46,511 @@ async def resumir_partida(body: ModeloPartida):
 
     {eventos}
     """
+
+INSTRUCOES_NARRACAO = """
+        Você é um especialista em futebol.
+
+        Baseado nas estatísticas da partida abaixo, crie uma narração para a partida inteira.
+        Não esqueça de indicar o resultado.
+
+        Narre de acordo com o tom exigido pelo usuário:
+        - Formal: Narração técnica e objetiva.
+        - Humorístico: Narração descontraída e criativa.
+        - Técnico: Narração detalhada dos eventos.
+
+        • Tipo de Narração:
+        {estilo}
+
+        • Eventos da Partida:
+        {eventos}
+        """
+
+
+# Requisições simultâneas iguais compartilham a mesma busca, geração ou execução do agente
+coalescencia_partidas = Coalescencia('partidas')
+coalescencia_llm = Coalescencia('llm')
+coalescencia_agente = Coalescencia('agente')
+# Com vários workers, só um processo gera cada resposta do LLM
+travas_llm = TravasPorChave(DIRETORIO_CACHE / 'travas', 'llm')
+
+
+async def carregar_partida(funcao, *args):
+    # Separa partida inexistente de falhas de acesso ao StatsBomb, contabilizando a causa de cada erro
     try:
-        resposta = modelo.generate_content(instrucoes).text
-        return ModeloResumo(id_partida=body.id_partida, resumo=resposta)
-    except:
+        resultado, _ = await coalescencia_partidas.executar(
+            (funcao.__qualname__, *args), lambda: dependencias['statsbomb'].executar(funcao, *args))
+        return resultado
+    except requests.HTTPError as erro:
+        if erro.response is not None and erro.response.status_code == 404:
+            erros.incrementar('partida', 'nao_encontrada')
+            raise HTTPException(status_code=404, detail='Erro! Partida não encontrada.')
+        erros.incrementar('partida', 'statsbomb_http')
+        raise HTTPException(status_code=502, detail='Erro! O StatsBomb respondeu com erro.')
+    except requests.RequestException:
+        erros.incrementar('partida', 'statsbomb_indisponivel')
+        raise HTTPException(status_code=503, detail='Erro! Não foi possível acessar o StatsBomb.')
+
+
+def consultar_cache(chave: str, endpoint: str, cache_control: str | None) -> str | None:
+    if cache_control and 'no-cache' in cache_control:
+        cache_respostas.ignorar()
+        cache_llm.incrementar(endpoint, 'ignorado')
+        return None
+    resposta = cache_respostas.obter(chave)
+    cache_llm.incrementar(endpoint, 'acerto' if resposta is not None else 'falta')
+    return resposta
+
+
+async def gerar_uma_vez(chave: str, gerar) -> str:
+    # Com vários workers, só um processo gera cada chave; os outros esperam e leem a resposta do cache
+    trava = travas_llm.trava(chave)
+    esperou = await trava.aguardar()
+    try:
+        if esperou and (resposta := cache_respostas.obter(chave, contabilizar=False)) is not None:
+            return resposta
+        return await gerar()
+    finally:
+        trava.liberar()
+
+
+async def gerar_texto(modelo, instrucoes: str, endpoint: str) -> str:
+    with medir('llm', endpoint):
+        resposta = await dependencias['gemini'].aguardar(modelo.generate_content_async(instrucoes))
+    registrar_tokens(endpoint, resposta)
+    return resposta.text
+
+
+def medir_blocos(blocos, formato: str):
+    # A serialização acontece enquanto a resposta é transmitida, então o tempo cobre a geração inteira
+    with medir('serializacao', formato):
+        yield from blocos
+
+
+def serializar_parquet_medido(partida: pd.DataFrame, preparar) -> bytes:
+    with medir('serializacao', 'parquet'):
+        return serializar_parquet(preparar(partida))
+
+
+def serializar_parquet_listas(partida: pd.DataFrame) -> bytes:
+    return serializar_parquet(juntar_localizacoes(partida))
+
+
+@router.get('/partidas/{id_partida}')
+async def get_partida(id_partida: int,
+                      formato: str = 'json',
+                      colunas: list[str] | None = Query(None),
+                      tipos: list[str] | None = Query(None),
+                      localizacao: str = 'listas'):
+    if formato not in ('json', 'ndjson', 'parquet'):
+        raise HTTPException(status_code=400, detail='Erro! Escolha entre os formatos "json", "ndjson" ou "parquet".')
+    if localizacao not in ('listas', 'colunas'):
+        raise HTTPException(status_code=400, detail='Erro! Escolha entre as localizações "listas" ou "colunas".')
+    partida = await carregar_partida(obter_eventos, id_partida)
+
+    # Filtros aplicados antes de serializar, para enviar somente o necessário
+    if tipos:
+        indice = await carregar_partida(obter_indice, id_partida)
+        partida = partida.iloc[indice.tipo(*tipos)]
+    if colunas:
+        # Localizações podem ser pedidas pelo nome original (location) ou pelas coordenadas (location_x)
+        grupos = grupos_localizacao(partida.columns)
+        colunas_invalidas = [coluna for coluna in colunas if coluna not in partida.columns and coluna not in grupos]
+        if colunas_invalidas:
+            raise HTTPException(status_code=400, detail=f'Erro! Colunas inexistentes: {", ".join(colunas_invalidas)}.')
+        partida = partida[list(dict.fromkeys(nome for coluna in colunas for nome in grupos.get(coluna, [coluna])))]
+
+    # Por padrão as localizações saem como listas [x, y(, z)], como no StatsBomb; com localizacao=colunas,
+    # saem separadas em location_x, location_y..., como ficam guardadas. Coordenadas pedidas pelo nome ficam separadas
+    preparar = partial(juntar_localizacoes, bases=set(colunas) if colunas else None) if localizacao == 'listas' \
+        else lambda eventos: eventos
+    if formato == 'parquet':
+        # A tabela completa é serializada uma vez por partida e reaproveitada
+        if tipos or colunas:
+            conteudo = await dependencias['statsbomb'].executar(serializar_parquet_medido, partida, preparar)
+        else:
+            nome, funcao = ('parquet', serializar_parquet) if localizacao == 'colunas' \
+                else ('parquet_listas', serializar_parquet_listas)
+            conteudo = await carregar_partida(repositorio.derivado, id_partida, nome, funcao, 'serializacao')
+        return Response(content=conteudo, media_type='application/vnd.apache.parquet')
+    # Em JSON e NDJSON, as listas são montadas bloco a bloco, durante a transmissão
+    if formato == 'ndjson':
+        return StreamingResponse(medir_blocos(blocos_ndjson(partida, preparar=preparar), 'ndjson'),
+                                 media_type='application/x-ndjson')
+    return StreamingResponse(medir_blocos(blocos_json(partida, preparar=preparar), 'json'), media_type='application/json')
+
+
+@router.get('/partidas/{id_partida}/jogadores')
+async def jogadores_partida(id_partida: int):
+    tabela = await carregar_partida(obter_tabela_jogadores, id_partida)
+    tabela = tabela.sort_values(by='time', kind='stable')
+    return [{'jogador': jogador, 'time': time} for jogador, time in tabela['time'].items()]
+
+
+def ignorar_etapa(etapa: str):
+    pass
+
+
+async def gerar_resumo(modelo, id_partida: int, chave: str, avisar=ignorar_etapa) -> str:
+    avisar('carregando_partida')
+    eventos, relatorio = await carregar_partida(obter_eventos_compactados, id_partida)
+    registrar_compactacao('match_summary', relatorio)
+
+    with medir('prompt', 'match_summary'):
+        instrucoes = INSTRUCOES_RESUMO.format(eventos=eventos)
+    avisar('gerando')
+    try:
+        resposta = await gerar_texto(modelo, instrucoes, 'match_summary')
+    except ClienteIndisponivel:
+        raise HTTPException(status_code=503, detail='Erro! O modelo não está disponível. Verifique a chave do Gemini.')
+    except Exception:
         raise HTTPException(status_code=500, detail='Erro! Não foi possível gerar o resumo.')
 
+    cache_respostas.guardar(chave, id_partida, 'match_summary', '', resposta)
+    return resposta
+
+
+@router.post('/match_summary', response_model=ModeloResumo)
+async def resumir_partida(body: ModeloPartida, response: Response, cache_control: str | None = Header(None),
+                          modelo=Depends(obter_modelo)):
+    chave = cache_respostas.chave(body.id_partida, 'match_summary', '', INSTRUCOES_RESUMO + ASSINATURA_COMPACTACAO, MODELO_GEMINI)
+    if (resposta := consultar_cache(chave, 'match_summary', cache_control)) is not None:
+        response.headers['X-Cache'] = 'HIT'
+        return ModeloResumo(id_partida=body.id_partida, resumo=resposta)
+
+    resposta, compartilhada = await coalescencia_llm.executar(
+        chave, lambda: gerar_uma_vez(chave, lambda: gerar_resumo(modelo, body.id_partida, chave)))
+    response.headers['X-Cache'] = 'COALESCED' if compartilhada else 'MISS'
+    return ModeloResumo(id_partida=body.id_partida, resumo=resposta)
+
 
 @router.post('/player_profile', response_model=ModeloEstatistica)
 async def estatisticas_jogador(body: ModeloJogador):
-    try:
-        partida = sb.events(body.id_partida)
-    except:
-        raise HTTPException(status_code=404, detail='Erro! Partida não encontrada.')
+    tabela = await carregar_partida(obter_tabela_jogadores, body.id_partida)
 
-    jogadores = partida['player'].dropna().unique().tolist()
+    jogadores = buscar_jogadores(tabela, body.nome_jogador)
     
-    if sum(body.nome_jogador in jogador for jogador in jogadores) == 0:
+    if len(jogadores) == 0:
         raise HTTPException(status_code=400, detail='Erro! Não encontramos nenhum jogador com esse nome.')
-    elif sum(body.nome_jogador in jogador for jogador in jogadores) > 1:
+    elif len(jogadores) > 1:
         raise HTTPException(status_code=400, detail='Erro! O nome inserido pode ser interpretado para mais de 1 jogador.')
     else:
-        jogadores_iniciais = [jogador['player']['name'] for jogador in partida[partida['type'] == 'Starting XI']['tactics'][0]['lineup']] \
-                            + [jogador['player']['name'] for jogador in partida[partida['type'] == 'Starting XI']['tactics'][1]['lineup']]
-        eventos_jogador = partida[partida['player'].str.contains(body.nome_jogador, na=False)]
-        estatisticas = {}
-
-        estatisticas['jogador'] = [jogador for jogador in jogadores if body.nome_jogador in jogador][0]
-        estatisticas['passes'] = eventos_jogador[eventos_jogador['type'] == 'Pass'].shape[0]
-        estatisticas['finalizacoes'] = eventos_jogador[eventos_jogador['type'] == 'Shot'].shape[0]
-        estatisticas['desarmes'] = eventos_jogador[eventos_jogador['type'] == 'Dispossessed'].shape[0]
-
-        if estatisticas['jogador'] in jogadores_iniciais:
-            if eventos_jogador[eventos_jogador['type'] == 'Substitution'].shape[0] > 0:
-                estatisticas['minutos_jogados'] = int(eventos_jogador[eventos_jogador['type'] == 'Substitution']['minute'].iloc[0])
-            else:
-                estatisticas['minutos_jogados'] = int(eventos_jogador['minute'].max())
-        else:
-            estatisticas['minutos_jogados'] = int(eventos_jogador['minute'].max() \
-                                                  - partida[
-                                                                    (partida['type'] == 'Substitution')
-                                                                    & (partida['substitution_replacement'] == estatisticas['jogador'])
-                                                                    ]['minute'].iloc[0]
-                                                 )
-
+        estatisticas = estatisticas_do_jogador(tabela, jogadores[0])
         return ModeloEstatistica(id_partida=body.id_partida, estatisticas=estatisticas)
 
 
+@router.post('/player_profiles', response_model=ModeloEstatisticas)
+async def estatisticas_jogadores(body: ModeloJogadores):
+    tabela = await carregar_partida(obter_tabela_jogadores, body.id_partida)
+
+    estatisticas = [estatisticas_do_jogador(tabela, jogador) for jogador in resolver_jogadores(tabela, body.nomes_jogadores)]
+
+    return ModeloEstatisticas(id_partida=body.id_partida, estatisticas=estatisticas)
+
+
+def resolver_jogadores(tabela: pd.DataFrame, nomes_jogadores: list[str]) -> list[str]:
+    jogadores_encontrados = []
+    for nome_jogador in nomes_jogadores:
+        jogadores = buscar_jogadores(tabela, nome_jogador)
+        if len(jogadores) == 0:
+            raise HTTPException(status_code=400, detail=f'Erro! Não encontramos nenhum jogador com o nome "{nome_jogador}".')
+        elif len(jogadores) > 1:
+            raise HTTPException(status_code=400, detail=f'Erro! O nome "{nome_jogador}" pode ser interpretado para mais de 1 jogador.')
+        jogadores_encontrados.append(jogadores[0])
+    return jogadores_encontrados
+
+
+@router.get('/partidas/{id_partida}/graficos/{tipo}')
+async def grafico_jogadores(id_partida: int, tipo: str,
+                            jogadores: list[str] = Query(...),
+                            formato: str = 'png',
+                            if_none_match: str | None = Header(None)):
+    # Estatísticas (barras), mapa de passes ou de finalizações de um ou mais jogadores, renderizados uma vez
+    if tipo not in TIPOS_GRAFICO:
+        raise HTTPException(status_code=400, detail='Erro! Escolha entre os gráficos "estatisticas", "passes" ou "finalizacoes".')
+    if formato not in FORMATOS_GRAFICO:
+        raise HTTPException(status_code=400, detail='Erro! Escolha entre os formatos "png" ou "svg".')
+    if len(jogadores) > LIMITE_JOGADORES:
+        raise HTTPException(status_code=400, detail=f'Erro! Escolha no máximo {LIMITE_JOGADORES} jogadores.')
+
+    # A chave usa os nomes já resolvidos: grafias diferentes do mesmo jogador dividem a imagem e a ETag.
+    # A tabela de jogadores é um derivado pequeno, lido do disco sem carregar a partida
+    tabela = await carregar_partida(obter_tabela_jogadores, id_partida)
+    nomes = tuple(resolver_jogadores(tabela, jogadores))
+    chave = chave_grafico(id_partida, tipo, nomes, formato)
+    cabecalhos = {'ETag': f'"{chave}"', 'Cache-Control': 'max-age=3600'}
+    if if_none_match and (if_none_match.strip() == '*'
+                          or cabecalhos['ETag'] in [etag.strip().removeprefix('W/') for etag in if_none_match.split(',')]):
+        pedidos_graficos.incrementar(tipo, 'nao_modificado')
+        return Response(status_code=304, headers=cabecalhos)
+
+    conteudo = cache_graficos.obter(chave, formato)
+    if conteudo is not None:
+        pedidos_graficos.incrementar(tipo, 'acerto')
+    else:
+        pedidos_graficos.incrementar(tipo, 'falta')
+        # A partida é carregada na vaga do StatsBomb; a renderização, só CPU, tem um limite próprio
+        await carregar_partida(obter_eventos, id_partida)
+        conteudo = await dependencias['graficos'].executar(gerar_grafico, id_partida, tipo, nomes, formato, chave)
+    return Response(content=conteudo, media_type=FORMATOS_GRAFICO[formato], headers=cabecalhos)
+
+
+def filtrar_analise(valores: dict, trecho: str | None, descricao: str) -> dict:
+    filtrados = filtrar_por_nome(valores, trecho)
+    if trecho and not filtrados:
+        raise HTTPException(status_code=400, detail=f'Erro! Não encontramos nenhum {descricao} com o nome "{trecho}".')
+    return filtrados
+
+
+# Análises calculadas uma vez por partida (src/analises.py) e guardadas com os outros derivados
+@router.get('/partidas/{id_partida}/analises/rede_de_passes')
+async def analise_rede_de_passes(id_partida: int, time: str | None = None):
+    redes = await carregar_partida(obter_rede_de_passes, id_partida)
+    return filtrar_analise(redes, time, 'time')
+
+
+@router.get('/partidas/{id_partida}/analises/finalizacoes')
+async def analise_finalizacoes(id_partida: int, time: str | None = None):
+    mapas = await carregar_partida(obter_mapa_de_finalizacoes, id_partida)
+    return filtrar_analise(mapas, time, 'time')
+
+
+@router.get('/partidas/{id_partida}/analises/mapa_de_calor')
+async def analise_mapa_de_calor(id_partida: int, time: str | None = None, jogador: str | None = None):
+    mapas = await carregar_partida(obter_mapas_de_calor, id_partida)
+    return {'colunas': mapas['colunas'], 'linhas': mapas['linhas'],
+            'times': filtrar_analise(mapas['times'], time, 'time'),
+            'jogadores': filtrar_analise(mapas['jogadores'], jogador, 'jogador')}
+
+
+async def gerar_narracao(modelo, id_partida: int, estilo: str, chave: str, avisar=ignorar_etapa) -> str:
+    # Obter a partida do StatsBomb
+    # e resumir os eventos relevantes (chutes, passes e faltas) dentro do orçamento de tokens
+    avisar('carregando_partida')
+    eventos, relatorio = await carregar_partida(obter_eventos_compactados, id_partida)
+    registrar_compactacao('commentary', relatorio)
+
+    # Gerar a narração com o LLM
+    with medir('prompt', 'commentary'):
+        instrucoes = INSTRUCOES_NARRACAO.format(estilo=estilo, eventos=eventos)
+    avisar('gerando')
+    try:
+        resposta = await gerar_texto(modelo, instrucoes, 'commentary')
+    except ClienteIndisponivel:
+        raise HTTPException(status_code=503, detail='Erro! O modelo não está disponível. Verifique a chave do Gemini.')
+    except Exception:
+        raise HTTPException(status_code=500, detail='Erro! Não foi possível gerar a narração.')
+
+    cache_respostas.guardar(chave, id_partida, 'commentary', estilo, resposta)
+    return resposta
+
+
 @router.post('/commentary', response_model=ModeloResumo)
-async def narrar_partida(body:ModeloNarracao):
+async def narrar_partida(body:ModeloNarracao, response: Response, cache_control: str | None = Header(None),
+                         modelo=Depends(obter_modelo)):
     estilo = body.tom_narracao.lower().strip()
 
     if estilo != 'formal' and estilo != 'humorístico' and estilo != 'técnico':
         raise HTTPException(status_code=400, detail='Erro! Escolha entre os estilos "Formal", "Humorístico" ou "Técnico".')
         
     else:
-        # Obter a partida do StatsBomb
-        try:
-            partida_bruto = sb.events(body.id_partida)
-        except:
-            raise HTTPException(status_code=404, detail='Erro! Partida não encontrada.')
-        partida_bruto = partida_bruto.sort_values(by='minute').to_dict(orient='records')
-        partida = []
-        
-        # Limpar as células vazias
-        for evento_bruto in partida_bruto:
-            evento = {}
-            for chave, valor in evento_bruto.items():
-                    if valor is not np.nan:
-                        evento[chave] = valor
-            partida.append(evento)
-
-        # Separar os eventos relevantes (chutes, passes e faltas)
-        eventos = []
-        for evento in partida:
-            if evento['type'] == 'Shot' or evento['type'] == 'Pass' or evento['type'] == 'Foul Committed':
-                eventos.append(evento)
-        
-        # Gerar o modelo com o LLM
-        api_key = os.getenv('GEMINI_KEY')
-        genai.configure(api_key=api_key)
-        modelo = genai.GenerativeModel('gemini-1.5-flash')
-        
-        instrucoes = f"""
-        Você é um especialista em futebol.
-
-        Baseado nas estatísticas da partida abaixo, crie uma narração para a partida inteira.
-        Não esqueça de indicar o resultado.
+        # Narrações já geradas para a partida e o estilo
+        chave = cache_respostas.chave(body.id_partida, 'commentary', estilo, INSTRUCOES_NARRACAO + ASSINATURA_COMPACTACAO, MODELO_GEMINI)
+        if (resposta := consultar_cache(chave, 'commentary', cache_control)) is not None:
+            response.headers['X-Cache'] = 'HIT'
+            return ModeloResumo(id_partida=body.id_partida, resumo=resposta)
 
-        Narre de acordo com o tom exigido pelo usuário:
-        - Formal: Narração técnica e objetiva.
-        - Humorístico: Narração descontraída e criativa.
-        - Técnico: Narração detalhada dos eventos.
+        # Narrações pedidas ao mesmo tempo para a mesma partida e estilo usam uma única geração
+        resposta, compartilhada = await coalescencia_llm.executar(
+            chave, lambda: gerar_uma_vez(chave, lambda: gerar_narracao(modelo, body.id_partida, estilo, chave)))
+        response.headers['X-Cache'] = 'COALESCED' if compartilhada else 'MISS'
+        return ModeloResumo(id_partida=body.id_partida, resumo=resposta)
 
-        • Tipo de Narração:
-        {estilo}
 
-        • Eventos da Partida:
-        {eventos}
-        """
-        try:
-            resposta = modelo.generate_content(instrucoes).text
-            return ModeloResumo(id_partida=body.id_partida, resumo=resposta)
-        except:
-            raise HTTPException(status_code=500, detail='Erro! Não foi possível gerar a narração.')
 
+async def gerar_em_partes(modelo, instrucoes: str, chave: str, id_partida: int, endpoint: str, estilo: str, enviar) -> str:
+    # Gera o texto com o stream do Gemini, repassando cada trecho a enviar; o texto completo vai para o cache
+    partes = []
+    try:
+        async with dependencias['gemini'].vaga():
+            with medir('llm', f'{endpoint}/stream'):
+                resposta = await modelo.generate_content_async(instrucoes, stream=True)
+                async for parte in resposta:
+                    partes.append(parte.text)
+                    enviar(parte.text)
+    except ClienteIndisponivel:
+        raise HTTPException(status_code=503, detail='Erro! O modelo não está disponível. Verifique a chave do Gemini.')
+    except Exception:
+        raise HTTPException(status_code=500, detail='Erro! Não foi possível gerar o texto.')
+    registrar_tokens(f'{endpoint}/stream', resposta)
+    texto = ''.join(partes)
+    cache_respostas.guardar(chave, id_partida, endpoint, estilo, texto)
+    return texto
+
+
+def evento_texto(texto: str) -> str:
+    return f'data: {json.dumps({"texto": texto}, ensure_ascii=False)}\n\n'
+
+
+async def transmitir_execucao(tarefa: asyncio.Future, partes: asyncio.Queue | None = None):
+    # Quem iniciou a geração recebe os trechos à medida que chegam (partes, encerradas por None);
+    # pedidos iguais feitos durante ela, ou gerações feitas por outro worker, recebem o texto completo no fim
+    enviado = False
+    if partes is not None:
+        while (parte := await partes.get()) is not None:
+            enviado = True
+            yield evento_texto(parte)
+    try:
+        texto = await asyncio.shield(tarefa)
+    except HTTPException as erro:
+        yield f'event: erro\ndata: {json.dumps({"erro": erro.detail}, ensure_ascii=False)}\n\n'
+        return
+    except Exception:
+        yield f'event: erro\ndata: {json.dumps({"erro": "Erro! Não foi possível gerar o texto."}, ensure_ascii=False)}\n\n'
+        return
+    if not enviado:
+        yield evento_texto(texto)
+    yield 'event: fim\ndata: {}\n\n'
+
+
+async def transmitir_texto(texto: str):
+    yield evento_texto(texto)
+    yield 'event: fim\ndata: {}\n\n'
+
+
+async def responder_stream(modelo, chave: str, id_partida: int, endpoint: str, estilo: str, montar_instrucoes) -> StreamingResponse:
+    # Pedidos iguais a uma geração em andamento (com ou sem stream, neste worker) aguardam por ela;
+    # em outro worker, gerar_uma_vez espera a trava e lê a resposta do cache
+    instrucoes = None
+    if not coalescencia_llm.em_andamento(chave):
+        eventos, relatorio = await carregar_partida(obter_eventos_compactados, id_partida)
+        registrar_compactacao(f'{endpoint}/stream', relatorio)
+        with medir('prompt', f'{endpoint}/stream'):
+            instrucoes = montar_instrucoes(eventos)
+
+    # Sem await entre a verificação acima e o início: quem não montou as instruções sempre compartilha
+    partes = asyncio.Queue()
+    tarefa, compartilhada = coalescencia_llm.iniciar(chave, lambda: gerar_uma_vez(
+        chave, lambda: gerar_em_partes(modelo, instrucoes, chave, id_partida, endpoint, estilo, partes.put_nowait)))
+    if compartilhada:
+        return StreamingResponse(transmitir_execucao(tarefa), media_type='text/event-stream', headers={'X-Cache': 'COALESCED'})
+    tarefa.add_done_callback(lambda _: partes.put_nowait(None))
+    return StreamingResponse(transmitir_execucao(tarefa, partes), media_type='text/event-stream', headers={'X-Cache': 'MISS'})
+
+
+@router.post('/match_summary/stream')
+async def resumir_partida_stream(body: ModeloPartida, cache_control: str | None = Header(None),
+                                 modelo=Depends(obter_modelo)):
+    chave = cache_respostas.chave(body.id_partida, 'match_summary', '', INSTRUCOES_RESUMO + ASSINATURA_COMPACTACAO, MODELO_GEMINI)
+    if (resposta := consultar_cache(chave, 'match_summary/stream', cache_control)) is not None:
+        return StreamingResponse(transmitir_texto(resposta), media_type='text/event-stream', headers={'X-Cache': 'HIT'})
+    return await responder_stream(modelo, chave, body.id_partida, 'match_summary', '',
+                                  lambda eventos: INSTRUCOES_RESUMO.format(eventos=eventos))
+
+
+@router.post('/commentary/stream')
+async def narrar_partida_stream(body: ModeloNarracao, cache_control: str | None = Header(None),
+                                modelo=Depends(obter_modelo)):
+    estilo = body.tom_narracao.lower().strip()
 
+    if estilo != 'formal' and estilo != 'humorístico' and estilo != 'técnico':
+        raise HTTPException(status_code=400, detail='Erro! Escolha entre os estilos "Formal", "Humorístico" ou "Técnico".')
 
-def tipos_react(action_input):
-    id_partida = json.loads(action_input)["id_partida"]
-    partida = sb.events(id_partida)
-    tipos = partida['type'].unique()
-    return tipos
+    chave = cache_respostas.chave(body.id_partida, 'commentary', estilo, INSTRUCOES_NARRACAO + ASSINATURA_COMPACTACAO, MODELO_GEMINI)
+    if (resposta := consultar_cache(chave, 'commentary/stream', cache_control)) is not None:
+        return StreamingResponse(transmitir_texto(resposta), media_type='text/event-stream', headers={'X-Cache': 'HIT'})
+    return await responder_stream(modelo, chave, body.id_partida, 'commentary', estilo,
+                                  lambda eventos: INSTRUCOES_NARRACAO.format(estilo=estilo, eventos=eventos))
 
 
-def eventos_react(action_input):
-    id_partida = json.loads(action_input)["id_partida"]
+def ler_entrada(modelo, action_input):
+    # Valida a entrada da ferramenta; em caso de erro, devolve a mensagem para o agente corrigir a chamada
     try:
-        tipo = json.loads(action_input)["tipo"]
-    except:
-        tipo = ''
-    partida_bruto = sb.events(id_partida)
-    partida_bruto = partida_bruto.sort_values(by='minute').to_dict(orient='records')
-    partida = []
-    for evento_bruto in partida_bruto:
-        evento = {}
-        for chave, valor in evento_bruto.items():
-                if valor is not np.nan:
-                    evento[chave] = valor
-        partida.append(evento)
-    eventos = []
-    for evento in partida:
-        if tipo:
-            if evento['type'] == tipo:
-                eventos.append(evento)
-        else:
-            if evento['type'] == 'Shot' or evento['type'] == 'Pass' or evento['type'] == 'Foul Committed':
-                eventos.append(evento)
-    return json.dumps(eventos)
+        return modelo.model_validate_json(action_input), None
+    except ValidationError as erro:
+        return None, f'Entrada inválida: {erro.errors(include_url=False)}. Campos aceitos: {list(modelo.model_fields)}.'
 
 
-def jogador_react(action_input):
-    id_partida = json.loads(action_input)["id_partida"]
-    nome_jogador = json.loads(action_input)["nome_jogador"]
-    partida = sb.events(id_partida)
+def tipos_react(action_input):
+    entrada, erro = ler_entrada(ModeloEntradaTipos, action_input)
+    if erro:
+        return erro
+    indice = obter_indice(entrada.id_partida)
+    return json.dumps({'tipos': indice.contagem_tipos()}, ensure_ascii=False)
 
-    jogadores = partida['player'].dropna().unique().tolist()
-    
-    jogadores_iniciais = [jogador['player']['name'] for jogador in partida[partida['type'] == 'Starting XI']['tactics'][0]['lineup']] \
-                            + [jogador['player']['name'] for jogador in partida[partida['type'] == 'Starting XI']['tactics'][1]['lineup']]
-    eventos_jogador = partida[partida['player'].str.contains(nome_jogador, na=False)]
-    estatisticas = {}
-
-    estatisticas['jogador'] = [jogador for jogador in jogadores if nome_jogador in jogador][0]
-    estatisticas['passes'] = eventos_jogador[eventos_jogador['type'] == 'Pass'].shape[0]
-    estatisticas['finalizacoes'] = eventos_jogador[eventos_jogador['type'] == 'Shot'].shape[0]
-    estatisticas['desarmes'] = eventos_jogador[eventos_jogador['type'] == 'Dispossessed'].shape[0]
-
-    if estatisticas['jogador'] in jogadores_iniciais:
-        if eventos_jogador[eventos_jogador['type'] == 'Substitution'].shape[0] > 0:
-            estatisticas['minutos_jogados'] = int(eventos_jogador[eventos_jogador['type'] == 'Substitution']['minute'].iloc[0])
-        else:
-            estatisticas['minutos_jogados'] = int(eventos_jogador['minute'].max())
+
+def eventos_react(action_input):
+    entrada, erro = ler_entrada(ModeloEntradaEventos, action_input)
+    if erro:
+        return erro
+    partida = obter_eventos(entrada.id_partida)
+    indice = obter_indice(entrada.id_partida)
+
+    if entrada.tipo:
+        tipos = [entrada.tipo]
+    elif entrada.apenas_gols:
+        tipos = ['Shot']
     else:
-        estatisticas['minutos_jogados'] = int(eventos_jogador['minute'].max() \
-                                                - partida[
-                                                                (partida['type'] == 'Substitution')
-                                                                & (partida['substitution_replacement'] == estatisticas['jogador'])
-                                                                ]['minute'].iloc[0]
-                                                )
+        tipos = TIPOS_PRINCIPAIS
+    eventos = filtrar_eventos(partida, indice, tipos=tipos, jogador=entrada.jogador, time=entrada.time,
+                              minuto_inicio=entrada.minuto_inicio, minuto_fim=entrada.minuto_fim,
+                              apenas_gols=entrada.apenas_gols)
+
+    if entrada.agrupar_por:
+        resultado = {'total': len(eventos), 'agrupado_por': entrada.agrupar_por,
+                     'contagens': contar_por(eventos, entrada.agrupar_por, entrada.top_n)}
+        return limitar(resultado, 'contagens')
+    return limitar(paginar(eventos, entrada.pagina), 'eventos')
 
-    return json.dumps(estatisticas)
 
+def jogador_react(action_input):
+    entrada, erro = ler_entrada(ModeloEntradaJogador, action_input)
+    if erro:
+        return erro
+    tabela = obter_tabela_jogadores(entrada.id_partida)
+
+    jogadores = buscar_jogadores(tabela, entrada.nome_jogador)
+    if len(jogadores) != 1:
+        return f'Foram encontrados {len(jogadores)} jogadores com o nome "{entrada.nome_jogador}": {", ".join(jogadores)}.'
+
+    return json.dumps(estatisticas_do_jogador(tabela, jogadores[0]), ensure_ascii=False)
+
+
+def analises_react(action_input):
+    entrada, erro = ler_entrada(ModeloEntradaAnalises, action_input)
+    if erro:
+        return erro
+
+    if entrada.analise == 'rede_de_passes':
+        redes = filtrar_por_nome(obter_rede_de_passes(entrada.id_partida), entrada.time)
+        resumo = {}
+        for time, rede in redes.items():
+            envolvidos = sorted(zip(rede['jogadores'], rede['envolvimentos'], rede['posicoes']), key=lambda item: item[1], reverse=True)
+            resumo[time] = {
+                'passes_completos': rede['total_passes'],
+                'principais_ligacoes': principais_ligacoes(rede, entrada.top_n),
+                'mais_envolvidos': [{'jogador': jogador, 'passes_dados_e_recebidos': quantidade, 'posicao_media': posicao}
+                                    for jogador, quantidade, posicao in envolvidos[:entrada.top_n]],
+            }
+        return json.dumps(resumo or 'Nenhum time encontrado.', ensure_ascii=False)
+
+    mapas = filtrar_por_nome(obter_mapa_de_finalizacoes(entrada.id_partida), entrada.time)
+    resumo = {}
+    for time, mapa in mapas.items():
+        resumo[time] = {'finalizacoes': len(mapa['finalizacoes']), 'gols': mapa['gols'], 'xg_total': mapa['xg_total'],
+                        'jogadores': mapa['jogadores'][:entrada.top_n]}
+        if entrada.jogador:
+            trecho = entrada.jogador.lower()
+            resumo[time]['finalizacoes_do_jogador'] = [finalizacao for finalizacao in mapa['finalizacoes']
+                                                       if trecho in finalizacao['jogador'].lower()]
+    return json.dumps(resumo or 'Nenhum time encontrado.', ensure_ascii=False)
+
+
+def carregar_agente(api_key: str):
+    # O LangChain só é importado quando o agente é criado (no primeiro uso, veja src/clientes.py)
+    from langchain.prompts import PromptTemplate
+    from langchain.agents import create_react_agent, AgentExecutor, Tool
+    from langchain_google_genai import ChatGoogleGenerativeAI
 
-def carregar_agente() -> AgentExecutor:
     instrucoes = """
     Você é um especialista em futebol.
     Você coletará informações e criará análises de uma partida específica.
@@ -269,7 +570,7 @@ def carregar_agente() -> AgentExecutor:
     Thought: Preciso obter quais tipos de evento estão presentes na partida de id 12345.
     Action: Tipos de Evento
     Action Input: {{"id_partida": 12345}}
-    Observation: Os tipos de evento da partida, incluindo "Shot", "Pass" e "Foul Committed".
+    Observation: Os tipos de evento da partida e quantas vezes cada um ocorreu, incluindo "Shot", "Pass" e "Foul Committed".
 
     
 
@@ -278,17 +579,27 @@ def carregar_agente() -> AgentExecutor:
     Caso o tipo solicitado esteja implícito (como gols dentro de "Shot"), tente realizar o processo com o tipo base.
     Caso MESMO ASSIM não se encaixe em nenhum tipo disponível, encerre o processo e informe ao usuário.
 
+    Prefira sempre receber os eventos já contados com "agrupar_por" ("jogador", "time", "tipo" ou "minuto"),
+    em vez de listar eventos um a um. Também é possível filtrar por "jogador", "time", "minuto_inicio", "minuto_fim"
+    e "apenas_gols". Listas de eventos vêm em páginas de 20 (use "pagina" para as seguintes).
+
     Exemplo 1:
-    Thought: Procurarei todos os passes presentes na partida 12345.
+    Thought: Preciso saber quem fez mais passes na partida 12345.
     Action: Obter Eventos
-    Action Input: {{"id_partida": 12345, "tipo": "Pass"}}
-    Observation: Todos os passes de uma partida.
+    Action Input: {{"id_partida": 12345, "tipo": "Pass", "agrupar_por": "jogador", "top_n": 5}}
+    Observation: Os 5 jogadores com mais passes e suas quantidades.
 
     Exemplo 2:
-    Thought: Quero todos os eventos da partida 12345, independente do tipo.
+    Thought: Quero saber quem marcou os gols da partida 12345.
     Action: Obter Eventos
-    Action Input: {{"id_partida": 12345}}
-    Observation: Todos os eventos da partida.
+    Action Input: {{"id_partida": 12345, "apenas_gols": true}}
+    Observation: Lista dos gols, com minuto, time e jogador.
+
+    Exemplo 3:
+    Thought: Quero as faltas do segundo tempo da partida 12345, por time.
+    Action: Obter Eventos
+    Action Input: {{"id_partida": 12345, "tipo": "Foul Committed", "minuto_inicio": 45, "agrupar_por": "time"}}
+    Observation: Número de faltas de cada time a partir dos 45 minutos.
 
 
 
@@ -301,10 +612,22 @@ def carregar_agente() -> AgentExecutor:
     Action Input: {{"id_partida": 12345, "nome_jogador": "Ana"}}
     Observation: Estatísticas da jogadora Ana.
 
+
+
+    4 - Para perguntas sobre quem passou para quem, a posição média dos jogadores ou a qualidade das chances (xG),
+    use a ferramenta "Análises da Partida", com "analise" igual a "rede_de_passes" ou "finalizacoes".
+    Também é possível filtrar por "time" e, nas finalizações, listar os chutes de um "jogador".
+
+    Exemplo:
+    Thought: Preciso saber qual time criou as melhores chances na partida 12345.
+    Action: Análises da Partida
+    Action Input: {{"id_partida": 12345, "analise": "finalizacoes"}}
+    Observation: Finalizações, gols e xG total de cada time, com os jogadores de maior xG.
+
     
 
     • Resposta Final:
-    Com os dados filtrados obtidos, basta contá-los sem nenhuma ferramenta ou código extra para responder a pergunta original.
+    Com os dados filtrados e contados obtidos, responda a pergunta original sem nenhuma ferramenta ou código extra.
     Encerre o processo nessa etapa.
 
     Exemplo:
@@ -332,7 +655,7 @@ def carregar_agente() -> AgentExecutor:
        template=instrucoes
     )
 
-    llm = ChatGoogleGenerativeAI(model='gemini-1.5-flash', temperature=0.2)
+    llm = ChatGoogleGenerativeAI(model=MODELO_GEMINI, temperature=0.2, google_api_key=api_key)
 
     ferramentas_react = [
         Tool(name='Tipos de Evento',
@@ -343,12 +666,17 @@ def carregar_agente() -> AgentExecutor:
         Tool(
             name='Obter Eventos',
             func=eventos_react,
-            description='Coleta todos os eventos de uma partida usando o ID da partida e o tipo do evento.'
+            description='Filtra os eventos de uma partida (por tipo, jogador, time, minutos ou gols) e devolve contagens agrupadas ou uma página de eventos.'
         ),
 
         Tool(name='Estatísticas de um Jogador',
              func=jogador_react,
              description='Obtém as estatísticas principais de um jogador praquela partida.'
+             ),
+
+        Tool(name='Análises da Partida',
+             func=analises_react,
+             description='Rede de passes (quem passou para quem e posição média) ou finalizações com xG de cada time e jogador.'
              )
     ]
 
@@ -365,22 +693,197 @@ def carregar_agente() -> AgentExecutor:
     )
 
 
+async def responder_pergunta(agente, id_partida: int, pergunta: str,
+                             avisar=ignorar_etapa) -> ModeloAgenteResposta:
+    # Perguntas comuns são respondidas direto dos agregados da partida, sem passar pelo LLM
+    avisar('carregando_partida')
+    agregados = await carregar_partida(obter_agregados, id_partida)
+    resposta_rapida = responder_rapido(agregados, pergunta)
+    if resposta_rapida is not None:
+        return ModeloAgenteResposta(id_partida=id_partida, pergunta=pergunta, resposta=resposta_rapida, caminho='rapido')
+
+    if agente is None:
+        raise HTTPException(status_code=503, detail='Erro! O agente não está disponível. Verifique a chave do Gemini.')
+    avisar('agente')
+    try:
+        async def invocar():
+            with medir('agente', 'react_agent'):
+                return await dependencias['agente'].aguardar(agente.ainvoke(input={'id_partida': id_partida,
+                                                                                  'pergunta': pergunta,
+                                                                                  }))
+
+        resposta, _ = await coalescencia_agente.executar((id_partida, normalizar(pergunta).strip()), invocar)
+
+        return ModeloAgenteResposta(id_partida=resposta['id_partida'], pergunta=resposta['pergunta'], resposta=resposta['output'],
+                                    caminho='agente')
+
+    except ClienteIndisponivel:
+        raise HTTPException(status_code=503, detail='Erro! O agente não está disponível. Verifique a chave do Gemini.')
+    except Exception:
+        raise HTTPException(status_code=500, detail='Erro! Não foi possível gerar uma resposta.')
+
+
 @router.post('/react_agent', response_model=ModeloAgenteResposta)
-async def agente_react(body: ModeloAgentePergunta):
+async def agente_react(body: ModeloAgentePergunta, agente=Depends(obter_agente)):
+    return await responder_pergunta(agente, body.id_partida, body.pergunta)
+
+
+def enfileirar(tipo: str, chave: str, fabrica, prioridade: int, response: Response) -> ModeloTarefa:
     try:
-        os.environ["GOOGLE_API_KEY"] = os.getenv('GEMINI_KEY')
+        tarefa, deduplicada = fila_tarefas.enviar(tipo, chave, fabrica, prioridade)
+    except FilaCheia:
+        erros.incrementar('tarefa', 'fila_cheia')
+        raise HTTPException(status_code=503, detail='Erro! A fila de tarefas está cheia. Tente novamente mais tarde.')
+    response.headers['Location'] = f'/tarefas/{tarefa["id_tarefa"]}'
+    return ModeloTarefa(**tarefa, deduplicada=deduplicada)
 
-        id_partida = body.id_partida
-        pergunta = body.pergunta
 
-        agente = carregar_agente()
+def tarefa_concluida(tipo: str, chave: str, resultado: dict, response: Response) -> ModeloTarefa:
+    # Respostas já guardadas no cache não entram na fila
+    tarefa = fila_tarefas.registrar_concluida(tipo, chave, resultado)
+    response.status_code = 200
+    response.headers['X-Cache'] = 'HIT'
+    response.headers['Location'] = f'/tarefas/{tarefa["id_tarefa"]}'
+    return ModeloTarefa(**tarefa)
 
-        resposta = agente.invoke(input={'id_partida': id_partida,
-                                        'pergunta': pergunta,
-                                        },
-                                handle_parsing_errors=True)
 
-        return ModeloAgenteResposta(id_partida=resposta['id_partida'], pergunta=resposta['pergunta'], resposta=resposta['output'])
+@router.post('/tarefas/match_summary', status_code=202, response_model=ModeloTarefa)
+async def tarefa_resumo(body: ModeloPartida, response: Response, prioridade: int = Query(PRIORIDADE_PADRAO, ge=0, le=9),
+                        cache_control: str | None = Header(None), modelo=Depends(obter_modelo)):
+    chave = cache_respostas.chave(body.id_partida, 'match_summary', '', INSTRUCOES_RESUMO + ASSINATURA_COMPACTACAO, MODELO_GEMINI)
+    if (resposta := consultar_cache(chave, 'tarefas/match_summary', cache_control)) is not None:
+        return tarefa_concluida('match_summary', chave, {'id_partida': body.id_partida, 'resumo': resposta}, response)
 
-    except:
-        raise HTTPException(status_code=500, detail='Erro! Não foi possível gerar uma resposta.')
+    async def executar(avisar):
+        resposta, _ = await coalescencia_llm.executar(
+            chave, lambda: gerar_uma_vez(chave, lambda: gerar_resumo(modelo, body.id_partida, chave, avisar)))
+        return ModeloResumo(id_partida=body.id_partida, resumo=resposta).model_dump()
+
+    return enfileirar('match_summary', chave, executar, prioridade, response)
+
+
+@router.post('/tarefas/commentary', status_code=202, response_model=ModeloTarefa)
+async def tarefa_narracao(body: ModeloNarracao, response: Response, prioridade: int = Query(PRIORIDADE_PADRAO, ge=0, le=9),
+                          cache_control: str | None = Header(None), modelo=Depends(obter_modelo)):
+    estilo = body.tom_narracao.lower().strip()
+    if estilo not in ('formal', 'humorístico', 'técnico'):
+        raise HTTPException(status_code=400, detail='Erro! Escolha entre os estilos "Formal", "Humorístico" ou "Técnico".')
+
+    chave = cache_respostas.chave(body.id_partida, 'commentary', estilo, INSTRUCOES_NARRACAO + ASSINATURA_COMPACTACAO, MODELO_GEMINI)
+    if (resposta := consultar_cache(chave, 'tarefas/commentary', cache_control)) is not None:
+        return tarefa_concluida('commentary', chave, {'id_partida': body.id_partida, 'resumo': resposta}, response)
+
+    async def executar(avisar):
+        resposta, _ = await coalescencia_llm.executar(
+            chave, lambda: gerar_uma_vez(chave, lambda: gerar_narracao(modelo, body.id_partida, estilo, chave, avisar)))
+        return ModeloResumo(id_partida=body.id_partida, resumo=resposta).model_dump()
+
+    return enfileirar('commentary', chave, executar, prioridade, response)
+
+
+@router.post('/tarefas/react_agent', status_code=202, response_model=ModeloTarefa)
+async def tarefa_agente(body: ModeloAgentePergunta, response: Response, prioridade: int = Query(PRIORIDADE_PADRAO, ge=0, le=9),
+                        agente=Depends(obter_agente)):
+    chave = f'react_agent:{body.id_partida}:{normalizar(body.pergunta).strip()}'
+
+    async def executar(avisar):
+        resposta = await responder_pergunta(agente, body.id_partida, body.pergunta, avisar)
+        return resposta.model_dump()
+
+    return enfileirar('react_agent', chave, executar, prioridade, response)
+
+
+@router.get('/tarefas/{id_tarefa}', response_model=ModeloTarefa)
+async def consultar_tarefa(id_tarefa: str, response: Response):
+    tarefa = fila_tarefas.consultar(id_tarefa)
+    if tarefa is None:
+        raise HTTPException(status_code=404, detail='Erro! Tarefa não encontrada.')
+    response.headers['Cache-Control'] = 'no-store'
+    return ModeloTarefa(**tarefa)
+
+
+async def transmitir_tarefa(id_tarefa: str):
+    # Um evento a cada mudança de situação ou etapa; o último traz o resultado ou o erro
+    async for tarefa in fila_tarefas.acompanhar(id_tarefa):
+        yield f'event: tarefa\ndata: {ModeloTarefa(**tarefa).model_dump_json()}\n\n'
+    yield 'event: fim\ndata: {}\n\n'
+
+
+@router.get('/tarefas/{id_tarefa}/stream')
+async def acompanhar_tarefa(id_tarefa: str):
+    if fila_tarefas.consultar(id_tarefa) is None:
+        raise HTTPException(status_code=404, detail='Erro! Tarefa não encontrada.')
+    return StreamingResponse(transmitir_tarefa(id_tarefa), media_type='text/event-stream')
+
+
+ORDENACOES_TEMPORADA = ['partidas', 'passes', 'passes_completos', 'finalizacoes', 'gols', 'faltas', 'desarmes', 'xg']
+
+
+async def obter_temporada(id_competicao: int, id_temporada: int) -> pd.DataFrame:
+    try:
+        return await dependencias['statsbomb'].executar(carregar_temporada, id_competicao, id_temporada)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f'Erro! Temporada não encontrada. Grave os eventos com '
+                                                    f'"python -m src.temporada {id_competicao} {id_temporada}".')
+
+
+@router.get('/temporadas/{id_competicao}/{id_temporada}/jogadores')
+async def jogadores_temporada(id_competicao: int, id_temporada: int, jogador: str | None = None,
+                              ordenar_por: str = 'passes', top: int = Query(20, ge=1, le=500)):
+    if ordenar_por not in ORDENACOES_TEMPORADA:
+        raise HTTPException(status_code=400, detail=f'Erro! Ordene por um destes campos: {", ".join(ORDENACOES_TEMPORADA)}.')
+    eventos = await obter_temporada(id_competicao, id_temporada)
+    return await dependencias['statsbomb'].executar(totais_jogadores, eventos, jogador, ordenar_por, top)
+
+
+@router.get('/temporadas/{id_competicao}/{id_temporada}/times')
+async def times_temporada(id_competicao: int, id_temporada: int):
+    eventos = await obter_temporada(id_competicao, id_temporada)
+    return await dependencias['statsbomb'].executar(comparar_times, eventos)
+
+
+@router.get('/temporadas/{id_competicao}/{id_temporada}/rankings')
+async def rankings_temporada(id_competicao: int, id_temporada: int, tipo: str = 'Pass', top: int = Query(3, ge=1, le=50)):
+    eventos = await obter_temporada(id_competicao, id_temporada)
+    return await dependencias['statsbomb'].executar(rankings_partidas, eventos, tipo, top)
+
+
+@router.post('/admin/aquecer', status_code=202)
+async def aquecer(body: ModeloAquecimento, tarefas: BackgroundTasks):
+    if not reservar_aquecimento(body.id_competicao, body.id_temporada):
+        raise HTTPException(status_code=409, detail='Erro! Essa temporada já está sendo carregada.')
+    tarefas.add_task(aquecer_temporada, body.id_competicao, body.id_temporada, body.trabalhadores)
+    return {'mensagem': 'Carregamento iniciado.', 'id_competicao': body.id_competicao, 'id_temporada': body.id_temporada}
+
+
+@router.get('/admin/aquecer/{id_competicao}/{id_temporada}')
+async def progresso_aquecimento(id_competicao: int, id_temporada: int):
+    estado = estado_aquecimento(id_competicao, id_temporada)
+    if estado is None:
+        raise HTTPException(status_code=404, detail='Erro! Nenhum carregamento iniciado para essa temporada.')
+    return estado
+
+
+@router.get('/cache/eventos')
+async def estatisticas_cache_eventos():
+    return repositorio.estatisticas()
+
+
+@router.get('/cache/respostas')
+async def estatisticas_cache_respostas():
+    return cache_respostas.estatisticas()
+
+
+@router.get('/execucao/filas')
+async def estatisticas_filas():
+    return estatisticas_execucao()
+
+
+@router.get('/execucao/tarefas')
+async def estatisticas_tarefas():
+    return fila_tarefas.estatisticas()
+
+
+@router.get('/execucao/coalescencia')
+async def estatisticas_requisicoes_coalescidas():
+    return estatisticas_coalescencia()
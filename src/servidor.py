@@ -0,0 +1,17 @@
+# Sobe a API com vários processos (workers), que compartilham o cache em disco:
+# eventos das partidas, tabelas derivadas, respostas do LLM e tarefas em segundo plano.
+# Uso: python -m src.servidor [--processos 4] [--host 127.0.0.1] [--porta 8000]
+import argparse
+import os
+import uvicorn
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sobe a API com vários workers.')
+    parser.add_argument('--processos', type=int, default=int(os.getenv('API_PROCESSOS', os.cpu_count() or 1)))
+    parser.add_argument('--host', default=os.getenv('API_HOST', '127.0.0.1'))
+    parser.add_argument('--porta', type=int, default=int(os.getenv('API_PORTA', '8000')))
+    argumentos = parser.parse_args()
+
+    # Cada worker guarda em memória até CACHE_EVENTOS_MB de partidas; o disco é o nível compartilhado
+    uvicorn.run('src.main:app', host=argumentos.host, port=argumentos.porta, workers=argumentos.processos)
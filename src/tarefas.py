@@ -0,0 +1,336 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from itertools import count
+from pathlib import Path
+from fastapi import HTTPException
+from .repositorio import DIRETORIO_CACHE
+from .metricas import medir, espera_tarefas
+from .travas import TravaArquivo, remover_travas_abandonadas
+
+
+TRABALHADORES = int(os.getenv('TAREFAS_TRABALHADORES', '4'))
+LIMITE_FILA = int(os.getenv('TAREFAS_LIMITE_FILA', '1000'))
+RETENCAO_HORAS = float(os.getenv('TAREFAS_RETENCAO_HORAS', '24'))
+PRIORIDADE_PADRAO = 5
+# Intervalo máximo entre dois avisos no acompanhamento de uma tarefa (também serve de sinal de vida)
+INTERVALO_ACOMPANHAMENTO = 15.0
+SITUACOES_FINAIS = ('concluida', 'falhou')
+CAMPOS = ('id_tarefa', 'tipo', 'chave', 'prioridade', 'situacao', 'etapa', 'criada_em', 'iniciada_em',
+          'concluida_em', 'resultado', 'erro', 'processo')
+CAMPOS_INTERNOS = ('chave', 'processo')
+
+logger = logging.getLogger(__name__)
+
+
+class FilaCheia(Exception):
+    pass
+
+
+class FilaTarefas:
+    """
+    Gerações em segundo plano: o pedido recebe um id na hora e um número fixo de trabalhadores
+    executa as tarefas por ordem de prioridade (0 é a mais urgente) e de chegada.
+    Um pedido com a mesma chave de uma tarefa ainda na fila ou em execução recebe o id dela.
+
+    A situação e o resultado de cada tarefa ficam em um banco SQLite, consultado por polling;
+    tarefas concluídas são apagadas depois do período de retenção.
+
+    Com vários workers, cada processo executa as próprias tarefas, mas todos consultam o mesmo banco.
+    Cada processo mantém uma trava de arquivo enquanto vive; as tarefas de um processo cuja trava
+    está livre não vão terminar mais.
+    """
+
+    def __init__(self, caminho: Path, trabalhadores: int, limite_fila: int, retencao_segundos: float):
+        self.caminho = Path(caminho)
+        self.numero_trabalhadores = trabalhadores
+        self.limite_fila = limite_fila
+        self.retencao_segundos = retencao_segundos
+        self._ativas = {}
+        self._por_chave = {}
+        self._fabricas = {}
+        self._avisos = {}
+        self._sequencia = count()
+        self._fila = None
+        self._loop = None
+        self._trabalhadores = []
+        self.enviadas = 0
+        self.deduplicadas = 0
+        self.concluidas = 0
+        self.falhas = 0
+        self.processo = uuid.uuid4().hex
+        self._trava_processo = None
+        self._aberta = False
+
+    def abrir(self):
+        # Cria o banco e a trava deste processo; chamada na subida da API (ou no primeiro uso), não na importação
+        if self._aberta:
+            return
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._trava_processo = TravaArquivo(self._caminho_processo(self.processo))
+        self._trava_processo.tentar()
+        self._aberta = True
+        # Travas de processos encerrados que não deixaram tarefas pendentes
+        remover_travas_abandonadas(self._caminho_processo('').parent, prefixo='processo.')
+        with self._conectar() as conexao:
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute("""
+                CREATE TABLE IF NOT EXISTS tarefas (
+                    id_tarefa TEXT PRIMARY KEY,
+                    tipo TEXT,
+                    chave TEXT,
+                    prioridade INTEGER,
+                    situacao TEXT,
+                    etapa TEXT,
+                    criada_em REAL,
+                    iniciada_em REAL,
+                    concluida_em REAL,
+                    resultado TEXT,
+                    erro TEXT
+                )
+            """)
+            if 'processo' not in {coluna[1] for coluna in conexao.execute('PRAGMA table_info(tarefas)')}:
+                conexao.execute('ALTER TABLE tarefas ADD COLUMN processo TEXT')
+            conexao.execute('CREATE INDEX IF NOT EXISTS tarefas_chave ON tarefas (chave)')
+
+            # As funções das tarefas ficam só na memória do processo que as recebeu;
+            # as de processos encerrados (reinicializações, workers substituídos) não voltam
+            processos = [linha[0] for linha in conexao.execute(
+                "SELECT DISTINCT processo FROM tarefas WHERE situacao NOT IN ('concluida', 'falhou')")]
+            for processo in processos:
+                if processo is None or self._processo_encerrado(processo):
+                    conexao.execute("""
+                        UPDATE tarefas SET situacao = 'falhou', concluida_em = ?,
+                                           erro = 'Erro! A API foi reiniciada antes da conclusão da tarefa.'
+                        WHERE situacao NOT IN ('concluida', 'falhou') AND processo IS ?
+                    """, (time.time(), processo))
+
+    def fechar(self):
+        # Na parada da API: libera e apaga a trava do processo, que de outro modo ficaria para sempre em disco
+        if not self._aberta:
+            return
+        self._trava_processo.liberar()
+        self._trava_processo.caminho.unlink(missing_ok=True)
+        self._aberta = False
+
+    def _caminho_processo(self, processo: str) -> Path:
+        return self.caminho.parent / 'travas' / f'processo.{processo}.lock'
+
+    def _processo_encerrado(self, processo: str) -> bool:
+        trava = TravaArquivo(self._caminho_processo(processo))
+        if not trava.tentar():
+            return False
+        trava.liberar()
+        trava.caminho.unlink(missing_ok=True)
+        return True
+
+    @contextmanager
+    def _conectar(self):
+        self.abrir()
+        conexao = sqlite3.connect(self.caminho, timeout=10)
+        try:
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    def _persistir(self, tarefa: dict):
+        valores = [tarefa[campo] for campo in CAMPOS]
+        valores[CAMPOS.index('resultado')] = json.dumps(tarefa['resultado'], ensure_ascii=False) \
+            if tarefa['resultado'] is not None else None
+        with self._conectar() as conexao:
+            conexao.execute(f'INSERT OR REPLACE INTO tarefas ({", ".join(CAMPOS)}) VALUES ({", ".join("?" * len(CAMPOS))})',
+                            valores)
+
+    def iniciar(self):
+        # Fila e trabalhadores pertencem ao loop de eventos em execução; um loop novo recebe os seus
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._fila = asyncio.PriorityQueue()
+        self._trabalhadores = [loop.create_task(self._trabalhar()) for _ in range(self.numero_trabalhadores)]
+        for id_tarefa, tarefa in list(self._ativas.items()):
+            if tarefa['situacao'] == 'em_fila':
+                self._avisos[id_tarefa] = asyncio.Event()
+                self._fila.put_nowait((tarefa['prioridade'], tarefa['sequencia'], id_tarefa))
+            else:
+                self._finalizar(tarefa, erro='Erro! A tarefa foi interrompida.')
+
+    def ativa(self) -> bool:
+        return self._loop is not None and any(not trabalhador.done() for trabalhador in self._trabalhadores)
+
+    async def parar(self):
+        for trabalhador in self._trabalhadores:
+            trabalhador.cancel()
+        await asyncio.gather(*self._trabalhadores, return_exceptions=True)
+        self._trabalhadores = []
+        self._loop = None
+
+    def enviar(self, tipo: str, chave: str, fabrica, prioridade: int = PRIORIDADE_PADRAO) -> tuple[dict, bool]:
+        # fabrica(avisar) é uma função assíncrona que recebe como informar a etapa atual e devolve um dict
+        self.iniciar()
+        if (id_existente := self._por_chave.get(chave) or self._ativa_em_outro_processo(chave)) is not None:
+            self.deduplicadas += 1
+            return self.consultar(id_existente), True
+        if len(self._ativas) >= self.limite_fila:
+            raise FilaCheia()
+
+        tarefa = self._nova(tipo, chave, prioridade)
+        tarefa['sequencia'] = next(self._sequencia)
+        self._persistir(tarefa)
+        self._ativas[tarefa['id_tarefa']] = tarefa
+        self._por_chave[chave] = tarefa['id_tarefa']
+        self._fabricas[tarefa['id_tarefa']] = fabrica
+        self._avisos[tarefa['id_tarefa']] = asyncio.Event()
+        self._fila.put_nowait((prioridade, tarefa['sequencia'], tarefa['id_tarefa']))
+        self.enviadas += 1
+        return self.consultar(tarefa['id_tarefa']), False
+
+    def _ativa_em_outro_processo(self, chave: str) -> str | None:
+        with self._conectar() as conexao:
+            linha = conexao.execute("""
+                SELECT id_tarefa FROM tarefas
+                WHERE chave = ? AND situacao NOT IN ('concluida', 'falhou') AND processo IS NOT ?
+                ORDER BY criada_em LIMIT 1
+            """, (chave, self.processo)).fetchone()
+        return linha[0] if linha is not None else None
+
+    def registrar_concluida(self, tipo: str, chave: str, resultado: dict) -> dict:
+        # Resultados já disponíveis (cache) viram tarefas concluídas, sem passar pela fila. Se uma tarefa recente
+        # com a mesma chave já terminou com esse resultado, o id dela é reaproveitado: pedidos repetidos não criam
+        # uma linha nova cada um. "Recente" garante ao id devolvido ao menos metade da retenção para ser consultado
+        agora = time.time()
+        with self._conectar() as conexao:
+            linha = conexao.execute("""
+                SELECT id_tarefa FROM tarefas
+                WHERE chave = ? AND situacao = 'concluida' AND resultado = ? AND concluida_em >= ?
+                ORDER BY concluida_em DESC LIMIT 1
+            """, (chave, json.dumps(resultado, ensure_ascii=False), agora - self.retencao_segundos / 2)).fetchone()
+        if linha is not None:
+            return self.consultar(linha[0])
+
+        tarefa = {**self._nova(tipo, chave, PRIORIDADE_PADRAO), 'situacao': 'concluida', 'iniciada_em': agora,
+                  'concluida_em': agora, 'resultado': resultado}
+        self._persistir(tarefa)
+        self.enviadas += 1
+        self.concluidas += 1
+        return self.consultar(tarefa['id_tarefa'])
+
+    def _nova(self, tipo: str, chave: str, prioridade: int) -> dict:
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute('DELETE FROM tarefas WHERE concluida_em < ?', (agora - self.retencao_segundos,))
+        return {'id_tarefa': uuid.uuid4().hex, 'tipo': tipo, 'chave': chave, 'prioridade': prioridade,
+                'situacao': 'em_fila', 'etapa': None, 'criada_em': agora, 'iniciada_em': None,
+                'concluida_em': None, 'resultado': None, 'erro': None, 'processo': self.processo}
+
+    async def _trabalhar(self):
+        while True:
+            _, _, id_tarefa = await self._fila.get()
+            tarefa = self._ativas[id_tarefa]
+            fabrica = self._fabricas.pop(id_tarefa)
+            tarefa['situacao'] = 'em_andamento'
+            tarefa['iniciada_em'] = time.time()
+            espera_tarefas.observar(tarefa['iniciada_em'] - tarefa['criada_em'], tarefa['tipo'])
+            self._atualizar(tarefa)
+            try:
+                with medir('tarefa', tarefa['tipo']):
+                    resultado = await fabrica(lambda etapa: self._informar_etapa(tarefa, etapa))
+            except asyncio.CancelledError:
+                self._finalizar(tarefa, erro='Erro! A API foi encerrada antes da conclusão da tarefa.')
+                raise
+            except HTTPException as erro:
+                self._finalizar(tarefa, erro=erro.detail)
+            except Exception:
+                logger.exception('Falha na tarefa %s (%s).', id_tarefa, tarefa['tipo'])
+                self._finalizar(tarefa, erro='Erro! Não foi possível concluir a tarefa.')
+            else:
+                self._finalizar(tarefa, resultado=resultado)
+
+    def _informar_etapa(self, tarefa: dict, etapa: str):
+        if tarefa['situacao'] == 'em_andamento':
+            tarefa['etapa'] = etapa
+            self._atualizar(tarefa)
+
+    def _atualizar(self, tarefa: dict):
+        self._persistir(tarefa)
+        # Acorda quem acompanha a tarefa e deixa um aviso novo para a próxima mudança
+        aviso = self._avisos.get(tarefa['id_tarefa'])
+        if aviso is not None:
+            self._avisos[tarefa['id_tarefa']] = asyncio.Event()
+            aviso.set()
+
+    def _finalizar(self, tarefa: dict, resultado: dict | None = None, erro: str | None = None):
+        tarefa.update(situacao='falhou' if erro else 'concluida', etapa=None, concluida_em=time.time(),
+                      resultado=resultado, erro=erro)
+        if erro:
+            self.falhas += 1
+        else:
+            self.concluidas += 1
+        self._atualizar(tarefa)
+        self._ativas.pop(tarefa['id_tarefa'], None)
+        self._fabricas.pop(tarefa['id_tarefa'], None)
+        self._avisos.pop(tarefa['id_tarefa'], None)
+        if self._por_chave.get(tarefa['chave']) == tarefa['id_tarefa']:
+            del self._por_chave[tarefa['chave']]
+
+    def consultar(self, id_tarefa: str) -> dict | None:
+        tarefa = self._ativas.get(id_tarefa)
+        if tarefa is not None:
+            publica = {campo: tarefa[campo] for campo in CAMPOS if campo not in CAMPOS_INTERNOS}
+            if tarefa['situacao'] == 'em_fila':
+                ordem = (tarefa['prioridade'], tarefa['sequencia'])
+                publica['posicao_fila'] = 1 + sum((outra['prioridade'], outra['sequencia']) < ordem
+                                                  for outra in self._ativas.values() if outra['situacao'] == 'em_fila')
+            return publica
+
+        with self._conectar() as conexao:
+            linha = conexao.execute(f'SELECT {", ".join(CAMPOS)} FROM tarefas WHERE id_tarefa = ?', (id_tarefa,)).fetchone()
+        if linha is None:
+            return None
+        publica = {campo: valor for campo, valor in zip(CAMPOS, linha) if campo not in CAMPOS_INTERNOS}
+        publica['resultado'] = json.loads(publica['resultado']) if publica['resultado'] is not None else None
+        return publica
+
+    async def acompanhar(self, id_tarefa: str):
+        # Devolve a tarefa a cada mudança (ou a cada intervalo, sem mudanças) até ela terminar
+        while True:
+            aviso = self._avisos.get(id_tarefa)
+            tarefa = self.consultar(id_tarefa)
+            if tarefa is None:
+                return
+            yield tarefa
+            if tarefa['situacao'] in SITUACOES_FINAIS:
+                return
+            if aviso is None:
+                # Tarefa de outro processo, conhecida só pelo banco
+                await asyncio.sleep(1)
+                continue
+            try:
+                await asyncio.wait_for(aviso.wait(), INTERVALO_ACOMPANHAMENTO)
+            except asyncio.TimeoutError:
+                pass
+
+    def estatisticas(self) -> dict:
+        em_fila = sum(tarefa['situacao'] == 'em_fila' for tarefa in self._ativas.values())
+        return {
+            'trabalhadores': self.numero_trabalhadores,
+            'em_fila': em_fila,
+            'em_andamento': len(self._ativas) - em_fila,
+            'enviadas': self.enviadas,
+            'deduplicadas': self.deduplicadas,
+            'concluidas': self.concluidas,
+            'falhas': self.falhas,
+        }
+
+
+fila_tarefas = FilaTarefas(caminho=DIRETORIO_CACHE / 'tarefas.sqlite3',
+                           trabalhadores=TRABALHADORES,
+                           limite_fila=LIMITE_FILA,
+                           retencao_segundos=RETENCAO_HORAS * 3600)
@@ -0,0 +1,153 @@
+import argparse
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .repositorio import DIRETORIO_CACHE, repositorio
+from .catalogo import catalogo
+from .limpeza import coordenadas
+
+
+DIRETORIO_TEMPORADAS = DIRETORIO_CACHE / 'temporadas'
+TEMPORADAS_EM_MEMORIA = 4
+
+# Colunas planas guardadas no conjunto da temporada; match_id vem da partição,
+# e os tipos são fixos para que todos os arquivos da temporada tenham o mesmo esquema
+TIPOS_TEMPORADA = {'id': 'string', 'period': 'int64', 'minute': 'int64', 'second': 'int64', 'type': 'string',
+                   'team': 'string', 'player': 'string', 'possession_team': 'string', 'pass_recipient': 'string',
+                   'pass_outcome': 'string', 'shot_outcome': 'string', 'shot_statsbomb_xg': 'float64',
+                   'foul_committed_card': 'string', 'bad_behaviour_card': 'string'}
+
+logger = logging.getLogger(__name__)
+
+_temporadas = OrderedDict()
+_trava = threading.Lock()
+
+
+def caminho_temporada(id_competicao: int, id_temporada: int) -> Path:
+    return DIRETORIO_TEMPORADAS / f'competition_id={id_competicao}' / f'season_id={id_temporada}'
+
+
+def tabela_temporada(partida: pd.DataFrame) -> pd.DataFrame:
+    # As partidas do repositório já vêm com a localização separada em location_x/location_y
+    tabela = partida.reindex(columns=list(TIPOS_TEMPORADA)).astype(TIPOS_TEMPORADA)
+    if 'location_x' in partida.columns:
+        return tabela.assign(x=partida['location_x'].to_numpy(np.float32), y=partida['location_y'].to_numpy(np.float32))
+    posicoes = coordenadas(partida['location']) if 'location' in partida.columns \
+        else np.full((len(partida), 2), np.nan, dtype=np.float32)
+    return tabela.assign(x=posicoes[:, 0], y=posicoes[:, 1])
+
+
+def ingerir_partida(id_competicao: int, id_temporada: int, id_partida: int) -> bool:
+    destino = caminho_temporada(id_competicao, id_temporada) / f'match_id={id_partida}' / 'eventos.parquet'
+    if destino.exists():
+        return False
+    tabela = tabela_temporada(repositorio.obter_sem_memoria(id_partida))
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_suffix(f'.{os.getpid()}.tmp')
+    tabela.to_parquet(temporario, index=False)
+    os.replace(temporario, destino)
+    return True
+
+
+def ingerir_temporada(id_competicao: int, id_temporada: int, trabalhadores: int = 4) -> dict:
+    """
+    Grava os eventos de todas as partidas de uma competição/temporada em Parquet,
+    particionado por competição, temporada e partida. Partidas já gravadas são puladas.
+    """
+    ids_partidas = catalogo.partidas(id_competicao, id_temporada)['match_id'].astype(int).tolist()
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        gravadas = list(executor.map(lambda id_partida: ingerir_partida(id_competicao, id_temporada, id_partida),
+                                     ids_partidas))
+    with _trava:
+        _temporadas.pop((id_competicao, id_temporada), None)
+    resultado = {'partidas': len(ids_partidas), 'gravadas': sum(gravadas), 'ja_existentes': len(gravadas) - sum(gravadas)}
+    logger.info('Temporada %s/%s ingerida: %s', id_competicao, id_temporada, resultado)
+    return resultado
+
+
+def carregar_temporada(id_competicao: int, id_temporada: int) -> pd.DataFrame:
+    # Lê o conjunto inteiro em uma varredura; mantém as temporadas mais usadas em memória
+    caminho = caminho_temporada(id_competicao, id_temporada)
+    if not caminho.exists():
+        raise FileNotFoundError(caminho)
+    versao = sum(1 for _ in caminho.glob('match_id=*/eventos.parquet'))
+    chave = (id_competicao, id_temporada)
+    with _trava:
+        if chave in _temporadas and _temporadas[chave][0] == versao:
+            _temporadas.move_to_end(chave)
+            return _temporadas[chave][1]
+    eventos = pd.read_parquet(caminho)
+    eventos['match_id'] = eventos['match_id'].astype(int)
+    with _trava:
+        _temporadas[chave] = (versao, eventos)
+        _temporadas.move_to_end(chave)
+        while len(_temporadas) > TEMPORADAS_EM_MEMORIA:
+            _temporadas.popitem(last=False)
+    return eventos
+
+
+def _indicadores(eventos: pd.DataFrame, chave: str) -> pd.DataFrame:
+    tipos = eventos['type']
+    gols = (tipos == 'Shot') & (eventos['shot_outcome'] == 'Goal') & (eventos['period'] < 5)
+    indicadores = pd.DataFrame({
+        chave: eventos[chave],
+        'match_id': eventos['match_id'],
+        'passes': tipos == 'Pass',
+        'passes_completos': (tipos == 'Pass') & eventos['pass_outcome'].isna(),
+        'finalizacoes': tipos == 'Shot',
+        'gols': gols,
+        'xg': eventos['shot_statsbomb_xg'].fillna(0),
+        'faltas': tipos == 'Foul Committed',
+        'desarmes': tipos == 'Dispossessed',
+    })
+    agrupado = indicadores.groupby(chave, observed=True)
+    tabela = agrupado[['passes', 'passes_completos', 'finalizacoes', 'gols', 'faltas', 'desarmes']].sum().astype(int)
+    tabela.insert(0, 'partidas', agrupado['match_id'].nunique())
+    tabela['xg'] = agrupado['xg'].sum().round(2)
+    return tabela
+
+
+def totais_jogadores(eventos: pd.DataFrame, jogador: str | None = None,
+                     ordenar_por: str = 'passes', top: int = 20) -> list[dict]:
+    eventos = eventos[eventos['player'].notna()]
+    if jogador:
+        eventos = eventos[eventos['player'].str.contains(jogador, case=False, regex=False)]
+    tabela = _indicadores(eventos, 'player')
+    tabela.insert(0, 'time', eventos.groupby('player', observed=True)['team'].agg(lambda times: times.mode().iloc[0]))
+    tabela = tabela.sort_values(by=ordenar_por, ascending=False).head(top)
+    return tabela.rename_axis('jogador').reset_index().to_dict(orient='records')
+
+
+def comparar_times(eventos: pd.DataFrame) -> list[dict]:
+    tabela = _indicadores(eventos[eventos['team'].notna()], 'team')
+    return tabela.sort_values(by='gols', ascending=False).rename_axis('time').reset_index().to_dict(orient='records')
+
+
+def rankings_partidas(eventos: pd.DataFrame, tipo: str = 'Pass', top: int = 3) -> list[dict]:
+    # Líderes de cada partida em um tipo de evento, com uma única contagem agrupada por (partida, jogador)
+    contagem = eventos[(eventos['type'] == tipo) & eventos['player'].notna()] \
+        .groupby(['match_id', 'player'], observed=True) \
+        .size() \
+        .rename('quantidade') \
+        .reset_index() \
+        .sort_values(by=['match_id', 'quantidade'], ascending=[True, False])
+    lideres = contagem.groupby('match_id').head(top)
+    return [{'match_id': int(id_partida),
+             'lideres': [{'jogador': jogador, 'quantidade': int(quantidade)}
+                         for jogador, quantidade in zip(grupo['player'], grupo['quantidade'])]}
+            for id_partida, grupo in lideres.groupby('match_id')]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Grava os eventos de uma competição/temporada em Parquet particionado.')
+    parser.add_argument('id_competicao', type=int)
+    parser.add_argument('id_temporada', type=int)
+    parser.add_argument('--trabalhadores', type=int, default=4)
+    argumentos = parser.parse_args()
+    print(ingerir_temporada(argumentos.id_competicao, argumentos.id_temporada, argumentos.trabalhadores))
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import os
+import time
+from pathlib import Path
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+INTERVALO_TENTATIVAS = 0.05
+FAIXAS = int(os.getenv('TRAVAS_FAIXAS', '64'))
+# Travas livres (e fora das faixas) com mais que esta idade são de processos encerrados ou de versões anteriores
+IDADE_TRAVA_ABANDONADA = 60
+
+
+class TravaArquivo:
+    """
+    Trava exclusiva entre processos (vários workers da API) feita sobre um arquivo:
+    fcntl.flock no Linux e no macOS, msvcrt.locking no Windows.
+    Cada instância abre o próprio arquivo, então a trava também separa threads de um mesmo processo.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._arquivo = None
+
+    def tentar(self) -> bool:
+        # Tenta travar sem esperar; retorna False se outro processo (ou thread) já tem a trava
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        arquivo = open(self.caminho, 'a+b')
+        try:
+            if os.name == 'nt':
+                arquivo.seek(0)
+                msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+        self._arquivo = arquivo
+        return True
+
+    def adquirir(self) -> bool:
+        # Espera a trava; retorna se foi preciso esperar (outro processo fez o trabalho nesse meio tempo)
+        esperou = False
+        while not self.tentar():
+            esperou = True
+            time.sleep(INTERVALO_TENTATIVAS)
+        return esperou
+
+    async def aguardar(self) -> bool:
+        # Mesmo que adquirir, sem bloquear o loop de eventos
+        esperou = False
+        while not self.tentar():
+            esperou = True
+            await asyncio.sleep(INTERVALO_TENTATIVAS)
+        return esperou
+
+    def liberar(self):
+        if self._arquivo is None:
+            return
+        try:
+            if os.name == 'nt':
+                self._arquivo.seek(0)
+                msvcrt.locking(self._arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, *erro):
+        self.liberar()
+
+
+class TravasPorChave:
+    """
+    Conjunto fixo de travas de arquivo (faixas) para um tipo de trabalho: cada chave cai sempre na mesma
+    faixa, pelo hash. O diretório fica com no máximo `faixas` arquivos, em vez de um por chave;
+    chaves diferentes na mesma faixa apenas esperam uma pela outra.
+
+    Cada tipo tem as próprias faixas, e as travas são tomadas sempre na mesma ordem entre tipos
+    (gráfico ou LLM, depois derivado, depois eventos), então uma trava nunca espera outra faixa já tomada.
+    """
+
+    def __init__(self, diretorio: Path, nome: str, faixas: int = FAIXAS):
+        self.diretorio = Path(diretorio)
+        self.nome = nome
+        self.faixas = faixas
+
+    def trava(self, chave) -> TravaArquivo:
+        faixa = int.from_bytes(hashlib.sha256(str(chave).encode()).digest()[:4], 'big') % self.faixas
+        return TravaArquivo(self.diretorio / f'faixa.{self.nome}.{faixa:03d}.lock')
+
+
+def remover_travas_abandonadas(diretorio: Path, prefixo: str = '') -> int:
+    # Apaga travas livres que não são faixas (de processos encerrados ou de versões que criavam uma por chave).
+    # As faixas nunca são apagadas: outro processo pode estar abrindo o arquivo para travá-lo
+    removidas = 0
+    limite = time.time() - IDADE_TRAVA_ABANDONADA
+    for caminho in Path(diretorio).glob(f'{prefixo}*.lock'):
+        if caminho.name.startswith('faixa.'):
+            continue
+        try:
+            if caminho.stat().st_mtime > limite:
+                continue
+        except FileNotFoundError:
+            continue
+        trava = TravaArquivo(caminho)
+        if trava.tentar():
+            trava.liberar()
+            caminho.unlink(missing_ok=True)
+            removidas += 1
+    return removidas
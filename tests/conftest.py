@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Os módulos de src leem CACHE_DIR ao serem importados: os testes usam um diretório descartável
+os.environ.setdefault('CACHE_DIR', tempfile.mkdtemp(prefix='testes_'))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,83 @@
+from collections import Counter
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.fixtures import gerar_partida
+from src.analises import rede_de_passes, principais_ligacoes, mapa_de_finalizacoes, mapas_de_calor, filtrar_por_nome
+from src.normalizacao import normalizar_eventos
+
+
+@pytest.fixture(scope='module')
+def partida():
+    return normalizar_eventos(gerar_partida(1, numero_eventos=3000, colunas_extras=0))[0]
+
+
+def test_rede_de_passes_conta_so_os_completos(partida):
+    redes = rede_de_passes(partida)
+    assert sorted(redes) == ['Time Casa', 'Time Fora']
+    completos = partida[(partida['type'] == 'Pass') & partida['pass_outcome'].isna() & (partida['team'] == 'Time Casa')]
+    esperado = Counter(zip(completos['player'], completos['pass_recipient']))
+    rede = redes['Time Casa']
+    for (de, para), quantidade in esperado.items():
+        assert rede['passes'][rede['jogadores'].index(de)][rede['jogadores'].index(para)] == quantidade
+    assert sum(map(sum, rede['passes'])) == rede['total_passes'] == len(completos)
+
+
+def test_posicao_media_nos_passes_dados_e_recebidos(partida):
+    rede = rede_de_passes(partida)['Time Fora']
+    completos = partida[(partida['type'] == 'Pass') & partida['pass_outcome'].isna() & (partida['team'] == 'Time Fora')]
+    jogador = rede['jogadores'][0]
+    x = np.concatenate([completos.loc[completos['player'] == jogador, 'location_x'],
+                        completos.loc[completos['pass_recipient'] == jogador, 'pass_end_location_x']]).astype(np.float64)
+    assert rede['posicoes'][0][0] == pytest.approx(round(x.mean(), 1))
+    assert rede['envolvimentos'][0] == len(x)
+
+
+def test_principais_ligacoes_em_ordem(partida):
+    rede = rede_de_passes(partida)['Time Casa']
+    ligacoes = principais_ligacoes(rede, 5)
+    assert len(ligacoes) == 5
+    assert ligacoes[0]['passes'] == max(map(max, rede['passes']))
+    assert [ligacao['passes'] for ligacao in ligacoes] == sorted((ligacao['passes'] for ligacao in ligacoes), reverse=True)
+    assert principais_ligacoes({'jogadores': [], 'passes': []}) == []
+
+
+def test_mapa_de_finalizacoes(partida):
+    mapas = mapa_de_finalizacoes(partida)
+    chutes = partida[(partida['type'] == 'Shot') & (partida['team'] == 'Time Casa')]
+    mapa = mapas['Time Casa']
+    assert len(mapa['finalizacoes']) == len(chutes)
+    assert mapa['gols'] == (chutes['shot_outcome'] == 'Goal').sum()
+    assert mapa['xg_total'] == pytest.approx(chutes['shot_statsbomb_xg'].astype(np.float64).sum(), abs=1e-3)
+    acumulado = [total for _, total in mapa['xg_acumulado']]
+    assert acumulado == sorted(acumulado) and acumulado[-1] == pytest.approx(mapa['xg_total'], abs=1e-3)
+    assert sum(jogador['finalizacoes'] for jogador in mapa['jogadores']) == len(chutes)
+
+
+def test_mapas_de_calor_somam_as_acoes(partida):
+    mapas = mapas_de_calor(partida)
+    assert (mapas['colunas'], mapas['linhas']) == (12, 8)
+    com_localizacao = partida[partida['location_x'].notna()]
+    assert np.array(mapas['times']['Time Casa']).shape == (8, 12)
+    assert sum(np.sum(matriz) for matriz in mapas['times'].values()) == len(com_localizacao)
+    jogador = 'Time Fora Jogador02'
+    assert np.sum(mapas['jogadores'][jogador]) == (com_localizacao['player'] == jogador).sum()
+
+
+def test_zonas_nas_bordas_do_campo():
+    partida = pd.DataFrame({'type': ['Pass'] * 3, 'team': ['X'] * 3, 'player': ['A'] * 3,
+                            'location_x': np.array([0, 120, 65], dtype=np.float32),
+                            'location_y': np.array([0, 80, 15], dtype=np.float32)})
+    matriz = np.array(mapas_de_calor(partida, colunas=12, linhas=8)['jogadores']['A'])
+    assert matriz[0, 0] == matriz[7, 11] == matriz[1, 6] == 1
+
+
+def test_partida_sem_localizacoes():
+    partida = pd.DataFrame({'type': ['Pass'], 'team': ['X'], 'player': ['A']})
+    assert rede_de_passes(partida) == {} and mapa_de_finalizacoes(partida) == {}
+
+
+def test_filtrar_por_nome():
+    valores = {'Time Casa': 1, 'Time Fora': 2}
+    assert filtrar_por_nome(valores, 'casa') == {'Time Casa': 1}
+    assert filtrar_por_nome(valores, None) is valores
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+from benchmarks.fixtures import gerar_partida
+from src import aquecimento
+from src.aquecimento import aquecer_temporada, estado_aquecimento, reservar_aquecimento
+from src.repositorio import RepositorioEventos
+
+
+class CarregadorInstavel:
+    # Falha algumas vezes em partidas escolhidas antes de devolver os eventos
+    def __init__(self, falhas: dict[int, int]):
+        self.falhas = dict(falhas)
+        self.chamadas = []
+
+    def __call__(self, id_partida: int) -> pd.DataFrame:
+        self.chamadas.append(id_partida)
+        if self.falhas.get(id_partida, 0) > 0:
+            self.falhas[id_partida] -= 1
+            raise ConnectionError('statsbomb fora do ar')
+        return gerar_partida(id_partida, numero_eventos=50, colunas_extras=0)
+
+
+class CatalogoFalso:
+    def __init__(self, ids: list[int] | None):
+        self.ids = ids
+
+    def partidas(self, id_competicao: int, id_temporada: int) -> pd.DataFrame:
+        if self.ids is None:
+            raise ConnectionError('statsbomb fora do ar')
+        return pd.DataFrame({'match_id': self.ids})
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    def montar(ids, falhas=None):
+        carregador = CarregadorInstavel(falhas or {})
+        repositorio = RepositorioEventos(tmp_path / 'eventos', limite_bytes=10**9, carregador=carregador)
+        monkeypatch.setattr(aquecimento, 'repositorio', repositorio)
+        monkeypatch.setattr(aquecimento, 'catalogo', CatalogoFalso(ids))
+        monkeypatch.setattr(aquecimento, 'ESPERA_SEGUNDOS', 0)
+        monkeypatch.setattr(aquecimento, 'progresso_aquecimentos', {})
+        return repositorio, carregador
+    return montar
+
+
+def test_baixa_so_as_partidas_pendentes(ambiente):
+    repositorio, carregador = ambiente([1, 2, 3])
+    repositorio.aquecer(2)
+    estado = aquecer_temporada(11, 90, trabalhadores=2)
+    assert (estado['situacao'], estado['partidas'], estado['ja_em_cache'], estado['baixadas']) == ('concluido', 3, 1, 2)
+    assert sorted(carregador.chamadas) == [1, 2, 3]
+    # Sem nada pendente, a repetição não baixa de novo
+    assert aquecer_temporada(11, 90)['baixadas'] == 0 and len(carregador.chamadas) == 3
+
+
+def test_falhas_sao_repetidas_e_registradas(ambiente):
+    _, carregador = ambiente([1, 2], falhas={1: 1, 2: 5})
+    estado = aquecer_temporada(11, 90, tentativas=3)
+    assert estado['situacao'] == 'concluido_com_falhas'
+    assert (estado['baixadas'], estado['falhas']) == (1, [2])
+    assert carregador.chamadas.count(1) == 2 and carregador.chamadas.count(2) == 3
+
+
+def test_falha_no_catalogo_fica_registrada(ambiente):
+    ambiente(None)
+    estado = aquecer_temporada(11, 90)
+    assert estado['situacao'] == 'falhou' and estado['erro']
+    assert estado_aquecimento(11, 90)['situacao'] == 'falhou'
+
+
+def test_reserva_impede_aquecimentos_simultaneos(ambiente):
+    ambiente([1])
+    assert reservar_aquecimento(11, 90)
+    assert not reservar_aquecimento(11, 90)
+    assert estado_aquecimento(11, 90)['situacao'] == 'em_andamento'
+    # O aquecimento agendado usa a reserva; depois dele, a temporada pode ser carregada de novo
+    assert aquecer_temporada(11, 90)['situacao'] == 'concluido'
+    assert reservar_aquecimento(11, 90)
@@ -0,0 +1,67 @@
+import pytest
+from src import cache_llm
+from src.cache_llm import CacheRespostas
+
+
+class Relogio:
+    def __init__(self, instante: float = 1000.0):
+        self.instante = instante
+
+    def __call__(self) -> float:
+        return self.instante
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_llm.time, 'time', relogio)
+    return relogio
+
+
+def test_resposta_guardada_e_contabilizada(tmp_path, relogio):
+    cache = CacheRespostas(tmp_path / 'respostas.sqlite3', validade_segundos=60, limite_entradas=10)
+    assert cache.obter('chave') is None
+    cache.guardar('chave', 1, 'match_summary', 'Formal', 'resumo')
+    assert cache.obter('chave') == 'resumo'
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['entradas'], estatisticas['acertos'], estatisticas['faltas']) == (1, 1, 1)
+
+
+def test_resposta_vencida_nao_e_devolvida(tmp_path, relogio):
+    cache = CacheRespostas(tmp_path / 'respostas.sqlite3', validade_segundos=60, limite_entradas=10)
+    cache.guardar('chave', 1, 'match_summary', 'Formal', 'resumo')
+    relogio.instante += 59
+    assert cache.obter('chave') == 'resumo'
+    relogio.instante += 2
+    assert cache.obter('chave') is None
+
+
+def test_vencidas_sao_apagadas_na_gravacao(tmp_path, relogio):
+    cache = CacheRespostas(tmp_path / 'respostas.sqlite3', validade_segundos=60, limite_entradas=10)
+    cache.guardar('antiga', 1, 'match_summary', 'Formal', 'resumo')
+    relogio.instante += 120
+    cache.guardar('nova', 2, 'match_summary', 'Formal', 'resumo')
+    assert cache.estatisticas()['entradas'] == 1
+
+
+def test_limite_remove_as_menos_acessadas(tmp_path, relogio):
+    cache = CacheRespostas(tmp_path / 'respostas.sqlite3', validade_segundos=3600, limite_entradas=2)
+    cache.guardar('a', 1, 'commentary', 'Formal', 'narração a')
+    relogio.instante += 1
+    cache.guardar('b', 2, 'commentary', 'Formal', 'narração b')
+    relogio.instante += 1
+    # A leitura renova "a", então "b" passa a ser a menos acessada
+    assert cache.obter('a') == 'narração a'
+    relogio.instante += 1
+    cache.guardar('c', 3, 'commentary', 'Formal', 'narração c')
+    assert cache.estatisticas()['entradas'] == 2
+    assert cache.obter('b', contabilizar=False) is None
+    assert cache.obter('a', contabilizar=False) == 'narração a'
+    assert cache.obter('c', contabilizar=False) == 'narração c'
+
+
+def test_chave_muda_com_template_e_modelo():
+    chave = CacheRespostas.chave(1, 'match_summary', 'Formal', 'template', 'gemini-1')
+    assert chave == CacheRespostas.chave(1, 'match_summary', 'Formal', 'template', 'gemini-1')
+    assert chave != CacheRespostas.chave(1, 'match_summary', 'Formal', 'template novo', 'gemini-1')
+    assert chave != CacheRespostas.chave(1, 'match_summary', 'Formal', 'template', 'gemini-2')
@@ -0,0 +1,69 @@
+import os
+import time
+import pandas as pd
+import pytest
+from src.catalogo import Catalogo
+
+
+class Fonte:
+    def __init__(self):
+        self.chamadas = 0
+        self.falhar = False
+
+    def __call__(self, *ids) -> pd.DataFrame:
+        if self.falhar:
+            raise ConnectionError('statsbomb fora do ar')
+        self.chamadas += 1
+        return pd.DataFrame({'versao': [self.chamadas]})
+
+
+@pytest.fixture
+def fonte():
+    return Fonte()
+
+
+def envelhecer(catalogo: Catalogo, segundos: float):
+    # Simula arquivos gravados há mais tempo e esquece a cópia em memória
+    for caminho in catalogo.diretorio.glob('*.pkl'):
+        instante = caminho.stat().st_mtime - segundos
+        os.utime(caminho, (instante, instante))
+    catalogo._memoria.clear()
+
+
+def test_consulta_usa_a_copia_guardada_dentro_do_intervalo(tmp_path, fonte):
+    catalogo = Catalogo(tmp_path, 100, carregar_competicoes=fonte)
+    assert catalogo.competicoes()['versao'][0] == 1
+    assert catalogo.competicoes()['versao'][0] == 1
+    # Outra instância (outro processo) lê o arquivo gravado
+    assert Catalogo(tmp_path, 100, carregar_competicoes=fonte).competicoes()['versao'][0] == 1
+    assert fonte.chamadas == 1
+
+
+def test_consulta_busca_de_novo_depois_do_intervalo(tmp_path, fonte):
+    catalogo = Catalogo(tmp_path, 100, carregar_partidas=fonte)
+    catalogo.partidas(11, 90)
+    envelhecer(catalogo, 150)
+    assert catalogo.partidas(11, 90)['versao'][0] == 2
+
+
+def test_copia_vencida_serve_quando_a_fonte_falha(tmp_path, fonte):
+    catalogo = Catalogo(tmp_path, 100, carregar_partidas=fonte)
+    catalogo.partidas(11, 90)
+    envelhecer(catalogo, 150)
+    fonte.falhar = True
+    assert catalogo.partidas(11, 90)['versao'][0] == 1
+    with pytest.raises(ConnectionError):
+        catalogo.partidas(11, 91)
+
+
+def test_atualizacao_em_segundo_plano_antecede_o_vencimento(tmp_path, fonte):
+    catalogo = Catalogo(tmp_path, 100, carregar_competicoes=fonte, carregar_partidas=fonte)
+    catalogo.competicoes()
+    catalogo.partidas(11, 90)
+    envelhecer(catalogo, 50)
+    assert catalogo.desatualizados() == []
+    envelhecer(catalogo, 30)
+    assert sorted(catalogo.desatualizados()) == [('competicoes',), ('partidas', 11, 90)]
+    catalogo.atualizar_desatualizados()
+    assert fonte.chamadas == 4 and catalogo.desatualizados() == []
+    assert catalogo._caminho(('competicoes',)).stat().st_mtime > time.time() - 5
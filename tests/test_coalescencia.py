@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.coalescencia import Coalescencia, CoalescenciaThreads
+
+
+def test_pedidos_simultaneos_compartilham_uma_execucao():
+    coalescencia = Coalescencia('teste_unica')
+    execucoes = []
+
+    async def gerar():
+        execucoes.append(1)
+        await asyncio.sleep(0.05)
+        return 'resposta'
+
+    async def principal():
+        return await asyncio.gather(*(coalescencia.executar('chave', gerar) for _ in range(5)))
+
+    resultados = asyncio.run(principal())
+    assert len(execucoes) == 1
+    assert [resultado for resultado, _ in resultados] == ['resposta'] * 5
+    assert sorted(compartilhada for _, compartilhada in resultados) == [False] + [True] * 4
+    assert coalescencia.estatisticas() == {'executadas': 1, 'coalescidas': 4, 'em_andamento': 0}
+
+
+def test_chaves_diferentes_executam_separadamente():
+    coalescencia = Coalescencia('teste_chaves')
+
+    async def gerar(valor):
+        await asyncio.sleep(0.01)
+        return valor
+
+    async def principal():
+        return await asyncio.gather(coalescencia.executar('a', lambda: gerar(1)),
+                                    coalescencia.executar('b', lambda: gerar(2)))
+
+    assert asyncio.run(principal()) == [(1, False), (2, False)]
+    assert coalescencia.executadas == 2
+
+
+def test_excecao_chega_a_todos_e_nao_fica_guardada():
+    coalescencia = Coalescencia('teste_excecao')
+
+    async def falhar():
+        await asyncio.sleep(0.01)
+        raise ValueError('falhou')
+
+    async def principal():
+        resultados = await asyncio.gather(*(coalescencia.executar('chave', falhar) for _ in range(3)),
+                                          return_exceptions=True)
+        # Depois da falha, um novo pedido executa de novo
+        segundo = await coalescencia.executar('chave', lambda: asyncio.sleep(0, result='ok'))
+        return resultados, segundo
+
+    resultados, segundo = asyncio.run(principal())
+    assert all(isinstance(resultado, ValueError) for resultado in resultados)
+    assert segundo == ('ok', False)
+
+
+def test_cancelar_um_pedido_nao_cancela_os_demais():
+    coalescencia = Coalescencia('teste_cancelamento')
+
+    async def gerar():
+        await asyncio.sleep(0.05)
+        return 'resposta'
+
+    async def principal():
+        primeiro = asyncio.ensure_future(coalescencia.executar('chave', gerar))
+        segundo = asyncio.ensure_future(coalescencia.executar('chave', gerar))
+        await asyncio.sleep(0.01)
+        primeiro.cancel()
+        return await segundo
+
+    assert asyncio.run(principal()) == ('resposta', True)
+
+
+def test_threads_compartilham_uma_execucao():
+    coalescencia = CoalescenciaThreads('teste_threads')
+    execucoes = []
+    barreira = threading.Barrier(4)
+
+    def carregar():
+        execucoes.append(1)
+        time.sleep(0.1)
+        return 'partida'
+
+    def pedir():
+        barreira.wait()
+        return coalescencia.executar(42, carregar)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        resultados = list(executor.map(lambda _: pedir(), range(4)))
+    assert resultados == ['partida'] * 4
+    assert len(execucoes) == 1
+    assert coalescencia.estatisticas() == {'executadas': 1, 'coalescidas': 3, 'em_andamento': 0}
+
+
+def test_threads_recebem_a_mesma_excecao():
+    coalescencia = CoalescenciaThreads('teste_threads_excecao')
+    barreira = threading.Barrier(3)
+
+    def carregar():
+        time.sleep(0.1)
+        raise ConnectionError('statsbomb fora do ar')
+
+    def pedir():
+        barreira.wait()
+        with pytest.raises(ConnectionError):
+            coalescencia.executar(42, carregar)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda _: pedir(), range(3)))
+    assert coalescencia.executadas == 1
+    assert coalescencia.estatisticas()['em_andamento'] == 0
@@ -0,0 +1,41 @@
+import pytest
+from benchmarks.fixtures import gerar_partida
+from src.compactacao import compactar_eventos, estimar_tokens
+from src.normalizacao import normalizar_eventos
+
+
+@pytest.fixture(scope='module')
+def partida():
+    return normalizar_eventos(gerar_partida(1, numero_eventos=4000, colunas_extras=0))[0]
+
+
+def test_texto_cabe_no_orcamento(partida):
+    for orcamento in (1500, 6000):
+        texto, relatorio = compactar_eventos(partida, orcamento)
+        assert relatorio['tokens_depois'] == estimar_tokens(texto) <= orcamento
+        assert relatorio['tokens_antes'] > relatorio['tokens_depois'] * 10
+
+
+def test_chutes_e_cartoes_sempre_completos(partida):
+    texto, relatorio = compactar_eventos(partida, 1500)
+    assert relatorio['linhas_omitidas'] > 0
+    secao_chutes = texto.split('\n\n')[0].splitlines()
+    assert secao_chutes[0] == 'Chutes e gols:'
+    assert len(secao_chutes) - 2 == (partida['type'] == 'Shot').sum()
+    assert texto.count('Yellow Card') == partida['foul_committed_card'].notna().sum()
+
+
+def test_passes_agregados_por_jogador(partida):
+    texto, relatorio = compactar_eventos(partida, 100_000)
+    assert relatorio['linhas_omitidas'] == 0
+    passes = partida[(partida['type'] == 'Pass') & (partida['player'] == 'Time Casa Jogador03')]
+    completos = passes['pass_outcome'].isna()
+    for periodo in (1, 2):
+        do_periodo = completos[passes['period'] == periodo]
+        assert f'{periodo},Time Casa,Time Casa Jogador03,{len(do_periodo)},{do_periodo.sum()}' in texto
+
+
+def test_orcamento_pequeno_omite_passes_antes_das_faltas(partida):
+    texto, _ = compactar_eventos(partida, 800)
+    assert '(+' in texto.split('Passes por jogador:')[1]
+    assert 'Chutes e gols:' in texto and 'Cartões:' in texto
@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.fixtures import EventosLocais, gerar_partida
+from src.estatisticas import tabela_jogadores, buscar_jogadores, estatisticas_do_jogador
+from src.main import app
+from src.normalizacao import normalizar_eventos
+from src.repositorio import repositorio
+
+
+@pytest.fixture(scope='module')
+def original():
+    return gerar_partida(1, numero_eventos=1500, colunas_extras=0)
+
+
+@pytest.fixture(scope='module')
+def tabela(original):
+    return tabela_jogadores(normalizar_eventos(original)[0])
+
+
+def esperado(original, jogador: str) -> dict:
+    # Mesma conta feita evento a evento sobre a tabela original
+    eventos = original[original['player'] == jogador]
+    ultimo = int(eventos['minute'].max())
+    substituicoes = original[original['type'] == 'Substitution']
+    saiu = substituicoes[substituicoes['player'] == jogador]['minute']
+    entrou = substituicoes[substituicoes['substitution_replacement'] == jogador]['minute']
+    if len(entrou):
+        minutos = ultimo - int(entrou.iloc[0])
+    else:
+        minutos = int(saiu.iloc[0]) if len(saiu) else ultimo
+    return {'jogador': jogador,
+            'passes': int((eventos['type'] == 'Pass').sum()),
+            'finalizacoes': int((eventos['type'] == 'Shot').sum()),
+            'desarmes': int((eventos['type'] == 'Dispossessed').sum()),
+            'minutos_jogados': minutos}
+
+
+def test_tabela_igual_a_conta_evento_a_evento(original, tabela):
+    jogadores = sorted(original['player'].dropna().unique())
+    assert sorted(tabela.index) == jogadores
+    for jogador in jogadores:
+        assert estatisticas_do_jogador(tabela, jogador) == esperado(original, jogador)
+    assert tabela.loc['Time Fora Jogador03', 'time'] == 'Time Fora'
+
+
+def test_minutos_de_titulares_substituidos_e_reservas(tabela):
+    assert tabela.loc['Time Casa Jogador08', 'minutos_jogados'] == 60
+    assert 0 < tabela.loc['Time Casa Jogador11', 'minutos_jogados'] <= 35
+
+
+def test_tabela_da_partida_normalizada_igual_a_da_original(original, tabela):
+    # Os tipos mudam (categóricas, inteiros menores), os valores não
+    assert tabela_jogadores(original).astype(object).to_dict() == tabela.astype(object).to_dict()
+
+
+def test_busca_por_parte_do_nome(tabela):
+    assert buscar_jogadores(tabela, 'Casa Jogador05') == ['Time Casa Jogador05']
+    assert len(buscar_jogadores(tabela, 'Jogador05')) == 2
+    assert buscar_jogadores(tabela, 'Ninguém') == []
+
+
+def test_rotas_de_perfil(original):
+    carregador = repositorio.carregador
+    repositorio.carregador = EventosLocais()
+    try:
+        with TestClient(app) as cliente:
+            perfil = cliente.post('/player_profile', json={'id_partida': 1, 'nome_jogador': 'Casa Jogador05'})
+            assert perfil.json()['estatisticas'] == esperado(gerar_partida(1), 'Time Casa Jogador05')
+            perfis = cliente.post('/player_profiles', json={'id_partida': 1, 'nomes_jogadores': ['Casa Jogador05', 'Fora Jogador01']})
+            assert [estatisticas['jogador'] for estatisticas in perfis.json()['estatisticas']] == \
+                ['Time Casa Jogador05', 'Time Fora Jogador01']
+            assert cliente.post('/player_profile', json={'id_partida': 1, 'nome_jogador': 'Jogador05'}).status_code == 400
+    finally:
+        repositorio.carregador = carregador
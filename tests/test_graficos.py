@@ -0,0 +1,72 @@
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.fixtures import EventosLocais
+from src.main import app
+from src.execucao import dependencias
+from src.repositorio import repositorio
+
+URL = '/partidas/1/graficos/passes'
+
+
+@pytest.fixture(scope='module')
+def cliente():
+    carregador = repositorio.carregador
+    repositorio.carregador = EventosLocais()
+    with TestClient(app) as cliente:
+        yield cliente
+    repositorio.carregador = carregador
+
+
+def renderizacoes() -> int:
+    return dependencias['graficos'].concluidas
+
+
+def test_grafico_com_etag(cliente):
+    resposta = cliente.get(URL, params={'jogadores': 'Time Casa Jogador03', 'formato': 'svg'})
+    assert resposta.status_code == 200
+    assert resposta.headers['content-type'] == 'image/svg+xml'
+    assert resposta.headers['etag'].startswith('"') and resposta.content.lstrip().startswith(b'<?xml')
+
+
+def test_etag_valida_responde_304_sem_renderizar(cliente):
+    resposta = cliente.get(URL, params={'jogadores': 'Time Casa Jogador04'})
+    antes = renderizacoes()
+    for if_none_match in (resposta.headers['etag'], f'W/{resposta.headers["etag"]}', f'"outra", {resposta.headers["etag"]}', '*'):
+        revalidacao = cliente.get(URL, params={'jogadores': 'Time Casa Jogador04'}, headers={'If-None-Match': if_none_match})
+        assert revalidacao.status_code == 304 and revalidacao.content == b''
+        assert revalidacao.headers['etag'] == resposta.headers['etag']
+    assert renderizacoes() == antes
+
+
+def test_etag_diferente_devolve_a_imagem_guardada(cliente):
+    primeira = cliente.get(URL, params={'jogadores': 'Time Casa Jogador05'})
+    antes = renderizacoes()
+    segunda = cliente.get(URL, params={'jogadores': 'Time Casa Jogador05'}, headers={'If-None-Match': '"antiga"'})
+    assert segunda.status_code == 200 and segunda.content == primeira.content
+    assert renderizacoes() == antes
+
+
+def test_grafias_do_mesmo_jogador_dividem_imagem_e_etag(cliente):
+    completo = cliente.get(URL, params={'jogadores': 'Time Casa Jogador06'})
+    antes = renderizacoes()
+    parcial = cliente.get(URL, params={'jogadores': 'Casa Jogador06'})
+    assert parcial.headers['etag'] == completo.headers['etag']
+    assert renderizacoes() == antes
+    revalidacao = cliente.get(URL, params={'jogadores': 'Jogador06'}, headers={'If-None-Match': completo.headers['etag']})
+    # "Jogador06" também existe no outro time
+    assert revalidacao.status_code == 400
+
+
+def test_etag_muda_com_formato_e_jogadores(cliente):
+    png = cliente.get(URL, params={'jogadores': 'Time Casa Jogador07'})
+    svg = cliente.get(URL, params={'jogadores': 'Time Casa Jogador07', 'formato': 'svg'})
+    dois = cliente.get(URL, params={'jogadores': ['Time Casa Jogador07', 'Time Fora Jogador07']})
+    assert len({png.headers['etag'], svg.headers['etag'], dois.headers['etag']}) == 3
+
+
+@pytest.mark.parametrize('parametros', [
+    {'jogadores': 'Ninguém'},
+    {'jogadores': 'Time Casa Jogador03', 'formato': 'gif'},
+])
+def test_pedidos_invalidos(cliente, parametros):
+    assert cliente.get(URL, params=parametros).status_code == 400
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.fixtures import gerar_partida
+from src.consultas import filtrar_eventos
+from src.indices import IndiceEventos
+from src.limpeza import filtrar_categorias
+from src.normalizacao import normalizar_eventos
+
+
+@pytest.fixture(scope='module')
+def partida():
+    return normalizar_eventos(gerar_partida(1, numero_eventos=2000, colunas_extras=0))[0]
+
+
+@pytest.fixture(scope='module')
+def indice(partida):
+    return IndiceEventos(partida)
+
+
+def mascara(partida, tipos=None, jogador=None, time=None, minuto_inicio=None, minuto_fim=None, apenas_gols=False):
+    # Os mesmos filtros feitos com máscaras sobre a tabela inteira
+    selecao = pd.Series(True, index=partida.index)
+    if tipos:
+        selecao &= partida['type'].isin(tipos)
+    if jogador:
+        selecao &= partida['player'].astype(object).str.lower().str.contains(jogador.lower(), regex=False).fillna(False).astype(bool)
+    if time:
+        selecao &= partida['team'].astype(object).str.lower().str.contains(time.lower(), regex=False).fillna(False).astype(bool)
+    if minuto_inicio is not None:
+        selecao &= partida['minute'] >= minuto_inicio
+    if minuto_fim is not None:
+        selecao &= partida['minute'] <= minuto_fim
+    if apenas_gols:
+        selecao &= (partida['shot_outcome'] == 'Goal').fillna(False).astype(bool)
+    return np.flatnonzero(selecao.to_numpy())
+
+
+@pytest.mark.parametrize('filtros', [
+    {},
+    {'tipos': ['Pass']},
+    {'tipos': ['Shot', 'Foul Committed'], 'time': 'fora'},
+    {'jogador': 'casa jogador03', 'minuto_inicio': 10, 'minuto_fim': 52},
+    {'tipos': ['Pass'], 'minuto_inicio': 44},
+    {'minuto_fim': 7},
+    {'apenas_gols': True, 'time': 'Time Casa'},
+    {'tipos': ['Inexistente']},
+    {'jogador': 'Ninguém'},
+])
+def test_posicoes_iguais_as_mascaras(partida, indice, filtros):
+    np.testing.assert_array_equal(indice.posicoes(**filtros), mascara(partida, **filtros))
+
+
+def test_filtrar_eventos_na_ordem_original(partida, indice):
+    eventos = filtrar_eventos(partida, indice, tipos=['Shot', 'Pass'], jogador='Jogador05')
+    assert eventos.index.is_monotonic_increasing
+    assert set(eventos['type']) == {'Shot', 'Pass'}
+
+
+def test_contagem_de_tipos(partida, indice):
+    contagem = indice.contagem_tipos()
+    assert contagem == partida['type'].value_counts().loc[lambda valores: valores > 0].to_dict()
+    assert list(contagem.values()) == sorted(contagem.values(), reverse=True)
+
+
+def test_partida_sem_finalizacoes():
+    partida = pd.DataFrame({'type': ['Pass', 'Pass'], 'player': ['A', None], 'team': ['X', 'X'], 'minute': [1, 2]})
+    indice = IndiceEventos(partida)
+    assert len(indice.gols) == 0 and indice.jogador('a').tolist() == [0]
+
+
+def test_filtro_do_aplicativo(partida, indice):
+    eventos = filtrar_categorias(partida, indice, ['Gols', 'Faltas'])
+    esperado = partida[(partida['shot_outcome'] == 'Goal').fillna(False).astype(bool) | (partida['type'] == 'Foul Committed')]
+    assert len(eventos) == len(esperado)
+    assert eventos['minute'].is_monotonic_increasing
+    assert filtrar_categorias(partida, indice, []).empty
@@ -0,0 +1,56 @@
+import json
+import numpy as np
+import pandas as pd
+from benchmarks.fixtures import gerar_partida
+from src.limpeza import coordenadas, decimais_curtos, registros_esparsos, registros_json, remover_colunas_vazias
+
+
+def eventos_de_exemplo() -> pd.DataFrame:
+    return pd.DataFrame({
+        'type': ['Pass', 'Shot', None],
+        'minute': [1, 2, 3],
+        'location_x': np.array([61.2, np.nan, 10.5], dtype=np.float32),
+        'shot_outcome': [np.nan, 'Goal', np.nan],
+        'vazia': [np.nan, np.nan, np.nan],
+    })
+
+
+def test_registros_esparsos_so_com_celulas_preenchidas():
+    assert registros_esparsos(eventos_de_exemplo()) == [
+        {'type': 'Pass', 'minute': 1, 'location_x': 61.2},
+        {'type': 'Shot', 'minute': 2, 'shot_outcome': 'Goal'},
+        {'minute': 3, 'location_x': 10.5},
+    ]
+
+
+def test_registros_esparsos_iguais_ao_corte_linha_a_linha():
+    partida = gerar_partida(1, numero_eventos=300, colunas_extras=5)
+    esperado = [{coluna: valor for coluna, valor in linha.items() if not isinstance(valor, float) or not np.isnan(valor)}
+                for linha in partida.to_dict(orient='records')]
+    assert registros_esparsos(partida) == esperado
+
+
+def test_registros_json_com_nulos_e_decimais_curtos():
+    registros = json.loads(registros_json(eventos_de_exemplo()))
+    assert registros[0]['location_x'] == 61.2
+    assert registros[1]['location_x'] is None and registros[0]['vazia'] is None
+
+
+def test_decimais_curtos_so_muda_float32():
+    assert decimais_curtos(np.array([61.2], dtype=np.float32)).tolist() == [61.2]
+    valores = np.array([1.0, 2.5])
+    assert decimais_curtos(valores) is valores
+
+
+def test_remover_colunas_vazias():
+    assert 'vazia' not in remover_colunas_vazias(eventos_de_exemplo()).columns
+
+
+def test_coordenadas_com_nulos_e_dimensoes_diferentes():
+    localizacoes = pd.Series([[1.0, 2.0], None, [3.0, 4.0, 5.0]])
+    matriz = coordenadas(localizacoes, dimensoes=3)
+    assert matriz.dtype == np.float32
+    np.testing.assert_array_equal(matriz[0], [1.0, 2.0, np.nan])
+    assert np.isnan(matriz[1]).all()
+    np.testing.assert_array_equal(matriz[2], [3.0, 4.0, 5.0])
+    assert coordenadas(pd.Series([None, None])).shape == (2, 2)
@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.fixtures import EventosLocais
+from src.main import app
+from src.metricas import Contador, Histograma, medidor, medir, duracao_etapas, erros
+from src.repositorio import repositorio
+
+
+@pytest.fixture(scope='module')
+def cliente():
+    carregador = repositorio.carregador
+    repositorio.carregador = EventosLocais()
+    with TestClient(app) as cliente:
+        yield cliente
+    repositorio.carregador = carregador
+
+
+def valor(texto: str, serie: str) -> float:
+    # Valor de uma série no formato de exposição do Prometheus, 0 se ela ainda não existir
+    for linha in texto.splitlines():
+        if linha.startswith(serie + ' '):
+            return float(linha.rsplit(' ', 1)[1])
+    return 0
+
+
+def test_contador_soma_por_rotulos_e_escapa_valores():
+    contador = Contador('teste_total', 'Teste.', ('rota', 'status'))
+    contador.incrementar('/a', 200)
+    contador.incrementar('/a', 200, quantidade=2)
+    contador.incrementar('/b"c', 500)
+    linhas = contador.exportar()
+    assert linhas[:2] == ['# HELP teste_total Teste.', '# TYPE teste_total counter']
+    assert 'teste_total{rota="/a",status="200"} 3' in linhas
+    assert 'teste_total{rota="/b\\"c",status="500"} 1' in linhas
+
+
+def test_histograma_com_baldes_cumulativos():
+    histograma = Histograma('teste_segundos', 'Teste.', ('etapa',), baldes=(0.1, 1.0))
+    for duracao in (0.05, 0.5, 2.0):
+        histograma.observar(duracao, 'leitura')
+    linhas = histograma.exportar()
+    assert 'teste_segundos_bucket{etapa="leitura",le="0.1"} 1' in linhas
+    assert 'teste_segundos_bucket{etapa="leitura",le="1.0"} 2' in linhas
+    assert 'teste_segundos_bucket{etapa="leitura",le="+Inf"} 3' in linhas
+    assert 'teste_segundos_sum{etapa="leitura"} 2.55' in linhas
+    assert 'teste_segundos_count{etapa="leitura"} 3' in linhas
+
+
+def test_medidor_ignora_valores_nao_numericos():
+    linhas = medidor('teste_estado', 'Teste.', {'itens': 3, 'ativo': True, 'nome': 'x', ('a', 'b'): 1.5}, ('medida',))
+    assert linhas[2:] == ['teste_estado{medida="itens"} 3', 'teste_estado{medida="a"} 1.5']
+
+
+def test_medir_registra_duracao_e_causa_do_erro():
+    with medir('teste_etapa', 'ok'):
+        pass
+    with pytest.raises(KeyError):
+        with medir('teste_etapa', 'falha'):
+            raise KeyError('x')
+    etapas = duracao_etapas.exportar()
+    assert 'api_etapa_segundos_count{etapa="teste_etapa",operacao="ok"} 1' in etapas
+    assert 'api_etapa_segundos_count{etapa="teste_etapa",operacao="falha"} 1' in etapas
+    assert 'api_erros_total{etapa="teste_etapa",causa="KeyError"} 1' in erros.exportar()
+
+
+def test_rota_metrics_expoe_requisicoes_e_caches(cliente):
+    serie = 'api_requisicao_segundos_count{metodo="GET",rota="/partidas/{id_partida}",status="200"}'
+    antes = valor(cliente.get('/metrics').text, serie)
+    assert cliente.get('/partidas/1').status_code == 200
+    resposta = cliente.get('/metrics')
+    assert resposta.status_code == 200 and resposta.headers['content-type'].startswith('text/plain')
+    assert valor(resposta.text, serie) == antes + 1
+    assert '# TYPE api_cache_eventos gauge' in resposta.text
+    assert valor(resposta.text, 'api_cache_eventos{medida="partidas_em_memoria"}') >= 1
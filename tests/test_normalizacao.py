@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.fixtures import gerar_partida
+from src.limpeza import grupos_localizacao, juntar_localizacoes
+from src.normalizacao import normalizar_eventos
+
+
+@pytest.fixture(scope='module')
+def original():
+    return gerar_partida(1, numero_eventos=1000, colunas_extras=10)
+
+
+@pytest.fixture(scope='module')
+def normalizada(original):
+    return normalizar_eventos(original)
+
+
+def test_tipos_compactos(normalizada):
+    partida, relatorio = normalizada
+    assert isinstance(partida['type'].dtype, pd.CategoricalDtype)
+    assert isinstance(partida['player'].dtype, pd.CategoricalDtype)
+    assert partida['minute'].dtype == np.int16
+    assert partida['duration'].dtype == np.float32
+    # Identificadores únicos não viram categóricas
+    assert not isinstance(partida['id'].dtype, pd.CategoricalDtype)
+    assert relatorio['bytes_depois'] < relatorio['bytes_antes'] and relatorio['reducao'] > 1
+    assert relatorio['localizacoes_separadas'] == 3
+
+
+def test_localizacoes_separadas_em_colunas(original, normalizada):
+    partida, _ = normalizada
+    assert grupos_localizacao(partida.columns) == {
+        'location': ['location_x', 'location_y'],
+        'pass_end_location': ['pass_end_location_x', 'pass_end_location_y'],
+        'shot_end_location': ['shot_end_location_x', 'shot_end_location_y', 'shot_end_location_z'],
+    }
+    passes = original['type'] == 'Pass'
+    esperado = np.array(original.loc[passes, 'pass_end_location'].tolist())
+    np.testing.assert_allclose(partida.loc[passes, ['pass_end_location_x', 'pass_end_location_y']], esperado, rtol=1e-6)
+    assert partida.loc[~passes, 'pass_end_location_x'].isna().all()
+
+
+def test_colunas_vazias_removidas_e_valores_preservados(original, normalizada):
+    partida, _ = normalizada
+    com_vazia = original.assign(vazia=np.nan)
+    assert 'vazia' not in normalizar_eventos(com_vazia)[0].columns
+    assert partida['player'].astype(object).fillna('-').tolist() == original['player'].fillna('-').tolist()
+    assert (partida['minute'].to_numpy() == original['minute'].to_numpy()).all()
+
+
+def test_marcadores_viram_booleanas():
+    partida, _ = normalizar_eventos(pd.DataFrame({'minute': [1, 2, 3], 'under_pressure': [True, np.nan, True]}))
+    assert partida['under_pressure'].dtype == 'boolean'
+    assert partida['under_pressure'].isna().tolist() == [False, True, False]
+
+
+def test_normalizar_de_novo_nao_muda_nada(normalizada):
+    partida, relatorio = normalizada
+    de_novo, relatorio_de_novo = normalizar_eventos(partida)
+    pd.testing.assert_frame_equal(de_novo, partida)
+    assert relatorio_de_novo['bytes_antes'] == relatorio_de_novo['bytes_depois'] == relatorio['bytes_depois']
+
+
+def test_juntar_localizacoes_volta_ao_formato_do_statsbomb(original, normalizada):
+    partida, _ = normalizada
+    juntada = juntar_localizacoes(partida)
+    assert list(juntada.columns).index('location') == list(partida.columns).index('location_x')
+    for coluna in ('location', 'pass_end_location', 'shot_end_location'):
+        for valor, esperado in zip(juntada[coluna], original[coluna]):
+            if isinstance(esperado, list):
+                assert valor == pytest.approx(esperado, abs=1e-4)
+            else:
+                assert valor is None
+    # Só as bases pedidas voltam a ser listas
+    parcial = juntar_localizacoes(partida, bases={'location'})
+    assert 'location' in parcial.columns and 'pass_end_location_x' in parcial.columns
@@ -0,0 +1,92 @@
+import io
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.fixtures import EventosLocais, gerar_partida
+from src.limpeza import blocos_json, blocos_ndjson, registros_json
+from src.main import app
+from src.normalizacao import normalizar_eventos
+from src.repositorio import repositorio
+
+URL = '/partidas/1'
+
+
+@pytest.fixture(scope='module')
+def cliente():
+    carregador = repositorio.carregador
+    repositorio.carregador = EventosLocais()
+    with TestClient(app) as cliente:
+        yield cliente
+    repositorio.carregador = carregador
+
+
+@pytest.fixture(scope='module')
+def original() -> pd.DataFrame:
+    return gerar_partida(1)
+
+
+def test_blocos_json_e_ndjson_iguais_a_serializacao_inteira():
+    partida, _ = normalizar_eventos(gerar_partida(2, numero_eventos=230, colunas_extras=3))
+    completo = json.loads(registros_json(partida))
+    assert json.loads(''.join(blocos_json(partida, tamanho_bloco=50))) == completo
+    linhas = ''.join(blocos_ndjson(partida, tamanho_bloco=50)).splitlines()
+    assert [json.loads(linha) for linha in linhas] == completo
+
+
+def test_json_e_ndjson_com_o_mesmo_conteudo(cliente, original):
+    json_ = cliente.get(URL)
+    ndjson = cliente.get(URL, params={'formato': 'ndjson'})
+    assert json_.headers['content-type'] == 'application/json'
+    assert ndjson.headers['content-type'] == 'application/x-ndjson'
+    registros = json_.json()
+    assert len(registros) == len(original)
+    assert [json.loads(linha) for linha in ndjson.text.splitlines()] == registros
+
+
+def test_localizacoes_saem_como_listas(cliente, original):
+    registros = cliente.get(URL).json()
+    for registro, esperado in zip(registros, original.to_dict(orient='records')):
+        for coluna in ('location', 'pass_end_location', 'shot_end_location'):
+            if isinstance(esperado.get(coluna), list):
+                assert registro[coluna] == pytest.approx(esperado[coluna], abs=1e-4)
+            else:
+                assert registro.get(coluna) is None
+    assert 'location_x' not in registros[0]
+
+
+def test_localizacoes_em_colunas(cliente):
+    registro = cliente.get(URL, params={'localizacao': 'colunas'}).json()[-1]
+    assert 'location' not in registro and {'location_x', 'location_y'} <= set(registro)
+
+
+def test_filtros_de_tipos_e_colunas(cliente, original):
+    registros = cliente.get(URL, params={'tipos': 'Shot', 'colunas': ['minute', 'shot_outcome', 'location']}).json()
+    assert len(registros) == (original['type'] == 'Shot').sum()
+    assert set(registros[0]) == {'minute', 'shot_outcome', 'location'}
+    # Coordenadas pedidas pelo nome continuam separadas
+    registros = cliente.get(URL, params={'tipos': 'Shot', 'colunas': ['location_x']}).json()
+    assert set(registros[0]) == {'location_x'}
+
+
+def test_parquet(cliente, original):
+    for localizacao in ('listas', 'colunas'):
+        resposta = cliente.get(URL, params={'formato': 'parquet', 'localizacao': localizacao})
+        assert resposta.headers['content-type'] == 'application/vnd.apache.parquet'
+        tabela = pd.read_parquet(io.BytesIO(resposta.content))
+        assert len(tabela) == len(original)
+        assert ('location' in tabela.columns) == (localizacao == 'listas')
+    filtrada = pd.read_parquet(io.BytesIO(cliente.get(URL, params={'formato': 'parquet', 'tipos': 'Pass',
+                                                                   'colunas': ['player', 'location']}).content))
+    assert list(filtrada.columns) == ['player', 'location'] and len(filtrada) == (original['type'] == 'Pass').sum()
+    assert np.allclose(list(filtrada['location'].iloc[0]), original.loc[original['type'] == 'Pass', 'location'].iloc[0], atol=1e-4)
+
+
+@pytest.mark.parametrize('parametros', [
+    {'formato': 'xml'},
+    {'localizacao': 'objetos'},
+    {'colunas': 'inexistente'},
+])
+def test_parametros_invalidos(cliente, parametros):
+    assert cliente.get(URL, params=parametros).status_code == 400
@@ -0,0 +1,46 @@
+import pytest
+from benchmarks.fixtures import gerar_partida
+from src.planejador import agregados_partida, responder_rapido
+
+
+@pytest.fixture(scope='module')
+def agregados():
+    return agregados_partida(gerar_partida(1, numero_eventos=1500, colunas_extras=0))
+
+
+def test_contagem_de_passes_do_jogador(agregados):
+    jogador = 'Time Casa Jogador03'
+    esperado = int(agregados['por_jogador'].get((jogador, 'Pass'), 0))
+    assert responder_rapido(agregados, f'Quantos passes o {jogador} fez?') == f'{jogador} teve {esperado} passes.'
+
+
+def test_placar(agregados):
+    resposta = responder_rapido(agregados, 'Qual foi o placar final?')
+    assert resposta.startswith('Time Casa ') and ' x ' in resposta
+
+
+def test_quem_fez_mais_passes(agregados):
+    assert responder_rapido(agregados, 'Quem fez mais passes?').endswith(' passes.')
+
+
+def test_tipo_pela_posicao_na_pergunta(agregados):
+    # Os passes são citados antes dos gols, embora venham depois na lista de tipos
+    resposta = responder_rapido(agregados, 'Quantos passes o Time Casa deu? E gols?')
+    assert resposta.endswith(' passes.')
+
+
+@pytest.mark.parametrize('pergunta', [
+    'Quantos passes o goleiro do Time Casa fez?',
+    'Quem venceu mais duelos?',
+    'Quantas faltas o Time Casa Jogador03 sofreu?',
+    'Quantos passes o Time Casa Jogador03 recebeu?',
+    'Quantos passes errados o Time Fora deu?',
+    'Quantos gols o Time Casa fez no segundo tempo?',
+    'Quantas finalizações no primeiro tempo?',
+    'Quantos gols de escanteio a partida teve?',
+    'Quantas finalizações no alvo o Time Fora teve?',
+    'Quem sofreu mais faltas?',
+    'Quantos cruzamentos o Time Casa fez?',
+])
+def test_recortes_nao_suportados_vao_para_o_agente(agregados, pergunta):
+    assert responder_rapido(agregados, pergunta) is None
@@ -0,0 +1,146 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pytest
+from benchmarks.fixtures import gerar_partida
+from src.repositorio import RepositorioEventos, assinatura
+
+
+class Carregador:
+    # Substituto do sb.events que conta os downloads
+    def __init__(self, latencia_segundos: float = 0.0):
+        self.latencia_segundos = latencia_segundos
+        self.chamadas = []
+        self._trava = threading.Lock()
+
+    def __call__(self, id_partida: int) -> pd.DataFrame:
+        with self._trava:
+            self.chamadas.append(id_partida)
+        time.sleep(self.latencia_segundos)
+        return gerar_partida(id_partida, numero_eventos=200, colunas_extras=0)
+
+
+def contar_eventos(partida: pd.DataFrame, fator: int = 1) -> int:
+    return len(partida) * fator
+
+
+def contar_eventos_dobrados(partida: pd.DataFrame, fator: int = 2) -> int:
+    return len(partida) * fator
+
+
+@pytest.fixture
+def carregador():
+    return Carregador()
+
+
+@pytest.fixture
+def novo_repositorio(tmp_path, carregador):
+    def criar(limite_bytes: int = 10**9, carregador=carregador) -> RepositorioEventos:
+        return RepositorioEventos(tmp_path / 'eventos', limite_bytes=limite_bytes, carregador=carregador)
+    return criar
+
+
+def tamanho(partida: pd.DataFrame) -> int:
+    return int(partida.memory_usage(deep=True).sum())
+
+
+def test_segunda_consulta_vem_da_memoria(novo_repositorio, carregador):
+    repositorio = novo_repositorio()
+    partida = repositorio.obter(1)
+    assert repositorio.obter(1) is partida
+    assert carregador.chamadas == [1]
+    estatisticas = repositorio.estatisticas()
+    assert (estatisticas['faltas'], estatisticas['acertos_memoria'], estatisticas['bytes_memoria']) == (1, 1, tamanho(partida))
+
+
+def test_lru_remove_a_menos_usada_pelo_tamanho(novo_repositorio):
+    referencia = novo_repositorio().obter(1)
+    # Cabem duas partidas (as sintéticas têm tamanhos parecidos), não três
+    repositorio = novo_repositorio(limite_bytes=int(tamanho(referencia) * 2.5))
+    repositorio.obter(1)
+    repositorio.obter(2)
+    repositorio.obter(1)
+    repositorio.obter(3)
+    assert list(repositorio._memoria) == [1, 3]
+    estatisticas = repositorio.estatisticas()
+    assert estatisticas['remocoes'] == 1 and estatisticas['bytes_memoria'] <= estatisticas['limite_bytes']
+
+
+def test_partida_maior_que_o_limite_fica_sozinha(novo_repositorio):
+    repositorio = novo_repositorio(limite_bytes=1)
+    repositorio.obter(1)
+    repositorio.obter(2)
+    assert list(repositorio._memoria) == [2]
+
+
+def test_disco_sobrevive_a_um_repositorio_novo(novo_repositorio, carregador):
+    original = novo_repositorio().obter(1)
+    repositorio = novo_repositorio()
+    pd.testing.assert_frame_equal(repositorio.obter(1), original)
+    assert carregador.chamadas == [1]
+    assert repositorio.estatisticas()['acertos_disco'] == 1
+
+
+def test_arquivo_antigo_e_normalizado_na_leitura(novo_repositorio, carregador, tmp_path):
+    # Partidas gravadas antes da normalização guardam as localizações como listas
+    (tmp_path / 'eventos').mkdir()
+    gerar_partida(1, numero_eventos=200, colunas_extras=0).to_pickle(tmp_path / 'eventos' / '1.pkl')
+    partida = novo_repositorio().obter(1)
+    assert 'location' not in partida.columns and {'location_x', 'location_y'} <= set(partida.columns)
+    assert carregador.chamadas == []
+
+
+def test_threads_e_processos_baixam_uma_vez(novo_repositorio):
+    # Dois repositórios na mesma pasta fazem o papel de dois workers: só a trava de arquivo os coordena
+    carregador = Carregador(latencia_segundos=0.2)
+    repositorios = [novo_repositorio(carregador=carregador) for _ in range(2)]
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        partidas = list(executor.map(lambda indice: repositorios[indice % 2].obter(7), range(6)))
+    assert carregador.chamadas == [7]
+    assert all(len(partida) == len(partidas[0]) for partida in partidas)
+
+
+def test_aquecer_e_leitura_em_lote_nao_ocupam_a_memoria(novo_repositorio, carregador):
+    repositorio = novo_repositorio()
+    assert repositorio.aquecer(1) is True
+    assert repositorio.aquecer(1) is False
+    assert repositorio.em_cache(1) and not repositorio._memoria
+    assert len(repositorio.obter_sem_memoria(1)) > 0 and len(repositorio.obter_sem_memoria(2)) > 0
+    assert not repositorio._memoria and carregador.chamadas == [1, 2]
+
+
+def test_derivado_calculado_uma_vez_e_lido_do_disco(novo_repositorio, carregador, tmp_path):
+    repositorio = novo_repositorio()
+    quantidade = repositorio.derivado(1, 'contagem', contar_eventos)
+    assert repositorio.derivado(1, 'contagem', contar_eventos) == quantidade
+    assert (tmp_path / 'derivados' / '1' / f'contagem.{assinatura(contar_eventos)}.pkl').exists()
+
+    # Outro worker lê o derivado gravado sem carregar a partida
+    outro = novo_repositorio()
+    assert outro.derivado(1, 'contagem', contar_eventos) == quantidade
+    assert not outro._memoria and outro.estatisticas()['acertos_derivados_disco'] == 1
+    assert carregador.chamadas == [1]
+
+
+def test_derivado_nao_compartilhado_fica_so_na_memoria(novo_repositorio, tmp_path):
+    repositorio = novo_repositorio()
+    repositorio.derivado(1, 'indice', contar_eventos, compartilhar=False)
+    assert not (tmp_path / 'derivados').exists()
+
+
+def test_assinatura_nova_recalcula_e_apaga_a_versao_antiga(novo_repositorio, tmp_path):
+    assert assinatura(contar_eventos) != assinatura(contar_eventos_dobrados)
+    quantidade = novo_repositorio().derivado(1, 'contagem', contar_eventos)
+    # O mesmo derivado com outro valor padrão (como uma configuração alterada) não aproveita o arquivo antigo
+    assert novo_repositorio().derivado(1, 'contagem', contar_eventos_dobrados) == quantidade * 2
+    arquivos = [caminho.name for caminho in (tmp_path / 'derivados' / '1').glob('contagem.*.pkl')]
+    assert arquivos == [f'contagem.{assinatura(contar_eventos_dobrados)}.pkl']
+
+
+def test_derivados_saem_da_memoria_com_a_partida(novo_repositorio):
+    repositorio = novo_repositorio(limite_bytes=1)
+    repositorio.derivado(1, 'contagem', contar_eventos)
+    assert 1 in repositorio._derivados
+    repositorio.obter(2)
+    assert 1 not in repositorio._derivados
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import httpx
+import pytest
+from benchmarks.fixtures import EventosLocais, ModeloFalso
+from src.main import app
+from src.dependencias import obter_modelo
+from src.repositorio import repositorio
+
+
+class ModeloContado(ModeloFalso):
+    def __init__(self, *args, falhar: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chamadas = 0
+        self.falhar = falhar
+
+    async def generate_content_async(self, instrucoes: str, stream: bool = False):
+        self.chamadas += 1
+        if self.falhar:
+            raise RuntimeError('gemini fora do ar')
+        return await super().generate_content_async(instrucoes, stream)
+
+
+@pytest.fixture
+def modelo(monkeypatch):
+    monkeypatch.setattr(repositorio, 'carregador', EventosLocais())
+    modelo = ModeloContado(latencia_segundos=0.2)
+    app.dependency_overrides[obter_modelo] = lambda: modelo
+    yield modelo
+    app.dependency_overrides.pop(obter_modelo, None)
+
+
+def ler_eventos(corpo: str) -> tuple[str, list[str]]:
+    texto, tipos = '', []
+    for bloco in corpo.strip().split('\n\n'):
+        linhas = dict(linha.split(': ', 1) for linha in bloco.split('\n'))
+        tipos.append(linhas.get('event', 'data'))
+        texto += json.loads(linhas['data']).get('texto', '')
+    return texto, tipos
+
+
+async def pedir_varias(caminho: str, corpos: list[dict]) -> list[httpx.Response]:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://teste') as cliente:
+        return await asyncio.gather(*(cliente.post(caminho, json=corpo, headers={'Cache-Control': 'no-cache'})
+                                      for corpo in corpos))
+
+
+def test_streams_iguais_compartilham_uma_geracao(modelo):
+    respostas = asyncio.run(pedir_varias('/commentary/stream', [{'id_partida': 3, 'tom_narracao': 'Técnico'}] * 4))
+    assert modelo.chamadas == 1
+    assert sorted(resposta.headers['X-Cache'] for resposta in respostas) == ['COALESCED'] * 3 + ['MISS']
+    textos = {ler_eventos(resposta.text)[0] for resposta in respostas}
+    assert len(textos) == 1 and textos.pop().startswith('Narração da partida.')
+    assert all(ler_eventos(resposta.text)[1][-1] == 'fim' for resposta in respostas)
+
+
+def test_stream_e_rota_sem_stream_compartilham_a_geracao(modelo):
+    async def principal():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://teste') as cliente:
+            cabecalhos = {'Cache-Control': 'no-cache'}
+            return await asyncio.gather(cliente.post('/match_summary/stream', json={'id_partida': 4}, headers=cabecalhos),
+                                        cliente.post('/match_summary', json={'id_partida': 4}, headers=cabecalhos))
+
+    stream, resumo = asyncio.run(principal())
+    assert modelo.chamadas == 1
+    assert sorted([stream.headers['X-Cache'], resumo.headers['X-Cache']]) == ['COALESCED', 'MISS']
+    assert ler_eventos(stream.text)[0] == resumo.json()['resumo']
+
+
+def test_stream_guardado_no_cache(modelo):
+    asyncio.run(pedir_varias('/match_summary/stream', [{'id_partida': 5}]))
+
+    async def principal():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://teste') as cliente:
+            return await cliente.post('/match_summary/stream', json={'id_partida': 5})
+
+    resposta = asyncio.run(principal())
+    assert resposta.headers['X-Cache'] == 'HIT' and modelo.chamadas == 1
+
+
+def test_falha_chega_a_todos_como_evento_de_erro(modelo):
+    modelo.falhar = True
+    respostas = asyncio.run(pedir_varias('/match_summary/stream', [{'id_partida': 6}] * 2))
+    assert modelo.chamadas == 1
+    for resposta in respostas:
+        assert resposta.status_code == 200
+        assert ler_eventos(resposta.text)[1] == ['erro']
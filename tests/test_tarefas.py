@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.tarefas import FilaTarefas, FilaCheia
+
+
+@pytest.fixture
+def fila(tmp_path):
+    fila = FilaTarefas(tmp_path / 'tarefas.sqlite3', trabalhadores=1, limite_fila=10, retencao_segundos=3600)
+    yield fila
+    fila.fechar()
+
+
+async def aguardar_fim(fila: FilaTarefas, id_tarefa: str) -> dict:
+    async for tarefa in fila.acompanhar(id_tarefa):
+        pass
+    return tarefa
+
+
+def test_pedido_igual_recebe_a_tarefa_em_andamento(fila):
+    execucoes = []
+
+    async def gerar(avisar):
+        execucoes.append(1)
+        await asyncio.sleep(0.05)
+        return {'resposta': 'resumo'}
+
+    async def principal():
+        primeira, deduplicada = fila.enviar('match_summary', 'chave', gerar)
+        segunda, deduplicada_segunda = fila.enviar('match_summary', 'chave', gerar)
+        assert (deduplicada, deduplicada_segunda) == (False, True)
+        assert segunda['id_tarefa'] == primeira['id_tarefa']
+        final = await aguardar_fim(fila, primeira['id_tarefa'])
+        # Depois de concluída, a mesma chave gera uma tarefa nova
+        terceira, deduplicada_terceira = fila.enviar('match_summary', 'chave', gerar)
+        await aguardar_fim(fila, terceira['id_tarefa'])
+        await fila.parar()
+        return final, terceira, deduplicada_terceira
+
+    final, terceira, deduplicada_terceira = asyncio.run(principal())
+    assert final['situacao'] == 'concluida' and final['resultado'] == {'resposta': 'resumo'}
+    assert not deduplicada_terceira and terceira['id_tarefa'] != final['id_tarefa']
+    assert len(execucoes) == 2
+    assert (fila.enviadas, fila.deduplicadas, fila.concluidas) == (2, 1, 2)
+
+
+def test_tarefas_executadas_por_prioridade_e_chegada(fila):
+    ordem = []
+    liberar = None
+
+    def tarefa(nome):
+        async def gerar(avisar):
+            if nome == 'ocupando':
+                await liberar.wait()
+            ordem.append(nome)
+            return {'nome': nome}
+        return gerar
+
+    async def principal():
+        nonlocal liberar
+        liberar = asyncio.Event()
+        # O único trabalhador fica ocupado enquanto as outras entram na fila
+        ocupando, _ = fila.enviar('commentary', 'ocupando', tarefa('ocupando'))
+        await asyncio.sleep(0.01)
+        ids = [fila.enviar('commentary', nome, tarefa(nome), prioridade=prioridade)[0]['id_tarefa']
+               for nome, prioridade in [('baixa', 9), ('padrao_1', 5), ('urgente', 0), ('padrao_2', 5)]]
+        posicoes = [fila.consultar(id_tarefa)['posicao_fila'] for id_tarefa in ids]
+        liberar.set()
+        for id_tarefa in [ocupando['id_tarefa'], *ids]:
+            await aguardar_fim(fila, id_tarefa)
+        await fila.parar()
+        return posicoes
+
+    posicoes = asyncio.run(principal())
+    assert posicoes == [4, 2, 1, 3]
+    assert ordem == ['ocupando', 'urgente', 'padrao_1', 'padrao_2', 'baixa']
+
+
+def test_falha_fica_registrada(fila):
+    async def falhar(avisar):
+        raise HTTPException(status_code=404, detail='Erro! Partida não encontrada.')
+
+    async def principal():
+        tarefa, _ = fila.enviar('match_summary', 'chave', falhar)
+        final = await aguardar_fim(fila, tarefa['id_tarefa'])
+        await fila.parar()
+        return final
+
+    final = asyncio.run(principal())
+    assert final['situacao'] == 'falhou' and final['erro'] == 'Erro! Partida não encontrada.'
+
+
+def test_fila_cheia(tmp_path):
+    fila = FilaTarefas(tmp_path / 'tarefas.sqlite3', trabalhadores=1, limite_fila=2, retencao_segundos=3600)
+
+    async def principal():
+        bloqueio = asyncio.Event()
+
+        async def esperar(avisar):
+            await bloqueio.wait()
+            return {}
+
+        fila.enviar('commentary', 'a', esperar)
+        fila.enviar('commentary', 'b', esperar)
+        with pytest.raises(FilaCheia):
+            fila.enviar('commentary', 'c', esperar)
+        await fila.parar()
+
+    asyncio.run(principal())
+    fila.fechar()
+
+
+def test_resultado_do_cache_reaproveita_a_tarefa_concluida(fila):
+    primeira = fila.registrar_concluida('match_summary', 'chave', {'id_partida': 1, 'resumo': 'resumo'})
+    segunda = fila.registrar_concluida('match_summary', 'chave', {'id_partida': 1, 'resumo': 'resumo'})
+    assert segunda['id_tarefa'] == primeira['id_tarefa'] and segunda['situacao'] == 'concluida'
+    # Um resultado diferente (resposta gerada de novo) vira outra tarefa
+    terceira = fila.registrar_concluida('match_summary', 'chave', {'id_partida': 1, 'resumo': 'resumo novo'})
+    assert terceira['id_tarefa'] != primeira['id_tarefa']
+    with fila._conectar() as conexao:
+        assert conexao.execute('SELECT COUNT(*) FROM tarefas').fetchone()[0] == 2
+
+
+def test_resultado_do_cache_reaproveita_a_tarefa_que_o_gerou(fila):
+    async def gerar(avisar):
+        return {'id_partida': 1, 'resumo': 'resumo'}
+
+    async def principal():
+        tarefa, _ = fila.enviar('match_summary', 'chave', gerar)
+        await aguardar_fim(fila, tarefa['id_tarefa'])
+        await fila.parar()
+        return tarefa
+
+    tarefa = asyncio.run(principal())
+    assert fila.registrar_concluida('match_summary', 'chave', {'id_partida': 1, 'resumo': 'resumo'})['id_tarefa'] \
+        == tarefa['id_tarefa']
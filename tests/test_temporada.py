@@ -0,0 +1,110 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from benchmarks.fixtures import gerar_partida
+from src import temporada
+from src.main import app
+from src.normalizacao import normalizar_eventos
+from src.repositorio import RepositorioEventos
+from src.temporada import carregar_temporada, comparar_times, ingerir_temporada, rankings_partidas, tabela_temporada, \
+    totais_jogadores
+
+IDS = [101, 102, 103]
+
+
+class CatalogoFalso:
+    def __init__(self, ids: list[int]):
+        self.ids = ids
+
+    def partidas(self, id_competicao: int, id_temporada: int) -> pd.DataFrame:
+        return pd.DataFrame({'match_id': self.ids})
+
+
+def carregar(id_partida: int) -> pd.DataFrame:
+    return gerar_partida(id_partida, numero_eventos=400, colunas_extras=0)
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    repositorio = RepositorioEventos(tmp_path / 'eventos', limite_bytes=10**9, carregador=carregar)
+    catalogo = CatalogoFalso(list(IDS))
+    monkeypatch.setattr(temporada, 'repositorio', repositorio)
+    monkeypatch.setattr(temporada, 'catalogo', catalogo)
+    monkeypatch.setattr(temporada, 'DIRETORIO_TEMPORADAS', tmp_path / 'temporadas')
+    monkeypatch.setattr(temporada, '_temporadas', OrderedDict())
+    return repositorio, catalogo
+
+
+@pytest.fixture
+def originais() -> pd.DataFrame:
+    return pd.concat([carregar(id_partida).assign(match_id=id_partida) for id_partida in IDS], ignore_index=True)
+
+
+def test_ingestao_grava_uma_particao_por_partida(ambiente, tmp_path):
+    repositorio, _ = ambiente
+    assert ingerir_temporada(11, 90) == {'partidas': 3, 'gravadas': 3, 'ja_existentes': 0}
+    particoes = sorted(caminho.parent.name for caminho in (tmp_path / 'temporadas').rglob('eventos.parquet'))
+    assert particoes == [f'match_id={id_partida}' for id_partida in IDS]
+    # A ingestão não ocupa a memória de partidas da API
+    assert not repositorio._memoria
+    assert ingerir_temporada(11, 90) == {'partidas': 3, 'gravadas': 0, 'ja_existentes': 3}
+
+
+def test_temporada_carregada_de_uma_vez_e_atualizada(ambiente, originais):
+    _, catalogo = ambiente
+    ingerir_temporada(11, 90)
+    eventos = carregar_temporada(11, 90)
+    assert len(eventos) == len(originais) and sorted(eventos['match_id'].unique()) == IDS
+    assert carregar_temporada(11, 90) is eventos
+    catalogo.ids.append(104)
+    ingerir_temporada(11, 90)
+    assert sorted(carregar_temporada(11, 90)['match_id'].unique()) == IDS + [104]
+    with pytest.raises(FileNotFoundError):
+        carregar_temporada(11, 91)
+
+
+def test_tabela_da_partida_normalizada_igual_a_da_original():
+    original = carregar(101)
+    normalizada = tabela_temporada(normalizar_eventos(original)[0])
+    direta = tabela_temporada(original)
+    pd.testing.assert_frame_equal(normalizada, direta)
+    np.testing.assert_allclose(direta['x'].dropna(), [local[0] for local in original['location'].dropna()], rtol=1e-6)
+
+
+def test_agregados_iguais_as_contagens_por_partida(ambiente, originais):
+    ingerir_temporada(11, 90)
+    eventos = carregar_temporada(11, 90)
+    jogador = 'Time Casa Jogador04'
+    do_jogador = originais[originais['player'] == jogador]
+    [totais] = totais_jogadores(eventos, jogador=jogador.lower())
+    assert totais['jogador'] == jogador and totais['time'] == 'Time Casa' and totais['partidas'] == 3
+    assert totais['passes'] == (do_jogador['type'] == 'Pass').sum()
+    assert totais['gols'] == ((do_jogador['type'] == 'Shot') & (do_jogador['shot_outcome'] == 'Goal')).sum()
+    assert totais['xg'] == pytest.approx(do_jogador['shot_statsbomb_xg'].sum(), abs=0.01)
+
+    ordenados = totais_jogadores(eventos, ordenar_por='finalizacoes', top=5)
+    assert len(ordenados) == 5
+    assert [linha['finalizacoes'] for linha in ordenados] == sorted((linha['finalizacoes'] for linha in ordenados), reverse=True)
+
+    times = {linha['time']: linha for linha in comparar_times(eventos)}
+    assert times['Time Fora']['faltas'] == ((originais['team'] == 'Time Fora') & (originais['type'] == 'Foul Committed')).sum()
+
+
+def test_rankings_por_partida(ambiente, originais):
+    ingerir_temporada(11, 90)
+    rankings = rankings_partidas(carregar_temporada(11, 90), 'Pass', top=2)
+    assert [ranking['match_id'] for ranking in rankings] == IDS
+    passes = originais[(originais['match_id'] == 102) & (originais['type'] == 'Pass')]['player'].value_counts()
+    assert [lider['quantidade'] for lider in rankings[1]['lideres']] == passes.head(2).tolist()
+
+
+def test_rotas_da_temporada(ambiente):
+    ingerir_temporada(11, 90)
+    with TestClient(app) as cliente:
+        assert len(cliente.get('/temporadas/11/90/jogadores', params={'top': 3}).json()) == 3
+        assert {linha['time'] for linha in cliente.get('/temporadas/11/90/times').json()} == {'Time Casa', 'Time Fora'}
+        assert len(cliente.get('/temporadas/11/90/rankings', params={'tipo': 'Shot'}).json()) == 3
+        assert cliente.get('/temporadas/11/90/jogadores', params={'ordenar_por': 'nome'}).status_code == 400
+        assert cliente.get('/temporadas/11/91/times').status_code == 404